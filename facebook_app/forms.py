@@ -1,7 +1,38 @@
 from django import forms
+from django.utils import timezone
 from .models import Facebook_orders
+from orders_app.sequences import next_value, peek_next
 import json 
 
+
+def _order_id_sequence():
+    """Today's NS{ddmmyy} prefix and the name of its counter."""
+    prefix = f"NS{timezone.localdate().strftime('%d%m%y')}"
+    return prefix, f'facebook.order_id.{prefix}'
+
+
+def _highest_order_number(prefix):
+    """Highest number already used after ``prefix`` (seeds a new day's counter)."""
+    suffixes = (order_id[len(prefix):] for order_id in Facebook_orders.objects.filter(order_id__startswith=prefix).values_list('order_id', flat=True))
+    return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+
+
+def _format_order_id(prefix, number):
+    return f'{prefix}{number:02d}'
+
+
+def next_facebook_order_id():
+    """Allocates the next NS{ddmmyy}{nn} order number; safe under concurrent saves."""
+    prefix, name = _order_id_sequence()
+    return _format_order_id(prefix, next_value(name, seed=lambda: _highest_order_number(prefix)))
+
+
+def facebook_order_id_preview():
+    """The order number a new order would get right now (not reserved)."""
+    prefix, name = _order_id_sequence()
+    return _format_order_id(prefix, peek_next(name, seed=lambda: _highest_order_number(prefix)))
+
+
 class FacebookOrderForm(forms.ModelForm):
 
     INDIAN_STATES = [
@@ -71,21 +102,23 @@ class FacebookOrderForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if not self.instance.pk:  # Only for new instances
-            from datetime import datetime
-            today = datetime.now().strftime('%d%m%y')
-            # Get the last order_id for today
-            last_order = Facebook_orders.objects.filter(order_id__startswith=f'NS{today}').order_by('-order_id').first()
-            if last_order:
-                try:
-                    # Extract the number from the last order_id and increment
-                    last_num = int(last_order.order_id[8:]) # Changed from 10 to 8 to get full number
-                    new_num = str(last_num + 1).zfill(1) # Zero pad to 4 digits
-                except (ValueError, IndexError):
-                    new_num = '01' # Start with 0001 if error
-            else:
-                new_num = '01' 
-            # Generate new order_id with date
-            self.initial['order_id'] = f'NS{today}{new_num}'
+            # Preview only: the number is allocated when the order is saved
+            self.initial['order_id'] = facebook_order_id_preview()
+
+    def validate_unique(self):
+        # A new order gets a fresh number in save(), whatever the form showed
+        exclude = self._get_validation_exclusions()
+        if not self.instance.pk:
+            exclude.add('order_id')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except forms.ValidationError as e:
+            self._update_errors(e)
+
+    def save(self, commit=True):
+        if not self.instance.pk:
+            self.instance.order_id = next_facebook_order_id()
+        return super().save(commit)
 
     def clean_products_json(self):
         data = self.cleaned_data.get('products_json')
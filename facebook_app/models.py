@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 import json 
 
@@ -81,6 +81,12 @@ class Facebook_orders(models.Model):
         default=list,
         help_text="List of items unselected during a shipment process, intended for a future clone action."
     )
+
+    def save(self, *args, **kwargs):
+        # The post_save handlers (dashboard counters, UnifiedOrder) commit with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"FB Order {self.order_id} ({self.billing_first_name or self.billing_email or ''})"
 
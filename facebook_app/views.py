@@ -4,13 +4,15 @@ from django.urls import reverse_lazy
 from django.views.generic import DeleteView 
 from django.db import transaction
 from django.contrib import messages
-from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
-from django.utils import timezone
-from datetime import timedelta
 
 from .models import Facebook_orders 
 from .forms import FacebookOrderForm
+from orders_app.cache import cached, order_cache_key
+from orders_app.models import PLATFORM_FACEBOOK
+from orders_app.overdue import annotate_overdue
+from orders_app.search import search_source_ids
+from orders_app.summaries import FacebookOrderRow
 from django.contrib.auth.decorators import login_required, permission_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 
@@ -32,62 +34,24 @@ def facebook_order_list_view(request):
     # --- Apply Search Filter ---
     if search_query:
         logger.debug(f"Facebook Applying search filter: '{search_query}'")
-        # Use Q objects for OR query on various fields
-        query_filter = Q(email__icontains=search_query) | \
-                       Q(phone__icontains=search_query) | \
-                       Q(alternet_number__icontains=search_query) | \
-                       Q(first_name__icontains=search_query) | \
-                       Q(last_name__icontains=search_query) | \
-                       Q(order_id__iexact=search_query) 
-        queryset = queryset.filter(query_filter)
+        # Indexed lookup in the shared order search tokens (see orders_app.search)
+        queryset = queryset.filter(pk__in=search_source_ids(search_query, PLATFORM_FACEBOOK))
         active_filter = True
 
-    # --- Calculate Overdue Highlight Flag for Facebook Orders ---
-    # WARNING: This processes the *entire* filtered queryset.
-    now = timezone.now()
-    two_days_ago = now - timedelta(days=2) # Highlight orders older than 2 days
-
-    # --- Configuration based on provided Facebook_orders model ---
-    # Statuses indicating the order needs attention and might be "overdue" if old.
-    # These come from your ORDER_STATUS_CHOICES
-    actionable_statuses = ['pending', 'processing', 'on-hold'] # <-- Review this list if needed
-    status_field_name = 'status'          # Correct field name from model
-    date_field_name = 'date_created'      # Correct field name from model
-    # --- End Configuration ---
-
-    processed_orders = [] 
-    for order in queryset: 
-        # Set a default value first
-        order.is_overdue_highlight = False
-        try:
-            # Safely access fields using getattr and check date validity
-            current_status = getattr(order, status_field_name, None)
-            creation_date = getattr(order, date_field_name, None)
-
-            if creation_date: 
-                status_needs_action = (
-                    current_status and 
-                    current_status in actionable_statuses
-                )
-
-                # Check if it's older than 2 days (assuming timezone compatibility)
-                is_old = creation_date < two_days_ago
-
-                # Highlight if both conditions are met
-                if status_needs_action and is_old:
-                    order.is_overdue_highlight = True
-
-        except Exception as e:
-            # Log unexpected errors during highlight calculation
-            order_id_str = getattr(order, 'order_id', getattr(order, 'id', 'N/A')) 
-            logger.error(f"Error calculating highlight for Facebook Order ID {order_id_str}: {e}", exc_info=True)
-            order.is_overdue_highlight = False 
-
-        processed_orders.append(order) 
+    # Overdue flag computed in SQL; ?sort=overdue lists overdue orders first
+    queryset = annotate_overdue(queryset)
+    if request.GET.get('sort') == 'overdue':
+        queryset = queryset.order_by('-is_overdue_highlight', '-date_created')
+
+    # Compact summaries holding only the listed columns (no products JSON)
+    orders = cached(
+        order_cache_key('facebook_list', [PLATFORM_FACEBOOK], request.GET),
+        lambda: FacebookOrderRow.fetch(queryset),
+    )
 
     # --- Prepare Context ---
     context = {
-        'orders': processed_orders,
+        'orders': orders,
         'page_title': 'Facebook Orders',
         'current_search_query': search_query, 
         'active_filter': active_filter,
@@ -118,7 +82,9 @@ def facebook_order_create_view(request):
 
         if form.is_valid():
             try:
-                order_instance = form.save()
+                # Order row and dashboard counters commit together
+                with transaction.atomic():
+                    order_instance = form.save()
                 messages.success(request, f"Order {order_instance.order_id} created successfully!")
                 # return redirect('facebook_order_detail', order_id=order_instance.order_id)
                 return redirect('facebook_index')
@@ -150,7 +116,8 @@ def facebook_order_edit_view(request, order_id):
         form = FacebookOrderForm(request.POST, instance=order_instance)
         if form.is_valid():
             try:
-                form.save()
+                with transaction.atomic():
+                    form.save()
                 messages.success(request, f"Order {order_instance.order_id} updated successfully!")
                 return redirect('facebook_index')
             except Exception as e:
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 04:46
+
+import django.utils.timezone
+import invoice_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_app', '0002_invoice_payment_method_invoice_shipping_cost_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company_name',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_name', models.CharField(max_length=100)),
+                ('company_address', models.TextField()),
+                ('company_phone', models.CharField(max_length=15)),
+                ('company_email', models.EmailField(max_length=254)),
+                ('company_website', models.URLField()),
+                ('company_logo', models.ImageField(blank=True, null=True, upload_to='company_logo/')),
+            ],
+            options={
+                'verbose_name_plural': 'Company Details',
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invoice_id', models.CharField(default=invoice_app.models.Order.generate_invoice_id, editable=False, max_length=6, unique=True)),
+                ('order_id', models.CharField(max_length=100, unique=True)),
+                ('order_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('customer_name', models.CharField(max_length=200)),
+                ('customer_address', models.TextField()),
+                ('customer_email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('customer_phone', models.CharField(max_length=15)),
+                ('order_total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('order_status', models.CharField(default='pending', max_length=50)),
+                ('order_items', models.JSONField(default=dict)),
+                ('order_shipment_status', models.CharField(default='pending', max_length=50)),
+                ('order_notes', models.TextField(blank=True, null=True)),
+                ('payment_method', models.CharField(default='cash', max_length=100)),
+                ('shipping_charge', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+            ],
+            options={
+                'ordering': ['-order_date'],
+            },
+        ),
+    ]
@@ -1,11 +1,26 @@
 from django.db import models
-import random
 from django.utils import timezone
 from datetime import datetime
+from orders_app.sequences import next_value
+
+# Six-digit invoice IDs, handed out in order by the invoice.invoice_id sequence
+INVOICE_ID_SEQUENCE = 'invoice.invoice_id'
+INVOICE_ID_START = 100000
+INVOICE_ID_MAX = 999999
 
 class Order(models.Model):
     def generate_invoice_id():
-        return str(random.randint(100000, 999999))
+        """
+        Next free invoice ID from the sequence. IDs used by the old random
+        generator are skipped; there is a fixed number of them, so the
+        sequence soon runs past them all.
+        """
+        while True:
+            value = next_value(INVOICE_ID_SEQUENCE, seed=INVOICE_ID_START - 1)
+            if value > INVOICE_ID_MAX:
+                raise ValueError("Six-digit invoice IDs are exhausted.")
+            if not Order.objects.filter(invoice_id=str(value)).exists():
+                return str(value)
     invoice_id = models.CharField(max_length=6, default=generate_invoice_id, editable=False, unique=True)
     order_id = models.CharField(max_length=100, unique=True)
     order_date = models.DateTimeField(default=timezone.now)
@@ -1,9 +1,8 @@
-from django.shortcuts import get_object_or_404
-from woocommerce_app.models import WooCommerceOrder
 from shopify_app.models import ShopifyOrder
 from facebook_app.models import Facebook_orders
 from .models import Order, Invoice,Company_name
-from django.http import HttpResponse
+from orders_app.keys import resolve_order
+from django.http import Http404, HttpResponse
 from django.template.loader import render_to_string
 from django.core.files.base import ContentFile
 import json
@@ -17,11 +16,12 @@ logger = logging.getLogger(__name__)
 def _get_order_data(order_id):
     """Return normalized order data for the given ID from any platform."""
 
-    order_id_str = str(order_id)
+    # Shopify name/id, WooCommerce id/number or Facebook order_id: one registry lookup
+    order_source = resolve_order(order_id)
+    if order_source is None:
+        raise Http404(f"Order {order_id} not found in any source")
 
-    # Shopify: IDs start with # or @# (e.g. #1234, @#LE1234)
-    if order_id_str.startswith('#') or order_id_str.startswith('@#'):
-        order_source = get_object_or_404(ShopifyOrder, name=order_id_str)
+    if isinstance(order_source, ShopifyOrder):
         shipping = order_source.shipping_address_json or {}
         raw = order_source.raw_data or {}
         address = ", ".join(filter(None, [
@@ -48,9 +48,7 @@ def _get_order_data(order_id):
             'shipping_charge': raw.get('shipping_charge', 0),
         }
 
-    # Facebook: IDs start with NS (e.g. NS202398)
-    elif order_id_str.startswith('NS'):
-        order_source = get_object_or_404(Facebook_orders, order_id=order_id_str)
+    elif isinstance(order_source, Facebook_orders):
         address = ", ".join(filter(None, [
             order_source.address,
             order_source.city,
@@ -74,9 +72,8 @@ def _get_order_data(order_id):
             'shipping_charge': order_source.shipment_amount or 0,
         }
 
-    # WooCommerce: Integer or UUID as PK
-    elif WooCommerceOrder.objects.filter(pk=order_id).exists():
-        order_source = WooCommerceOrder.objects.get(pk=order_id)
+    # WooCommerce
+    else:
         raw = order_source.raw_data or {}
         return {
             'order_id': str(order_source.woo_id),
@@ -94,35 +91,6 @@ def _get_order_data(order_id):
             'shipping_charge': raw.get('shipping_charge', 0),
         }
 
-    # Optional: Facebook fallback if PK matches (not recommended unless you use integer PKs for Facebook orders)
-    elif Facebook_orders.objects.filter(pk=order_id).exists():
-        order_source = Facebook_orders.objects.get(pk=order_id)
-        address = ", ".join(filter(None, [
-            order_source.address,
-            order_source.city,
-            order_source.state,
-            order_source.postcode,
-            order_source.country,
-        ]))
-        return {
-            'order_id': order_source.order_id,
-            'customer_name': f"{order_source.first_name} {order_source.last_name}".strip(),
-            'order_date' : order_source.date_created,
-            'customer_address': address,
-            'customer_email': order_source.email,
-            'customer_phone': order_source.phone,
-            'order_total': order_source.total_amount or 0,
-            'order_status': order_source.status,
-            'order_items': order_source.products_json or {},
-            'order_shipment_status': order_source.shipment_status,
-            'order_notes': order_source.customer_note,
-            'payment_method': order_source.mode_of_payment or '',
-            'shipping_charge': order_source.shipment_amount or 0,
-        }
-
-    raise Exception("Order not found in any source")
-
-
 
 def _get_or_create_invoice(order_id):
     order_data = _get_order_data(order_id)
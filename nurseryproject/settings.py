@@ -4,6 +4,7 @@ import pymysql
 pymysql.install_as_MySQLdb()
 from django.utils import timezone
 from dotenv import load_dotenv
+from celery.schedules import crontab
 from django.conf import settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,6 +56,7 @@ INSTALLED_APPS = [
     'facebook_app',
     'whatsapp_app',
     'shipment_app',
+    'orders_app',
     'rest_framework',
 ]
 
@@ -94,6 +96,18 @@ WOOCOMMERCE_STORE_URL = os.getenv('WOOCOMMERCE_STORE_URL')
 WOOCOMMERCE_CONSUMER_KEY = os.getenv('WOOCOMMERCE_CONSUMER_KEY')
 WOOCOMMERCE_CONSUMER_SECRET = os.getenv('WOOCOMMERCE_CONSUMER_SECRET')
 WOOCOMMERCE_WEBHOOK_SECRET = os.getenv('WOOCOMMERCE_WEBHOOK_SECRET', 'a-very-strong-random-secret')
+# Shared API client: connection pool size, timeout (s), retries on 429/5xx and backoff factor (s)
+WOOCOMMERCE_API_POOL_SIZE = int(os.getenv('WOOCOMMERCE_API_POOL_SIZE', 10))
+WOOCOMMERCE_API_TIMEOUT = int(os.getenv('WOOCOMMERCE_API_TIMEOUT', 20))
+WOOCOMMERCE_API_MAX_RETRIES = int(os.getenv('WOOCOMMERCE_API_MAX_RETRIES', 3))
+WOOCOMMERCE_API_BACKOFF = float(os.getenv('WOOCOMMERCE_API_BACKOFF', 0.5))
+# Incremental sync re-reads this many seconds behind its checkpoint; lock expiry guards crashed runs
+WOOCOMMERCE_SYNC_OVERLAP_SECONDS = int(os.getenv('WOOCOMMERCE_SYNC_OVERLAP_SECONDS', 60))
+WOOCOMMERCE_SYNC_LOCK_SECONDS = 600
+# Webhook bursts for one order within this many seconds trigger a single API refetch
+WOOCOMMERCE_WEBHOOK_COALESCE_SECONDS = int(os.getenv('WOOCOMMERCE_WEBHOOK_COALESCE_SECONDS', 10))
+# Save the signed webhook body directly instead of refetching the order from the API
+WOOCOMMERCE_WEBHOOK_TRUST_PAYLOAD = os.getenv('WOOCOMMERCE_WEBHOOK_TRUST_PAYLOAD', 'true').lower() == 'true'
 
 # --- Shopify Settings ---
 SHOPIFY_STORE_DOMAIN = os.getenv('SHOPIFY_STORE_DOMAIN')
@@ -102,6 +116,10 @@ SHOPIFY_ADMIN_ACCESS_TOKEN = os.getenv('SHOPIFY_ADMIN_ACCESS_TOKEN')
 SHOPIFY_API_KEY = os.getenv('SHOPIFY_API_KEY')
 SHOPIFY_API_SECRET_KEY = os.getenv('SHOPIFY_API_SECRET_KEY')
 SHOPIFY_WEBHOOK_SECRET = os.getenv('SHOPIFY_WEBHOOK_SECRET', 'SHOPIFY_API_SECRET_KEY')
+# How long a delivered X-Shopify-Webhook-Id is remembered; Shopify retries for up to 48 hours
+SHOPIFY_WEBHOOK_ID_TTL_SECONDS = int(os.getenv('SHOPIFY_WEBHOOK_ID_TTL_SECONDS', 48 * 60 * 60))
+# Webhook refetches use a lean GraphQL field selection; 'true' stores the full REST order (debugging)
+SHOPIFY_ORDER_FETCH_FULL_PAYLOAD = os.getenv('SHOPIFY_ORDER_FETCH_FULL_PAYLOAD', 'false').lower() == 'true'
 
 # --- whatsapp Settings ---
 WHATSAPP_ACCESS_TOKEN = os.getenv('WHATSAPP_ACCESS_TOKEN')
@@ -282,6 +300,21 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache for order list/detail/dashboard queries (invalidated via orders_app.cache generations)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/2",
+        "KEY_PREFIX": "nursery",
+    },
+}
+ORDER_CACHE_TIMEOUT = 120  # seconds; writes invalidate immediately, this only bounds time-based drift
+
+# Shopify REST rate-limit bucket shared by all workers (shopify_app.ratelimit); unset = per process
+SHOPIFY_RATE_LIMIT_REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/2"
+# Calls of headroom low-priority work (backfills, list syncs) leaves for webhook fetches
+SHOPIFY_RATE_LIMIT_RESERVE = int(os.getenv('SHOPIFY_RATE_LIMIT_RESERVE', 10))
+
 # Celery Configuration (Example)
 CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/0' 
 CELERY_RESULT_BACKEND = f'redis://{REDIS_HOST}:{REDIS_PORT}/1' 
@@ -290,3 +323,24 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Kolkata'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Static beat entries are synced into the django_celery_beat tables on startup
+CELERY_BEAT_SCHEDULE = {
+    'rebuild-order-rollups-nightly': {
+        'task': 'orders_app.tasks.rebuild_order_rollups_task',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'sync-modified-woocommerce-orders': {
+        'task': 'woocommerce_app.tasks.sync_modified_woo_orders_task',
+        'schedule': crontab(minute='*/5'),
+    },
+    'sync-woocommerce-products': {
+        'task': 'woocommerce_app.tasks.sync_woo_products_task',
+        'schedule': crontab(minute=15),
+    },
+    # Also picks up variation edits that left the parent's modified date alone
+    'sync-woocommerce-products-full-nightly': {
+        'task': 'woocommerce_app.tasks.sync_woo_products_task',
+        'schedule': crontab(hour=3, minute=0),
+        'kwargs': {'full': True},
+    },
+}
@@ -13,6 +13,8 @@ urlpatterns = [
     path('orders', views.all_orders_view, name='orders'),
     path('order_deatils_view/<str:order_id>',views.order_details_view,name='order_details_view'),
     path('orders/<str:order_id>',views.all_orders_edit, name='all_order_edit'),
+    path('sync-jobs', views.sync_jobs_view, name='sync_jobs'),
+    path('orders/api/', include('orders_app.urls')),
     path('accounts/', include('django.contrib.auth.urls')),
     path('woocommerce/', include('woocommerce_app.urls')),
     path('shopify/', include('shopify_app.urls')),
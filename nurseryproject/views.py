@@ -2,14 +2,19 @@ from django.shortcuts import render,redirect
 from facebook_app.models import Facebook_orders
 from shopify_app.models import ShopifyOrder
 from woocommerce_app.models import WooCommerceOrder
-from operator import itemgetter
-from django.db.models import Q
+from orders_app.keys import resolve_order
+from orders_app.models import PLATFORM_FACEBOOK, PLATFORM_SHOPIFY, PLATFORM_WOOCOMMERCE, SyncCheckpoint, SyncJob
+from orders_app.pagination import CursorStream, MergedCursorPaginator
+from orders_app.rollups import status_counts_since
+from orders_app.cache import ALL_PLATFORMS, cached, order_cache_key
+from orders_app.filters import filter_unified_orders
+from orders_app.overdue import annotate_overdue
+from orders_app.summaries import UnifiedOrderRow
 from datetime import datetime, timedelta
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 import logging
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime,parse_date
+from django.utils.dateparse import parse_datetime
 logger = logging.getLogger(__name__)
 
 @login_required
@@ -17,71 +22,65 @@ def dashboard_view(request):
     """
     Calculates and displays dashboard statistics for orders across platforms,
     categorizing by pending/processing vs. other statuses based on primary status fields.
-    Shows data for last 30 days only.
+    Shows data for last 30 days only, read from the pre-aggregated
+    OrderStatusDailyCount rows instead of counting the order tables.
     """
-    # Calculate date 30 days ago from now
-    thirty_days_ago = timezone.now() - timedelta(days=30)
+    # Counters are kept per local order day, so the window is the last 30 whole days
+    thirty_days_ago = timezone.localdate() - timedelta(days=30)
+    counts = cached(
+        order_cache_key('dashboard', ALL_PLATFORMS, {'since': thirty_days_ago}),
+        lambda: status_counts_since(thirty_days_ago),
+    )
 
-    # Get querysets for all platforms filtered by last 30 days
-    woo_orders = WooCommerceOrder.objects.filter(date_created_woo__gte=thirty_days_ago)
-    shopify_orders = ShopifyOrder.objects.filter(created_at_shopify__gte=thirty_days_ago)
-    fb_orders = Facebook_orders.objects.filter(date_created__gte=thirty_days_ago)
+    def count(platform, status_field, statuses):
+        return sum(counts.get((platform, status_field, status), 0) for status in statuses)
+
+    def total(platform):
+        # Every order is counted exactly once per field, so any field's sum is the total
+        return sum(n for (p, field, _), n in counts.items() if p == platform and field == 'shipment_status')
 
     # --- Calculate Total Counts ---
-    woo_total = woo_orders.count()
-    shopify_total = shopify_orders.count()
-    fb_total = fb_orders.count()
+    woo_total = total(PLATFORM_WOOCOMMERCE)
+    shopify_total = total(PLATFORM_SHOPIFY)
+    fb_total = total(PLATFORM_FACEBOOK)
     total_orders = woo_total + shopify_total + fb_total
 
     # --- Calculate "Pending Action" Counts ---
     # Based on statuses indicating the order likely needs processing or fulfillment work.
 
     # WooCommerce: Pending orders
-    woo_pending_orders = woo_orders.filter(
-        status__in=['pending', 'cancelled','failed',]
-    ).count()
+    woo_pending_orders = count(PLATFORM_WOOCOMMERCE, 'status', ['pending', 'cancelled', 'failed'])
     # WooCommerce: Processing status, on hold, partial paid
-    woo_not_shipped = woo_orders.filter(
-        status__in=['processing', 'on-hold', 'partial-paid']
-    ).count()
+    woo_not_shipped = count(PLATFORM_WOOCOMMERCE, 'status', ['processing', 'on-hold', 'partial-paid'])
 
     # Shopify: Pending Orders (based on financial status)
-    shopify_pending_orders = shopify_orders.filter(
-        financial_status__in=['pending', 'authorized', 'partially_paid']
-    ).count()
-
-    shopify_not_shipped_orders = shopify_orders.filter(
-        Q(fulfillment_status=None) |
-        Q(fulfillment_status__in=['unfulfilled', 'partially_fulfilled', 'scheduled', 'on_hold'])
-    ).count()
+    shopify_pending_orders = count(PLATFORM_SHOPIFY, 'financial_status', ['pending', 'authorized', 'partially_paid'])
 
+    # '' is the counter for orders without a fulfillment status
+    shopify_not_shipped_orders = count(
+        PLATFORM_SHOPIFY, 'fulfillment_status',
+        ['', 'unfulfilled', 'partially_fulfilled', 'scheduled', 'on_hold'],
+    )
 
     # Facebook: Pending, Processing, or On Hold status
-    fb_pending_orders = fb_orders.filter(
-        status='pending'
-    ).count()
+    fb_pending_orders = count(PLATFORM_FACEBOOK, 'status', ['pending'])
 
-    fb_not_shipped = fb_orders.filter(
-        status__in=['processing', 'on-hold']
-    ).count()
+    fb_not_shipped = count(PLATFORM_FACEBOOK, 'status', ['processing', 'on-hold'])
 
     total_pending_orders = woo_pending_orders + shopify_pending_orders + fb_pending_orders
     total_not_shipped = woo_not_shipped + shopify_not_shipped_orders + fb_not_shipped
 
     # --- Calculate "Other Status" Counts ---
     # These are orders in shipped/completed/delivered states
-    woo_shipped_orders = woo_orders.filter(
-        status__in=['completed', 'delivered', 'refunded',  'rto', 'lost', 'pickup-pending','not-picked', 'out-for-pickup', 'picked', 'dispatched', 'in-transit', 'on-process', 'ndr', 'rts', 'rto-pending', 'rto-dispatched', 'rto-in-transit']
-    ).count()
-    
-    shopify_shipped_orders = shopify_orders.filter(
-        fulfillment_status__in=['fulfilled', 'complete', 'shipped']
-    ).count()
-    
-    fb_shipped_orders = fb_orders.filter(
-        status__in=['completed', 'shipped', 'delivered']
-    ).count()
-    
+    woo_shipped_orders = count(
+        PLATFORM_WOOCOMMERCE, 'status',
+        ['completed', 'delivered', 'refunded',  'rto', 'lost', 'pickup-pending','not-picked', 'out-for-pickup', 'picked', 'dispatched', 'in-transit', 'on-process', 'ndr', 'rts', 'rto-pending', 'rto-dispatched', 'rto-in-transit'],
+    )
+
+    shopify_shipped_orders = count(PLATFORM_SHOPIFY, 'fulfillment_status', ['fulfilled', 'complete', 'shipped'])
+
+    fb_shipped_orders = count(PLATFORM_FACEBOOK, 'status', ['completed', 'shipped', 'delivered'])
+
     total_shipment_status = woo_shipped_orders + shopify_shipped_orders + fb_shipped_orders
 
     # --- Prepare Context ---
@@ -127,275 +126,29 @@ def all_orders_view(request):
     """
     Displays a combined, paginated list of orders from WooCommerce, Shopify, and Facebook,
     with filtering, searching, and overdue highlighting. Defaults to showing the last 35 days.
+    Reads from the denormalized UnifiedOrder table so filtering, ordering and paging
+    happen in a single SQL query.
     """
     # --- Get filter parameters ---
     search_query = request.GET.get('search_query', '').strip()
     date_filter_str = request.GET.get('date_filter', None)     
     days_filter_str = request.GET.get('days_filter', None)     
     not_shpped_filter_str = request.GET.get('not_shipped', None)
-    page_number = request.GET.get('page')
+    cursor_token = request.GET.get('cursor')
     items_per_page = 15 
 
-    # --- Time calculations (do once) ---
     now = timezone.now()
-    two_days_ago = now - timedelta(days=2)
-    thirty_five_days_ago = now - timedelta(days=35)
-
-    # --- Initialize Filter Variables ---
-    selected_date = None
-    num_days = None
-    start_date = None
-    active_filter = bool(search_query or date_filter_str or days_filter_str or not_shpped_filter_str)
-
-    # --- Parse Date/Days Filters (prioritize specific date) ---
-    if date_filter_str:
-        try:
-            selected_date = parse_date(date_filter_str)
-            if selected_date:
-                logger.debug(f"All Orders: Filtering by specific date: {selected_date}")
-                active_filter = True
-                # Add one day to include orders from entire selected date
-                end_date = selected_date + timedelta(days=1)
-            else:
-                logger.warning(f"All Orders: Invalid date format received: {date_filter_str}")
-                selected_date = None
-                end_date = None
-        except Exception as e:
-            logger.error(f"Error parsing date filter: {e}")
-            selected_date = None
-            end_date = None
-            
-    elif days_filter_str:
-        try:
-            num_days = int(days_filter_str)
-            if num_days > 0:
-                start_date = now - timedelta(days=num_days)
-                logger.debug(f"All Orders: Filtering by last {num_days} days (since {start_date})")
-                active_filter = True
-            else:
-                num_days = None
-        except (ValueError, TypeError):
-            logger.warning(f"All Orders: Invalid days filter value received: {days_filter_str}")
-            num_days = None
-    elif not_shpped_filter_str:
-        not_shipped = ['processing', 'on-hold', 'partial-paid']
-        query_filter = Q(status__in=not_shipped) & Q(date_created_woo__lt=two_days_ago)
-        active_filter = True
-    elif not active_filter:
-        start_date = thirty_five_days_ago
-        logger.debug(f"All Orders: Defaulting to orders from the last 35 days (since {start_date})")
-
-    # =================== WooCommerce Orders ===================
-    woo_queryset = WooCommerceOrder.objects.all()
-
-    # Apply Filters to WooCommerce Queryset
-    if search_query:
-        woo_queryset = woo_queryset.filter(
-            Q(woo_id__icontains=search_query) |
-            Q(billing_first_name__icontains=search_query) |
-            Q(billing_last_name__icontains=search_query) |
-            Q(billing_phone__icontains=search_query) |
-            Q(billing_city__icontains=search_query) |
-            Q(billing_postcode__icontains=search_query) |
-            Q(billing_email__icontains=search_query)
-        )
-    if selected_date:
-        woo_queryset = woo_queryset.filter(
-            date_created_woo__gte=selected_date,
-            date_created_woo__lt=end_date
-        )
-    elif start_date:
-        woo_queryset = woo_queryset.filter(date_created_woo__gte=start_date)
-    if not_shpped_filter_str:
-        not_shipped = ['processing', 'on-hold', 'partial-paid']
-        woo_queryset = woo_queryset.filter(Q(status__in=not_shipped) & Q(date_created_woo__lt=two_days_ago))
-
-    # Define highlight criteria for WooCommerce
-    woo_actionable_statuses = ['processing','on-hold','partial-paid']
-
-    # Process data and add highlight flag
-    woo_data = []
-    for o in woo_queryset:
-        highlight = False
-        try:
-            # Check status and date validity before comparing
-            if o.status and o.date_created_woo:
-                status_needs_action = o.status.lower() in woo_actionable_statuses
-                is_old = o.date_created_woo < two_days_ago
-                if status_needs_action and is_old:
-                    highlight = True
-        except Exception as e:
-            logger.error(f"Error calculating highlight for Woo Order {getattr(o, 'woo_id', 'N/A')}: {e}", exc_info=False)
-
-        woo_data.append({
-            'order_id': o.woo_id,
-            'date': o.date_created_woo,
-            'status': o.status,
-            'amount': o.total_amount,
-            'customer': f"{o.billing_first_name or ''} {o.billing_last_name or ''}".strip(),
-            'phone': o.billing_phone,
-            'pincode': o.billing_postcode,
-            'city': o.billing_city,
-            'note': o.customer_note,
-            'tracking': f'https://nurserynisarga.in/admin-track-order/?track_order_id={o.woo_id}',
-            'platform': 'WooCommerce',
-            'shipment_status': getattr(o, 'shipment_status', 'N/A'),
-            'is_overdue_highlight': highlight,
-        })
-
-    # =================== Shopify Orders ===================
-    shopify_queryset = ShopifyOrder.objects.all()
-
-    # Apply Filters to Shopify Queryset
-    if search_query:
-        shopify_queryset = shopify_queryset.filter(
-            Q(email__icontains=search_query) |
-            Q(name__icontains=search_query) |
-            Q(billing_address_json__phone__icontains=search_query) |
-            Q(billing_address_json__city__icontains=search_query) |
-            Q(billing_address_json__zip__icontains=search_query)
-        )
-    if selected_date:
-        shopify_queryset = shopify_queryset.filter(
-            created_at_shopify__gte=selected_date,
-            created_at_shopify__lt=end_date
-        )
-    elif start_date:
-        shopify_queryset = shopify_queryset.filter(created_at_shopify__gte=start_date)
-
-    # Define highlight criteria for Shopify
-    shopify_actionable_statuses = ['unfulfilled', 'partially_fulfilled', 'scheduled', 'on_hold']
-
-    # Process data and add highlight flag
-    shopify_data = []
-    for o in shopify_queryset:
-        highlight = False
-        try:
-            # Check if required fields exist and date is valid
-            if hasattr(o, 'fulfillment_status') and hasattr(o, 'created_at_shopify') and o.created_at_shopify:
-                current_status = o.fulfillment_status
-                needs_action = (
-                    current_status is None or
-                    (isinstance(current_status, str) and
-                     current_status.lower() in shopify_actionable_statuses)
-                )
-                is_old = o.created_at_shopify < two_days_ago
-                if needs_action and is_old:
-                    highlight = True
-        except Exception as e:
-            logger.error(f"Error calculating highlight for Shopify Order {getattr(o, 'name', 'N/A')}: {e}", exc_info=False)
-
-        # Extract other data safely
-        shipping = o.shipping_address_json or {}
-        tracking_url = 'N/A'
-        try:
-            if isinstance(o.raw_data, dict) and isinstance(o.raw_data.get("fulfillments"), list) and o.raw_data["fulfillments"]:
-                fulfillment = o.raw_data["fulfillments"][0]
-                if isinstance(fulfillment, dict):
-                    tracking_url = fulfillment.get("tracking_url", 'N/A')
-        except Exception:
-            pass
-
-        shopify_data.append({
-            'order_id': o.name,
-            'date': o.created_at_shopify,
-            'status': o.fulfillment_status,
-            'amount': o.total_price,
-            'customer': shipping.get('name', ''),
-            'phone': shipping.get('phone', ''),
-            'pincode': shipping.get('zip', ''),
-            'city': shipping.get('city', ''),
-            'note': getattr(o, 'note', getattr(o, 'internal_notes', '')),
-            'tracking': tracking_url,
-            'platform': 'Shopify',
-            'shipment_status': getattr(o, 'shipment_status', o.fulfillment_status),
-            'is_overdue_highlight': highlight,
-        })
-
-    # =================== Facebook Orders ===================
-    fb_queryset = Facebook_orders.objects.all()
-
-    # Apply Filters to Facebook Queryset
-    if search_query:
-        fb_queryset = fb_queryset.filter(
-            Q(order_id__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(alternet_number__icontains=search_query)
-        )
-    if selected_date:
-        fb_queryset = fb_queryset.filter(
-            date_created__gte=selected_date,
-            date_created__lt=end_date
-        )
-    elif start_date:
-        fb_queryset = fb_queryset.filter(date_created__gte=start_date)
-
-    # Define highlight criteria for Facebook (based on model analysis)
-    fb_actionable_statuses = ['pending', 'processing', 'on-hold']
-    fb_status_field = 'status'
-    fb_date_field = 'date_created'
-
-    # Process data and add highlight flag
-    fb_data = []
-    for o in fb_queryset:
-        highlight = False
-        try:
-            current_status = getattr(o, fb_status_field, None)
-            creation_date = getattr(o, fb_date_field, None)
-            if creation_date:
-                # Status check (already lowercase from choices)
-                status_needs_action = current_status in fb_actionable_statuses
-                is_old = creation_date < two_days_ago
-                if status_needs_action and is_old:
-                    highlight = True
-        except Exception as e:
-            logger.error(f"Error calculating highlight for FB Order {getattr(o, 'order_id', 'N/A')}: {e}", exc_info=False)
-
-        # Construct tracking URL safely
-        tracking_info = getattr(o, 'tracking_info', None)
-        fb_tracking_url = f'http://parcelx.in/tracking.php?waybill_no={tracking_info}' if tracking_info else 'N/A'
-
-        fb_data.append({
-            'order_id': o.order_id,
-            'date': o.date_created,
-            'status': o.status,
-            'amount': o.total_amount,
-            'customer': f"{o.first_name or ''} {o.last_name or ''}".strip(),
-            'phone': o.phone,
-            'pincode': o.postcode,
-            'city': o.city,
-            'note': o.customer_note,
-            'tracking': fb_tracking_url,
-            'platform': 'Facebook',
-            'shipment_status': getattr(o, 'shipment_status', 'N/A'),
-            'is_overdue_highlight': highlight,
-        })
-
-    # ================= Combine, Sort, Paginate =================
-    combined_orders = woo_data + shopify_data + fb_data
-
-    # Sort by date (descending) - ensure date objects are valid and comparable
-    try:
-        combined_orders_sorted = sorted(
-            [order for order in combined_orders if order.get('date')],
-            key=itemgetter('date'),
-            reverse=True
-        )
-    except TypeError as e:
-        logger.error(f"Error sorting combined orders by date: {e}. Check date types.")
-        combined_orders_sorted = combined_orders
-
-    # Pagination
-    paginator = Paginator(combined_orders_sorted, items_per_page)
-    try:
-        orders_page = paginator.page(page_number)
-    except PageNotAnInteger:
-        orders_page = paginator.page(1)
-    except EmptyPage:
-        orders_page = paginator.page(paginator.num_pages)
+
+    # Date/days/not-shipped/search filters are shared with the order exports
+    queryset, selected_date, active_filter = filter_unified_orders(request.GET, now=now)
+
+    # Overdue: still needs shipping and older than two days (computed in SQL)
+    queryset = annotate_overdue(queryset, now=now)
+
+    # Keyset pagination: each page is a LIMIT query after the previous page's last row
+    paginator = MergedCursorPaginator([CursorStream(queryset, 'orders', 'order_date', summary=UnifiedOrderRow)], items_per_page)
+    # Cached per filter/cursor combination; any order write moves to a new generation
+    orders_page = cached(order_cache_key('all_orders', ALL_PLATFORMS, request.GET), lambda: paginator.page(cursor_token))
 
     # ================= Context =================
     context = {
@@ -403,30 +156,21 @@ def all_orders_view(request):
         'current_search_query': search_query,
         'current_date_filter': date_filter_str if date_filter_str else '',
         'current_days_filter': days_filter_str if days_filter_str else '',
+        'current_not_shipped': not_shpped_filter_str if not_shpped_filter_str else '',
         'active_filter': active_filter,
-        'has_orders': bool(combined_orders_sorted),  # Add flag to check if orders exist
+        'has_orders': bool(orders_page),  # Add flag to check if orders exist
         'selected_date': selected_date,  # Pass selected date to template
     }
 
     return render(request, 'orders/orders.html', context)
 
-@login_required
-def order_details_view(request,order_id):
-    if '#' in str(order_id):
-        woo_order = None
-        shopify_order = ShopifyOrder.objects.filter(name=order_id).first()
-        fb_order = None
-    else:
-        # For WooCommerce IDs are integers, Facebook IDs are strings
-        try:
-            order_id_int = int(order_id)
-            woo_order = WooCommerceOrder.objects.filter(woo_id=order_id_int).first()
-            fb_order = None
-            shopify_order = None
-        except ValueError:
-            woo_order = None
-            shopify_order = None
-            fb_order = Facebook_orders.objects.filter(order_id=str(order_id)).first()
+def _order_details_data(order_id):
+    """Normalized detail data of the order known by ``order_id`` (None if unknown)."""
+    # One indexed lookup in the order key registry instead of guessing the platform
+    order = resolve_order(order_id)
+    woo_order = order if isinstance(order, WooCommerceOrder) else None
+    shopify_order = order if isinstance(order, ShopifyOrder) else None
+    fb_order = order if isinstance(order, Facebook_orders) else None
     if woo_order:
         order_data = {
             'order_id': woo_order.woo_id,
@@ -477,6 +221,16 @@ def order_details_view(request,order_id):
             }            
     else:
         order_data = None
+    return order_data
+
+
+@login_required
+def order_details_view(request,order_id):
+    # Served from the order cache until any platform's orders change
+    order_data = cached(
+        order_cache_key('order_detail', ALL_PLATFORMS, {'order_id': order_id}),
+        lambda: _order_details_data(order_id),
+    )
 
     context = {
         'order': order_data,
@@ -487,23 +241,11 @@ def order_details_view(request,order_id):
 
 @login_required
 def all_orders_edit(request, order_id):
-    # Get order from each platform and check which one matches
-    # For Shopify orders, ID contains '#' indicating string format
-    if '#' in str(order_id):
-        woo_order = None
-        shopify_order = ShopifyOrder.objects.filter(name=order_id).first()
-        fb_order = None
-    else:
-        # For WooCommerce and Facebook, IDs are integers
-        try:
-            order_id_int = int(order_id)
-            woo_order = WooCommerceOrder.objects.filter(woo_id=order_id_int).first()
-            fb_order = None
-            shopify_order = None
-        except ValueError:
-            woo_order = None
-            shopify_order = None
-            fb_order = Facebook_orders.objects.filter(order_id=order_id).first()
+    # One indexed lookup in the order key registry instead of guessing the platform
+    order = resolve_order(order_id)
+    woo_order = order if isinstance(order, WooCommerceOrder) else None
+    shopify_order = order if isinstance(order, ShopifyOrder) else None
+    fb_order = order if isinstance(order, Facebook_orders) else None
 
     if request.method == 'POST':
         # Get form data
@@ -588,3 +330,15 @@ def all_orders_edit(request, order_id):
 
     return render(request, 'orders/edit_order.html', context)
 
+
+
+@login_required
+def sync_jobs_view(request):
+    """Progress of the order backfill commands (SyncJob rows); refreshes itself while a job runs."""
+    jobs = SyncJob.objects.all()[:50]
+    context = {
+        'jobs': jobs,
+        'has_running': any(job.status == SyncJob.STATUS_RUNNING for job in jobs),
+        'checkpoints': SyncCheckpoint.objects.order_by('source'),
+    }
+    return render(request, 'orders/sync_jobs.html', context)
@@ -0,0 +1,38 @@
+from django.contrib import admin
+from .models import OrderKey, OrderStatusDailyCount, Sequence, SyncCheckpoint, SyncJob, UnifiedOrder
+
+@admin.register(UnifiedOrder)
+class UnifiedOrderAdmin(admin.ModelAdmin):
+    list_display = ('external_id', 'platform', 'order_date', 'status', 'shipment_status', 'amount', 'customer')
+    list_filter = ('platform', 'shipment_status', 'needs_action')
+    search_fields = ('external_id', 'customer', 'phone', 'email')
+    ordering = ('-order_date',)
+
+@admin.register(OrderStatusDailyCount)
+class OrderStatusDailyCountAdmin(admin.ModelAdmin):
+    list_display = ('day', 'platform', 'status_field', 'status', 'count')
+    list_filter = ('platform', 'status_field')
+    date_hierarchy = 'day'
+    ordering = ('-day', 'platform')
+
+@admin.register(OrderKey)
+class OrderKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'platform', 'woo_order', 'shopify_order', 'facebook_order')
+    list_filter = ('platform',)
+    search_fields = ('key',)
+    raw_id_fields = ('woo_order', 'shopify_order', 'facebook_order')
+
+@admin.register(SyncCheckpoint)
+class SyncCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('source', 'high_water', 'last_run_at', 'last_count')
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'command', 'status', 'cursor', 'processed', 'error_count', 'rate', 'started_at', 'updated_at')
+    list_filter = ('command', 'status')
+    readonly_fields = ('started_at', 'updated_at')
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value', 'updated_at')
+    search_fields = ('name',)
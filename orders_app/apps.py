@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class OrdersAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'orders_app'
+
+    def ready(self):
+        # Keep the cross-platform read models in step with every order save
+        from . import signals  # noqa: F401
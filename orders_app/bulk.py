@@ -0,0 +1,23 @@
+from django.db import connections, router
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=500):
+    """
+    Inserts or updates ``objs`` in batches with a single statement per batch
+    (INSERT ... ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT elsewhere).
+
+    Note: bulk writes bypass model save() and signals, so callers are
+    responsible for refreshing any derived tables afterwards.
+    """
+    if not objs:
+        return
+    connection = connections[router.db_for_write(model)]
+    options = {
+        'update_conflicts': True,
+        'update_fields': update_fields,
+        'batch_size': batch_size,
+    }
+    # MySQL resolves the conflict from any unique key and rejects an explicit target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields
+    model.objects.bulk_create(objs, **options)
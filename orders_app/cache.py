@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import PLATFORM_CHOICES
+
+logger = logging.getLogger(__name__)
+
+ALL_PLATFORMS = [platform for platform, _ in PLATFORM_CHOICES]
+_MISSING = object()
+
+
+def _generation_key(platform):
+    return f'orders:generation:{platform}'
+
+
+def _fresh_generation():
+    # Seeded from the clock so a counter lost from Redis never reuses an old value
+    return time.time_ns()
+
+
+def generations(platforms):
+    """Current generation counter of each platform, creating missing ones."""
+    keys = [_generation_key(platform) for platform in platforms]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, _fresh_generation(), timeout=None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump_generation(platform):
+    """
+    Invalidates every cached order query involving ``platform``. Runs after the
+    surrounding transaction commits, so a page re-cached in between cannot hold
+    pre-write data under the new generation.
+    """
+    def bump():
+        key = _generation_key(platform)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _fresh_generation(), timeout=None)
+        except Exception as e:
+            logger.error(f"Could not bump order cache generation for {platform}: {e}")
+
+    transaction.on_commit(bump)
+
+
+def order_cache_key(namespace, platforms, params):
+    """
+    Builds the cache key of an order query from its filter ``params`` and the
+    generations of the ``platforms`` it reads. Returns None when the cache is
+    unreachable, which makes ``cached()`` fall through to the database.
+    """
+    try:
+        gens = generations(platforms)
+    except Exception as e:
+        logger.warning(f"Order cache unavailable, querying database directly: {e}")
+        return None
+    items = params.items() if hasattr(params, 'items') else params
+    digest = hashlib.md5(repr(sorted((str(k), str(v)) for k, v in items)).encode('utf-8')).hexdigest()
+    return f"orders:{namespace}:{'.'.join(str(g) for g in gens)}:{digest}"
+
+
+def cached(key, compute, timeout=None):
+    """Returns the cached value for ``key`` or computes, stores and returns it."""
+    if key is None:
+        return compute()
+    try:
+        value = cache.get(key, _MISSING)
+    except Exception as e:
+        logger.warning(f"Order cache read failed for {key}: {e}")
+        return compute()
+    if value is not _MISSING:
+        return value
+    value = compute()
+    try:
+        cache.set(key, value, timeout or getattr(settings, 'ORDER_CACHE_TIMEOUT', 120))
+    except Exception as e:
+        logger.warning(f"Order cache write failed for {key}: {e}")
+    return value
@@ -0,0 +1,233 @@
+import csv
+import logging
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import Q
+from django.utils import timezone
+
+from facebook_app.models import Facebook_orders
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.catalog import line_item_pot_size
+from woocommerce_app.models import WooCommerceOrder
+
+from .models import PLATFORM_FACEBOOK, PLATFORM_SHOPIFY, PLATFORM_WOOCOMMERCE
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_HEADER = [
+    'Platform', 'Order ID', 'Order Date', 'Status', 'Shipment Status', 'Total',
+    'Customer', 'Phone', 'Email', 'Pincode', 'City', 'Note', 'Tracking URL',
+    'Item', 'SKU', 'Pot Size', 'Quantity', 'Item Price',
+]
+
+ORDER_COLUMNS = [
+    'platform', 'source_id', 'external_id', 'order_date', 'status', 'shipment_status', 'amount',
+    'customer', 'phone', 'email', 'pincode', 'city', 'note', 'tracking_url',
+]
+
+
+def _woo_item(item):
+    return [item.get('name', ''), item.get('sku', ''), line_item_pot_size(item, default=''), item.get('quantity', 0), item.get('price', '')]
+
+
+def _shopify_item(item):
+    return [item.get('name', ''), item.get('sku', ''), item.get('variant_title') or '', item.get('quantity', 0), item.get('price', '')]
+
+
+def _facebook_item(item):
+    return [item.get('product_name', ''), '', item.get('potSize') or '', item.get('quantity', 0), item.get('price', '')]
+
+
+# Platform -> (source model, line items field, item flattener)
+LINE_ITEM_SOURCES = {
+    PLATFORM_WOOCOMMERCE: (WooCommerceOrder, 'line_items_json', _woo_item),
+    PLATFORM_SHOPIFY: (ShopifyOrder, 'line_items_json', _shopify_item),
+    PLATFORM_FACEBOOK: (Facebook_orders, 'products_json', _facebook_item),
+}
+
+
+def _line_items(chunk):
+    """Fetches the line items of a chunk of orders: one query per platform present."""
+    items = {}
+    by_platform = {}
+    for order in chunk:
+        by_platform.setdefault(order['platform'], []).append(order['source_id'])
+    for platform, source_ids in by_platform.items():
+        model, field, flatten = LINE_ITEM_SOURCES[platform]
+        for pk, line_items in model.objects.filter(pk__in=source_ids).values_list('pk', field):
+            if isinstance(line_items, list):
+                items[(platform, pk)] = [flatten(item) for item in line_items if isinstance(item, dict)]
+    return items
+
+
+def _order_cells(order):
+    order_date = order['order_date']
+    return [
+        order['platform'], order['external_id'],
+        timezone.localtime(order_date).strftime('%Y-%m-%d %H:%M') if order_date else '',
+        order['status'] or '', order['shipment_status'] or '', order['amount'] if order['amount'] is not None else '',
+        order['customer'], order['phone'], order['email'] or '', order['pincode'], order['city'],
+        order['note'], order['tracking_url'],
+    ]
+
+
+def _order_chunks(queryset, chunk_size):
+    """
+    Yields the orders of ``queryset`` newest-first as lists of at most
+    ``chunk_size`` dicts. Each chunk is its own keyset (order_date, id) LIMIT
+    query, so neither the database driver nor Python ever holds the full
+    result set (MySQL client cursors buffer whole results, even with iterator()).
+    """
+    rows = queryset.values('id', *ORDER_COLUMNS)
+    dated = rows.filter(order_date__isnull=False).order_by('-order_date', '-id')
+    last = None
+    while True:
+        page = dated
+        if last:
+            page = page.filter(Q(order_date__lt=last[0]) | Q(order_date=last[0], id__lt=last[1]))
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            break
+        yield chunk
+        last = (chunk[-1]['order_date'], chunk[-1]['id'])
+
+    undated = rows.filter(order_date__isnull=True).order_by('-id')
+    last_id = None
+    while True:
+        page = undated.filter(id__lt=last_id) if last_id else undated
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            break
+        yield chunk
+        last_id = chunk[-1]['id']
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the header and then one row per line item (orders without items get
+    one row) for every UnifiedOrder in ``queryset``. Orders and their line items
+    are fetched a chunk at a time, so memory stays bounded by ``chunk_size``
+    whatever the size of the export.
+    """
+    yield EXPORT_HEADER
+    for chunk in _order_chunks(queryset, chunk_size):
+        yield from _chunk_rows(chunk)
+
+
+def _chunk_rows(chunk):
+    items = _line_items(chunk)
+    for order in chunk:
+        cells = _order_cells(order)
+        for item in items.get((order['platform'], order['source_id'])) or [['', '', '', '', '']]:
+            yield cells + item
+
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Yields CSV-encoded lines for ``rows`` (a UTF-8 BOM first so Excel detects the encoding)."""
+    writer = csv.writer(Echo())
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class _ChunkBuffer:
+    """Unseekable sink for zipfile that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Orders" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def stream_xlsx(rows, flush_every=500):
+    """
+    Yields an .xlsx workbook for ``rows`` as it is written. The sheet uses inline
+    strings and the zip is written in streaming mode, so nothing is buffered
+    beyond ``flush_every`` rows.
+    """
+    sink = _ChunkBuffer()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            workbook.writestr(name, content)
+        yield sink.drain()
+
+        with workbook.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for count, row in enumerate(rows, start=1):
+                sheet.write(f'<row>{"".join(_xlsx_cell(value) for value in row)}</row>'.encode('utf-8'))
+                if count % flush_every == 0:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -0,0 +1,89 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import UnifiedOrder
+from .overdue import overdue_q
+from .search import search_unified_orders
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_DAYS = 35
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _parse_day(value, label):
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        day = None
+    if value and not day:
+        logger.warning(f"All Orders: Invalid {label} received: {value}")
+    return day
+
+
+def filter_unified_orders(params, now=None):
+    """
+    Builds the filtered UnifiedOrder queryset shared by the all-orders list and
+    the exports, from a GET-style mapping:
+
+    - ``search_query``: indexed token search
+    - ``date_filter``: a single day; otherwise ``days_filter`` (last N days),
+      otherwise ``not_shipped`` (needs action and older than two days)
+    - ``date_from`` / ``date_to``: inclusive day range (exports)
+
+    With none of them the last 35 days are shown. Returns
+    (queryset, selected_date, active_filter).
+    """
+    now = now or timezone.now()
+    search_query = (params.get('search_query') or '').strip()
+    date_filter_str = params.get('date_filter')
+    days_filter_str = params.get('days_filter')
+    not_shipped_str = params.get('not_shipped')
+    date_from = _parse_day(params.get('date_from'), 'date_from')
+    date_to = _parse_day(params.get('date_to'), 'date_to')
+
+    selected_date = None
+    start_date = None
+    active_filter = bool(search_query or date_filter_str or days_filter_str or not_shipped_str or date_from or date_to)
+
+    queryset = UnifiedOrder.objects.all()
+
+    # --- Parse Date/Days Filters (prioritize specific date) ---
+    if date_filter_str:
+        selected_date = _parse_day(date_filter_str, 'date_filter')
+        if selected_date:
+            logger.debug(f"All Orders: Filtering by specific date: {selected_date}")
+            day_start = _day_start(selected_date)
+            queryset = queryset.filter(order_date__gte=day_start, order_date__lt=day_start + timedelta(days=1))
+    elif days_filter_str:
+        try:
+            num_days = int(days_filter_str)
+            if num_days > 0:
+                start_date = now - timedelta(days=num_days)
+                logger.debug(f"All Orders: Filtering by last {num_days} days (since {start_date})")
+        except (ValueError, TypeError):
+            logger.warning(f"All Orders: Invalid days filter value received: {days_filter_str}")
+    elif not_shipped_str:
+        queryset = queryset.filter(overdue_q(UnifiedOrder, now))
+    elif not active_filter:
+        start_date = now - timedelta(days=DEFAULT_WINDOW_DAYS)
+        logger.debug(f"All Orders: Defaulting to orders from the last {DEFAULT_WINDOW_DAYS} days (since {start_date})")
+
+    if start_date:
+        queryset = queryset.filter(order_date__gte=start_date)
+    if date_from:
+        queryset = queryset.filter(order_date__gte=_day_start(date_from))
+    if date_to:
+        queryset = queryset.filter(order_date__lt=_day_start(date_to) + timedelta(days=1))
+
+    if search_query:
+        # Indexed token lookup (names/emails by prefix, phone/pincode/order number exact)
+        queryset = search_unified_orders(search_query, queryset=queryset)
+
+    return queryset, selected_date, active_filter
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import bulk_upsert
+from .rollups import apply_rollup_deltas, rollup_fields, state_from_values
+from .sync import refresh_unified_orders
+
+logger = logging.getLogger(__name__)
+
+
+class IngestResult:
+    """Outcome of an ingest_orders() call."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.unchanged = 0
+        self.seconds = 0.0
+
+    @property
+    def written(self):
+        return self.created + self.updated
+
+    @property
+    def rows_per_second(self):
+        return self.written / self.seconds if self.seconds else 0.0
+
+    def add(self, other):
+        self.created += other.created
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.unchanged += other.unchanged
+        self.seconds += other.seconds
+        return self
+
+    def __repr__(self):
+        return f"<IngestResult created={self.created} updated={self.updated} skipped={self.skipped} unchanged={self.unchanged} {self.rows_per_second:.0f} rows/s>"
+
+
+def _aware(value):
+    return timezone.make_aware(value) if value is not None and timezone.is_naive(value) else value
+
+
+def payload_hash(row):
+    """SHA-256 of mapped field values, independent of key order."""
+    encoded = json.dumps(row, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def ingest_orders(model, key_field, rows, guard_field=None, hash_field=None, chunk_size=500):
+    """
+    Writes platform orders given as field-value dicts (each holding
+    ``key_field``) with one INSERT ... ON DUPLICATE KEY UPDATE per chunk and
+    per distinct set of fields, so a key missing from a row never clears the
+    stored column. Per chunk it also:
+
+    - skips rows whose ``guard_field`` timestamp is older than the stored one
+      (reordered deliveries never roll an order back),
+    - skips rows whose payload hash equals the stored ``hash_field``, so a
+      redelivered, unchanged order costs one SELECT and no write,
+    - moves the dashboard status counters by the net change,
+    - refreshes UnifiedOrder rows, search tokens and order keys.
+
+    Everything a chunk writes commits together. Returns an IngestResult.
+    """
+    result = IngestResult()
+    started = time.monotonic()
+    # Same order twice: the newer row by guard_field wins, else the last one
+    latest = {}
+    for row in rows:
+        previous = latest.get(row[key_field])
+        if guard_field and previous and previous.get(guard_field) and row.get(guard_field):
+            if _aware(row[guard_field]) < _aware(previous[guard_field]):
+                result.skipped += 1
+                continue
+        latest[row[key_field]] = row
+    unique = list(latest.values())
+    tracked = rollup_fields(model)
+    auto_now = [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+
+    for start in range(0, len(unique), chunk_size):
+        chunk = unique[start:start + chunk_size]
+        keys = [row[key_field] for row in chunk]
+        with transaction.atomic():
+            stored_fields = [key_field] + tracked + [f for f in (guard_field, hash_field) if f and f not in tracked]
+            stored = {
+                values[key_field]: values
+                for values in model.objects.select_for_update().filter(**{f'{key_field}__in': keys}).values(*stored_fields)
+            }
+
+            accepted = []
+            for row in chunk:
+                current = stored.get(row[key_field])
+                if guard_field and current and current[guard_field] and row.get(guard_field):
+                    if _aware(row[guard_field]) < current[guard_field]:
+                        logger.info(f"Ignoring stale {model.__name__} {row[key_field]}: {guard_field} older than stored.")
+                        result.skipped += 1
+                        continue
+                if hash_field:
+                    row = dict(row, **{hash_field: payload_hash(row)})
+                    if current and current[hash_field] == row[hash_field]:
+                        result.unchanged += 1
+                        continue
+                accepted.append(row)
+            if not accepted:
+                continue
+
+            groups = {}
+            for row in accepted:
+                groups.setdefault(frozenset(row), []).append(row)
+            for fields, group in groups.items():
+                update_fields = sorted(set(fields) - {key_field}) + [f for f in auto_now if f not in fields]
+                bulk_upsert(model, [model(**row) for row in group], [key_field], update_fields, batch_size=chunk_size)
+
+            written_keys = [row[key_field] for row in accepted]
+            written = model.objects.filter(**{f'{key_field}__in': written_keys})
+            apply_rollup_deltas(model, [
+                (state_from_values(model, stored[values[key_field]]) if values[key_field] in stored else None,
+                 state_from_values(model, values))
+                for values in written.values(key_field, *tracked)
+            ])
+            refresh_unified_orders(model, written)
+
+        result.updated += sum(1 for key in written_keys if key in stored)
+        result.created += sum(1 for key in written_keys if key not in stored)
+
+    result.seconds = time.monotonic() - started
+    logger.info(f"Ingested {model.__name__} orders: {result!r}")
+    return result
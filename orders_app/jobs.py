@@ -0,0 +1,89 @@
+import json
+import logging
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SyncJob
+
+logger = logging.getLogger(__name__)
+
+# A "running" job that has not checkpointed for this long is treated as crashed
+STALE_AFTER = timedelta(minutes=10)
+
+
+class JobAlreadyRunning(Exception):
+    pass
+
+
+def start_job(command, params, fresh=False):
+    """
+    Returns the unfinished SyncJob of ``command`` with identical ``params``
+    (resuming it) or a new one. ``fresh`` abandons any unfinished job.
+    Raises JobAlreadyRunning if a matching job checkpointed recently.
+    """
+    params_key = json.dumps(params, sort_keys=True, default=str)
+    unfinished = SyncJob.objects.filter(command=command, params_key=params_key).exclude(status=SyncJob.STATUS_COMPLETED)
+    if fresh:
+        unfinished.update(status=SyncJob.STATUS_FAILED, last_error='Abandoned by a --fresh run', finished_at=timezone.now())
+    else:
+        job = unfinished.order_by('-started_at').first()
+        if job:
+            if job.status == SyncJob.STATUS_RUNNING and timezone.now() - job.updated_at < STALE_AFTER:
+                raise JobAlreadyRunning(f"{job} checkpointed at {job.updated_at}; is it still running?")
+            job.status = SyncJob.STATUS_RUNNING
+            job.finished_at = None
+            job.save(update_fields=['status', 'finished_at', 'updated_at'])
+            logger.info(f"Resuming {job}.")
+            return job
+    job = SyncJob.objects.create(command=command, params=params, params_key=params_key)
+    logger.info(f"Started {job}.")
+    return job
+
+
+def record_batch(job, cursor, processed, created=0, updated=0, errors=0, last_error='', seconds=None, total_hint=None):
+    """
+    Advances ``job`` past a batch. Call inside the transaction that wrote the
+    batch so the checkpoint commits (or rolls back) together with the data.
+    """
+    job.cursor = str(cursor)
+    job.batches = F('batches') + 1
+    job.processed = F('processed') + processed
+    job.created_count = F('created_count') + created
+    job.updated_count = F('updated_count') + updated
+    job.error_count = F('error_count') + errors
+    if last_error:
+        job.last_error = last_error
+    if seconds:
+        job.rate = processed / seconds
+    if total_hint:
+        job.total_hint = total_hint
+    job.save()
+    job.refresh_from_db()
+
+
+def record_failed_batch(job, errors, last_error):
+    """
+    Counts a batch that failed to save without moving the cursor, so a
+    resumed run starts again at that batch. Call after its transaction
+    rolled back; stop the run afterwards, as later batches would advance
+    the cursor past the unsaved one.
+    """
+    job.refresh_from_db()
+    job.error_count = F('error_count') + errors
+    job.last_error = last_error
+    job.save(update_fields=['error_count', 'last_error', 'updated_at'])
+    job.refresh_from_db()
+
+
+def finish_job(job, error=None, paused=False):
+    """Marks ``job`` completed, failed (``error``) or paused (stopped early by a limit)."""
+    if error:
+        job.status = SyncJob.STATUS_FAILED
+    else:
+        job.status = SyncJob.STATUS_PAUSED if paused else SyncJob.STATUS_COMPLETED
+    if error:
+        job.last_error = str(error)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'last_error', 'finished_at', 'updated_at'])
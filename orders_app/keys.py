@@ -0,0 +1,65 @@
+import logging
+
+from django.db import transaction
+
+from facebook_app.models import Facebook_orders
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.models import WooCommerceOrder
+
+from .bulk import bulk_upsert
+from .models import OrderKey, PLATFORM_FACEBOOK, PLATFORM_SHOPIFY, PLATFORM_WOOCOMMERCE
+
+logger = logging.getLogger(__name__)
+
+# Source model -> (platform label, OrderKey foreign key field)
+KEY_TARGETS = {
+    WooCommerceOrder: (PLATFORM_WOOCOMMERCE, 'woo_order'),
+    ShopifyOrder: (PLATFORM_SHOPIFY, 'shopify_order'),
+    Facebook_orders: (PLATFORM_FACEBOOK, 'facebook_order'),
+}
+KEY_FIELDS = [field for _, field in KEY_TARGETS.values()]
+KEY_MAX_LENGTH = 100
+
+
+def order_keys(instance):
+    """Returns every identifier the platform order can be looked up by."""
+    if isinstance(instance, WooCommerceOrder):
+        values = [instance.woo_id, instance.number]
+    elif isinstance(instance, ShopifyOrder):
+        values = [instance.name, instance.shopify_id]
+    else:
+        values = [instance.order_id]
+    return {str(value).strip()[:KEY_MAX_LENGTH] for value in values if value not in (None, '')}
+
+
+def _key_objects(instance):
+    platform, field = KEY_TARGETS[type(instance)]
+    return [OrderKey(key=key, platform=platform, **{field: instance}) for key in order_keys(instance)]
+
+
+def register_order_keys(instances):
+    """
+    Points the identifiers of ``instances`` (orders of a single model) at them,
+    taking over keys that belonged to another order and dropping keys an order
+    no longer has (e.g. a renamed Shopify order).
+    """
+    instances = [instance for instance in instances if instance.pk]
+    if not instances:
+        return
+    _, field = KEY_TARGETS[type(instances[0])]
+    objs = [obj for instance in instances for obj in _key_objects(instance)]
+    with transaction.atomic():
+        OrderKey.objects.filter(**{f'{field}__in': instances}).exclude(key__in=[obj.key for obj in objs]).delete()
+        bulk_upsert(OrderKey, objs, ['key'], ['platform'] + KEY_FIELDS)
+
+
+def resolve_order(identifier):
+    """
+    Returns the platform order (WooCommerceOrder, ShopifyOrder or Facebook_orders)
+    known by ``identifier``, or None. One query on the unique key index.
+    """
+    identifier = str(identifier or '').strip()
+    if not identifier:
+        return None
+    order_key = OrderKey.objects.select_related(*KEY_FIELDS).filter(key=identifier[:KEY_MAX_LENGTH]).first()
+    return order_key.order if order_key else None
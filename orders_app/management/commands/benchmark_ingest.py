@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from shopify_app import ingest as shopify_ingest
+from shopify_app.models import ShopifyOrder
+from woocommerce_app import ingest as woo_ingest
+from woocommerce_app.models import WooCommerceOrder
+
+# Synthetic IDs far above real ones; everything is rolled back anyway
+BASE_ID = 9_000_000_000
+
+
+def _woo_payload(i, modified):
+    stamp = modified.strftime('%Y-%m-%dT%H:%M:%S')
+    return {
+        'id': BASE_ID + i, 'number': str(BASE_ID + i), 'status': 'processing', 'currency': 'INR', 'total': '499.00',
+        'billing': {'first_name': f'Bench{i}', 'last_name': 'Customer', 'city': 'Bengaluru', 'postcode': '560001', 'phone': f'98{i:08d}'},
+        'date_created_gmt': stamp, 'date_modified_gmt': stamp,
+        'line_items': [{'name': 'Rose', 'quantity': 2, 'price': '199.50'}],
+        'shipping_lines': [{'method_title': 'Flat rate', 'total': '100.00'}],
+    }
+
+
+def _shopify_payload(i, modified):
+    stamp = modified.isoformat()
+    return {
+        'id': BASE_ID + i, 'name': f'#B{i}', 'email': f'bench{i}@example.com', 'financial_status': 'paid',
+        'fulfillment_status': None, 'total_price': '499.00', 'currency': 'INR',
+        'billing_address': {'first_name': f'Bench{i}', 'city': 'Bengaluru', 'zip': '560001', 'phone': f'98{i:08d}'},
+        'line_items': [{'name': 'Rose', 'quantity': 2, 'price': '199.50'}],
+        'created_at': stamp, 'updated_at': stamp,
+    }
+
+
+PLATFORMS = {
+    'woocommerce': (WooCommerceOrder, 'woo_id', woo_ingest, _woo_payload),
+    'shopify': (ShopifyOrder, 'shopify_id', shopify_ingest, _shopify_payload),
+}
+
+
+class Command(BaseCommand):
+    """
+    Measures order ingestion throughput on synthetic API payloads: one pass
+    inserting new orders, one updating them and one redelivering the same
+    payloads, through the bulk ingest engine and (with --compare) the old
+    per-row update_or_create. Runs in a transaction that is rolled back, so
+    no data is left behind.
+    """
+    help = 'Benchmarks bulk order ingestion (rows/s) against the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--platform', choices=sorted(PLATFORMS), default='woocommerce')
+        parser.add_argument('--rows', type=int, default=1000, help='Orders per pass (default: 1000).')
+        parser.add_argument('--chunk', type=int, default=500, help='Orders per upsert statement (default: 500).')
+        parser.add_argument('--compare', action='store_true', help='Also time per-row update_or_create.')
+
+    def handle(self, *args, **options):
+        model, key_field, ingest, payload = PLATFORMS[options['platform']]
+        rows = options['rows']
+        now = timezone.now().replace(microsecond=0)
+        inserts = [payload(i, now - timedelta(hours=1)) for i in range(rows)]
+        updates = [payload(i, now) for i in range(rows)]
+
+        self.stdout.write(f"Benchmarking {options['platform']} ingestion: {rows} orders, chunks of {options['chunk']}.")
+        self._run('bulk', lambda data: ingest.ingest_orders(data, chunk_size=options['chunk']), inserts, updates)
+        if options['compare']:
+            self._run('update_or_create', lambda data: self._per_row(model, key_field, ingest, data), inserts, updates)
+
+    def _per_row(self, model, key_field, ingest, orders_data):
+        for order_data in orders_data:
+            fields = ingest.order_fields(order_data)
+            model.objects.update_or_create(**{key_field: fields.pop(key_field)}, defaults=fields)
+
+    def _run(self, label, write, inserts, updates):
+        with transaction.atomic():
+            for phase, data in (('insert', inserts), ('update', updates), ('unchanged', updates)):
+                started = time.monotonic()
+                write(data)
+                seconds = time.monotonic() - started
+                self.stdout.write(f"{label:>16} {phase}: {len(data) / seconds:,.0f} rows/s ({seconds:.2f} s)")
+            transaction.set_rollback(True)
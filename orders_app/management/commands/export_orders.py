@@ -0,0 +1,59 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders_app.export import EXPORT_FORMATS, export_rows
+from orders_app.filters import filter_unified_orders
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Writes the orders matching the all-orders filters to a CSV or XLSX file,
+    one row per line item. Rows are streamed to disk in chunks, so large
+    date ranges do not need to fit in memory.
+    """
+    help = 'Exports orders from all platforms to a CSV or XLSX file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str, help='Path of the file to write.')
+        parser.add_argument('--format', type=str, choices=list(EXPORT_FORMATS), default='csv', help='Export format (default: csv).')
+        parser.add_argument('--date_from', type=str, help='First order day to include (YYYY-MM-DD).')
+        parser.add_argument('--date_to', type=str, help='Last order day to include (YYYY-MM-DD).')
+        parser.add_argument('--days', type=str, help='Only orders from the last N days.')
+        parser.add_argument('--search', type=str, help='Same search as the All Orders page.')
+        parser.add_argument('--not_shipped', action='store_true', help='Only orders still waiting to ship for over two days.')
+
+    def handle(self, *args, **options):
+        params = {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'days_filter': options['days'],
+            'search_query': options['search'],
+            'not_shipped': '1' if options['not_shipped'] else None,
+        }
+        queryset, _, _ = filter_unified_orders(params)
+        stream, _ = EXPORT_FORMATS[options['format']]
+
+        rows = 0
+
+        def counted(source):
+            nonlocal rows
+            for row in source:
+                rows += 1
+                yield row
+
+        try:
+            if options['format'] == 'csv':
+                with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                    for chunk in stream(counted(export_rows(queryset))):
+                        f.write(chunk)
+            else:
+                with open(options['output'], 'wb') as f:
+                    for chunk in stream(counted(export_rows(queryset))):
+                        f.write(chunk)
+        except OSError as e:
+            raise CommandError(f"Could not write {options['output']}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {max(rows - 1, 0)} rows to {options['output']}."))
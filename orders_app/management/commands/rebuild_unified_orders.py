@@ -0,0 +1,54 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from orders_app.models import UnifiedOrder
+from orders_app.sync import SOURCES, refresh_unified_orders
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the UnifiedOrder read table from the WooCommerce, Shopify and
+    Facebook order tables. Run once after deploying, or any time the read
+    model is suspected to have drifted.
+    """
+    help = 'Rebuilds the combined UnifiedOrder table from all platform order tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--platform',
+            type=str,
+            choices=[platform for platform, _ in SOURCES.values()],
+            help='Only rebuild rows for this platform (default: all platforms).',
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=500,
+            help='Number of rows written per INSERT statement (default: 500).',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Also delete read rows whose source order no longer exists.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("Rebuilding unified order table..."))
+        total = 0
+        for model, (platform, _) in SOURCES.items():
+            if options['platform'] and options['platform'] != platform:
+                continue
+            written = refresh_unified_orders(model, batch_size=options['batch_size'])
+            self.stdout.write(f"{platform}: {written} rows written.")
+            total += written
+
+            if options['prune']:
+                deleted, _ = UnifiedOrder.objects.filter(platform=platform).exclude(
+                    source_id__in=model.objects.values('pk')
+                ).delete()
+                self.stdout.write(f"{platform}: {deleted} orphaned rows removed.")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} unified order rows written."))
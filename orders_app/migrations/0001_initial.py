@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnifiedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('WooCommerce', 'WooCommerce'), ('Shopify', 'Shopify'), ('Facebook', 'Facebook')], db_index=True, max_length=20)),
+                ('source_id', models.BigIntegerField(help_text='Primary key of the order in its platform table')),
+                ('external_id', models.CharField(db_index=True, help_text='Order ID shown to staff (Woo ID, Shopify name or Facebook order ID)', max_length=100)),
+                ('order_date', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(blank=True, max_length=50, null=True)),
+                ('shipment_status', models.CharField(blank=True, max_length=50, null=True)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('customer', models.CharField(blank=True, default='', max_length=255)),
+                ('phone', models.CharField(blank=True, default='', max_length=50)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('pincode', models.CharField(blank=True, default='', max_length=20)),
+                ('city', models.CharField(blank=True, default='', max_length=100)),
+                ('note', models.TextField(blank=True, default='')),
+                ('tracking_url', models.CharField(blank=True, default='', max_length=500)),
+                ('needs_action', models.BooleanField(default=False, help_text='Status is one the platform still has to ship (used for overdue highlighting)')),
+                ('django_date_modified', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Unified Order',
+                'verbose_name_plural': 'Unified Orders',
+                'ordering': ['-order_date', '-id'],
+                'indexes': [models.Index(fields=['-order_date', '-id'], name='unified_order_date_idx'), models.Index(fields=['needs_action', 'order_date'], name='unified_order_action_idx')],
+                'constraints': [models.UniqueConstraint(fields=('platform', 'source_id'), name='unique_unified_order_source')],
+            },
+        ),
+    ]
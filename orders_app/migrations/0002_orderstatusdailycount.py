@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('WooCommerce', 'WooCommerce'), ('Shopify', 'Shopify'), ('Facebook', 'Facebook')], max_length=20)),
+                ('day', models.DateField()),
+                ('status_field', models.CharField(help_text='Order field being counted, e.g. status or fulfillment_status', max_length=50)),
+                ('status', models.CharField(blank=True, default='', help_text="Field value ('' when the order has none)", max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Order Status Daily Count',
+                'verbose_name_plural': 'Order Status Daily Counts',
+                'ordering': ['-day', 'platform'],
+                'indexes': [models.Index(fields=['day', 'platform'], name='order_status_count_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('platform', 'day', 'status_field', 'status'), name='unique_order_status_daily_count')],
+            },
+        ),
+    ]
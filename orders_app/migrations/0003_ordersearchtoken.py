@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 04:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0002_orderstatusdailycount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=64)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='orders_app.unifiedorder')),
+            ],
+            options={
+                'verbose_name': 'Order Search Token',
+                'verbose_name_plural': 'Order Search Tokens',
+            },
+        ),
+    ]
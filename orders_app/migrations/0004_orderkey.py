@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facebook_app', '0007_remove_facebook_orders_internal_notes_and_more'),
+        ('orders_app', '0003_ordersearchtoken'),
+        ('shopify_app', '0009_shopifyorder_city_shopifyorder_customer_name_and_more'),
+        ('woocommerce_app', '0006_woocommerceorder_unselected_items_for_clone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('platform', models.CharField(choices=[('WooCommerce', 'WooCommerce'), ('Shopify', 'Shopify'), ('Facebook', 'Facebook')], max_length=20)),
+                ('facebook_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_keys', to='facebook_app.facebook_orders')),
+                ('shopify_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_keys', to='shopify_app.shopifyorder')),
+                ('woo_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_keys', to='woocommerce_app.woocommerceorder')),
+            ],
+            options={
+                'verbose_name': 'Order Key',
+                'verbose_name_plural': 'Order Keys',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0004_orderkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Sync identifier, e.g. woocommerce.orders', max_length=50, unique=True)),
+                ('high_water', models.DateTimeField(blank=True, help_text='Newest remote modified timestamp ingested (UTC)', null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_count', models.IntegerField(default=0, help_text='Orders written by the last run')),
+            ],
+            options={
+                'verbose_name': 'Sync Checkpoint',
+                'verbose_name_plural': 'Sync Checkpoints',
+            },
+        ),
+    ]
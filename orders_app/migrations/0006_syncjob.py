@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0005_synccheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(db_index=True, max_length=100)),
+                ('params', models.JSONField(default=dict, help_text='Options that define the job; a rerun with the same options resumes it')),
+                ('params_key', models.CharField(db_index=True, help_text='Canonical JSON of params, used to find a job to resume', max_length=255)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('paused', 'Paused'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('cursor', models.CharField(blank=True, default='', help_text='Last committed page number or since_id', max_length=100)),
+                ('batches', models.IntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('created_count', models.IntegerField(default=0)),
+                ('updated_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('rate', models.FloatField(default=0, help_text='Orders per second over the last batch')),
+                ('total_hint', models.IntegerField(blank=True, help_text='Total reported by the platform, if known', null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Sync Job',
+                'verbose_name_plural': 'Sync Jobs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
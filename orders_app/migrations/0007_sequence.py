@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0006_syncjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Counter identifier, e.g. invoice.invoice_id', max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0, help_text='Last value handed out')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sequence',
+                'verbose_name_plural': 'Sequences',
+            },
+        ),
+    ]
@@ -0,0 +1,222 @@
+from django.db import models
+
+from facebook_app.models import Facebook_orders
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.models import WooCommerceOrder
+
+
+PLATFORM_WOOCOMMERCE = 'WooCommerce'
+PLATFORM_SHOPIFY = 'Shopify'
+PLATFORM_FACEBOOK = 'Facebook'
+
+PLATFORM_CHOICES = [
+    (PLATFORM_WOOCOMMERCE, 'WooCommerce'),
+    (PLATFORM_SHOPIFY, 'Shopify'),
+    (PLATFORM_FACEBOOK, 'Facebook'),
+]
+
+
+class UnifiedOrder(models.Model):
+    """
+    Denormalized, read-only copy of the columns the combined order list needs.
+    One row per order on any platform, kept in sync from the platform tables
+    (see orders_app/sync.py) so listing, filtering and paging is a single query.
+    """
+    platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES, db_index=True)
+    source_id = models.BigIntegerField(help_text="Primary key of the order in its platform table")
+    external_id = models.CharField(
+        max_length=100,
+        db_index=True,
+        help_text="Order ID shown to staff (Woo ID, Shopify name or Facebook order ID)"
+    )
+    order_date = models.DateTimeField(blank=True, null=True)
+    status = models.CharField(max_length=50, blank=True, null=True)
+    shipment_status = models.CharField(max_length=50, blank=True, null=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    customer = models.CharField(max_length=255, blank=True, default='')
+    phone = models.CharField(max_length=50, blank=True, default='')
+    email = models.EmailField(blank=True, null=True)
+    pincode = models.CharField(max_length=20, blank=True, default='')
+    city = models.CharField(max_length=100, blank=True, default='')
+    note = models.TextField(blank=True, default='')
+    tracking_url = models.CharField(max_length=500, blank=True, default='')
+    needs_action = models.BooleanField(
+        default=False,
+        help_text="Status is one the platform still has to ship (used for overdue highlighting)"
+    )
+
+    django_date_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.platform} Order {self.external_id}"
+
+    class Meta:
+        verbose_name = "Unified Order"
+        verbose_name_plural = "Unified Orders"
+        ordering = ['-order_date', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['platform', 'source_id'], name='unique_unified_order_source'),
+        ]
+        indexes = [
+            models.Index(fields=['-order_date', '-id'], name='unified_order_date_idx'),
+            models.Index(fields=['needs_action', 'order_date'], name='unified_order_action_idx'),
+        ]
+
+
+class OrderStatusDailyCount(models.Model):
+    """
+    Number of orders per platform, local order day and status value.
+    Maintained incrementally on every order write (orders_app/rollups.py)
+    so the dashboard reads a handful of pre-aggregated rows.
+    """
+    platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES)
+    day = models.DateField()
+    status_field = models.CharField(max_length=50, help_text="Order field being counted, e.g. status or fulfillment_status")
+    status = models.CharField(max_length=50, blank=True, default='', help_text="Field value ('' when the order has none)")
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.platform} {self.day} {self.status_field}={self.status or '-'}: {self.count}"
+
+    class Meta:
+        verbose_name = "Order Status Daily Count"
+        verbose_name_plural = "Order Status Daily Counts"
+        ordering = ['-day', 'platform']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['platform', 'day', 'status_field', 'status'],
+                name='unique_order_status_daily_count',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'platform'], name='order_status_count_day_idx'),
+        ]
+
+
+class OrderSearchToken(models.Model):
+    """
+    Normalized search term of a UnifiedOrder (name words, email, phone digits,
+    pincode, order number...). Rebuilt whenever the order is synced so staff
+    search is an indexed lookup instead of multi-column substring scans.
+    """
+    order = models.ForeignKey(UnifiedOrder, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64, db_index=True)
+
+    def __str__(self):
+        return f"{self.token} -> {self.order_id}"
+
+    class Meta:
+        verbose_name = "Order Search Token"
+        verbose_name_plural = "Order Search Tokens"
+
+
+class OrderKey(models.Model):
+    """
+    Every external identifier an order can be looked up by (Shopify name and
+    id, WooCommerce id and number, Facebook order_id), pointing at exactly one
+    platform order. Maintained on write by orders_app/keys.py so resolving an
+    ID is one unique-index lookup with the order joined in.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES)
+    woo_order = models.ForeignKey(WooCommerceOrder, on_delete=models.CASCADE, null=True, blank=True, related_name='order_keys')
+    shopify_order = models.ForeignKey(ShopifyOrder, on_delete=models.CASCADE, null=True, blank=True, related_name='order_keys')
+    facebook_order = models.ForeignKey(Facebook_orders, on_delete=models.CASCADE, null=True, blank=True, related_name='order_keys')
+
+    @property
+    def order(self):
+        return self.woo_order or self.shopify_order or self.facebook_order
+
+    def __str__(self):
+        return f"{self.key} -> {self.platform}"
+
+    class Meta:
+        verbose_name = "Order Key"
+        verbose_name_plural = "Order Keys"
+
+
+class SyncCheckpoint(models.Model):
+    """
+    High-water mark of an incremental platform sync: the newest remote
+    modification time already ingested for ``source``. The next run only
+    asks the platform for orders modified after it.
+    """
+    source = models.CharField(max_length=50, unique=True, help_text="Sync identifier, e.g. woocommerce.orders")
+    high_water = models.DateTimeField(blank=True, null=True, help_text="Newest remote modified timestamp ingested (UTC)")
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    last_count = models.IntegerField(default=0, help_text="Orders written by the last run")
+
+    def __str__(self):
+        return f"{self.source} @ {self.high_water or '-'}"
+
+    class Meta:
+        verbose_name = "Sync Checkpoint"
+        verbose_name_plural = "Sync Checkpoints"
+
+
+class SyncJob(models.Model):
+    """
+    Progress of a long-running backfill command. The cursor (page number or
+    since_id) is saved in the same transaction as each batch's writes, so a
+    restarted command resumes right after the last committed batch.
+    See orders_app/jobs.py.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_PAUSED = 'paused'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_PAUSED, 'Paused'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    command = models.CharField(max_length=100, db_index=True)
+    params = models.JSONField(default=dict, help_text="Options that define the job; a rerun with the same options resumes it")
+    params_key = models.CharField(max_length=255, db_index=True, help_text="Canonical JSON of params, used to find a job to resume")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    cursor = models.CharField(max_length=100, blank=True, default='', help_text="Last committed page number or since_id")
+    batches = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    rate = models.FloatField(default=0, help_text="Orders per second over the last batch")
+    total_hint = models.IntegerField(blank=True, null=True, help_text="Total reported by the platform, if known")
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.command} #{self.pk} ({self.status}, cursor {self.cursor or '-'})"
+
+    @property
+    def percent(self):
+        if not self.total_hint:
+            return None
+        return min(100, round(100 * self.processed / self.total_hint))
+
+    class Meta:
+        verbose_name = "Sync Job"
+        verbose_name_plural = "Sync Jobs"
+        ordering = ['-started_at']
+
+
+class Sequence(models.Model):
+    """
+    Named counter handing out order and invoice numbers. The row is locked
+    (SELECT ... FOR UPDATE) while it is incremented, so concurrent requests
+    never get the same value. See orders_app/sequences.py.
+    """
+    name = models.CharField(max_length=100, unique=True, help_text="Counter identifier, e.g. invoice.invoice_id")
+    value = models.BigIntegerField(default=0, help_text="Last value handed out")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    class Meta:
+        verbose_name = "Sequence"
+        verbose_name_plural = "Sequences"
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.db.models import BooleanField, Case, CharField, Q, Value, When
+from django.utils import timezone
+
+from facebook_app.models import Facebook_orders
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.models import WooCommerceOrder
+
+from .models import UnifiedOrder
+from .sync import FB_ACTIONABLE_STATUSES, SHOPIFY_ACTIONABLE_STATUSES, WOO_ACTIONABLE_STATUSES
+
+# Unshipped orders older than this are highlighted on the order lists
+OVERDUE_AFTER_DAYS = 2
+
+# Shipment screen card classes by order age, oldest bucket first
+AGE_BUCKETS = [
+    (4, 'three_days_old'),
+    (3, 'two_days_old'),
+]
+AGE_DEFAULT = 'normal'
+
+# Per order table: date field and "still has to be shipped" condition
+OVERDUE_SOURCES = {
+    WooCommerceOrder: ('date_created_woo', Q(status__in=WOO_ACTIONABLE_STATUSES)),
+    ShopifyOrder: ('created_at_shopify', Q(fulfillment_status__isnull=True) | Q(fulfillment_status__in=SHOPIFY_ACTIONABLE_STATUSES)),
+    Facebook_orders: ('date_created', Q(status__in=FB_ACTIONABLE_STATUSES)),
+    UnifiedOrder: ('order_date', Q(needs_action=True)),
+}
+
+
+def overdue_q(model, now=None):
+    """Condition matching ``model`` orders that still need shipping and are overdue."""
+    date_field, needs_action = OVERDUE_SOURCES[model]
+    cutoff = (now or timezone.now()) - timedelta(days=OVERDUE_AFTER_DAYS)
+    return needs_action & Q(**{f'{date_field}__lt': cutoff})
+
+
+def annotate_overdue(queryset, now=None):
+    """
+    Adds two columns computed in SQL to an order queryset:
+
+    - ``is_overdue_highlight``: still needs shipping and older than
+      OVERDUE_AFTER_DAYS (usable in filter() and order_by())
+    - ``age_highlight``: the shipment card class from AGE_BUCKETS
+    """
+    now = now or timezone.now()
+    date_field, _ = OVERDUE_SOURCES[queryset.model]
+    return queryset.annotate(
+        is_overdue_highlight=Case(
+            When(overdue_q(queryset.model, now), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+        age_highlight=Case(
+            *[When(**{f'{date_field}__lte': now - timedelta(days=days)}, then=Value(label)) for days, label in AGE_BUCKETS],
+            default=Value(AGE_DEFAULT),
+            output_field=CharField(),
+        ),
+    )
+
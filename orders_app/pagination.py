@@ -0,0 +1,129 @@
+import base64
+import heapq
+import logging
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class CursorStream:
+    """
+    One date-ordered source feeding a MergedCursorPaginator.
+
+    ``name`` identifies the stream inside the cursor and breaks ties between
+    streams whose rows share the same timestamp; ``transform`` (optional) turns
+    each fetched row into the item handed to the template. With ``summary`` (an
+    orders_app.summaries.OrderSummary type, which must include ``pk`` and the
+    date field) rows are fetched as compact summaries instead of model instances.
+    """
+
+    def __init__(self, queryset, name, date_field, transform=None, summary=None):
+        self.queryset = queryset
+        self.name = name
+        self.date_field = date_field
+        self.transform = transform
+        self.summary = summary
+
+    def fetch(self, cursor, limit):
+        """Returns up to ``limit`` (key, item) pairs that sort strictly after ``cursor``."""
+        queryset = self.queryset.filter(**{f'{self.date_field}__isnull': False})
+        if cursor:
+            cursor_date, cursor_name, cursor_pk = cursor
+            after = Q(**{f'{self.date_field}__lt': cursor_date})
+            if self.name < cursor_name:
+                after |= Q(**{self.date_field: cursor_date})
+            elif self.name == cursor_name:
+                after |= Q(**{self.date_field: cursor_date, 'pk__lt': cursor_pk})
+            queryset = queryset.filter(after)
+
+        page = queryset.order_by(f'-{self.date_field}', '-pk')[:limit]
+        rows = []
+        for obj in (self.summary.fetch(page) if self.summary else page):
+            key = (getattr(obj, self.date_field), self.name, obj.pk)
+            rows.append((key, self.transform(obj) if self.transform else obj))
+        return rows
+
+
+class CursorPage:
+    """A single page of merged results plus the cursor of the following page."""
+
+    def __init__(self, items, cursor, next_cursor):
+        self.object_list = items
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return bool(self.cursor)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class MergedCursorPaginator:
+    """
+    Keyset paginator over one or more date-ordered querysets.
+
+    Every stream is asked for at most ``per_page + 1`` rows after the cursor
+    (a LIMIT query each), the slices are merged newest-first with a heap and the
+    page is cut from the merge. Work and memory per page therefore depend only
+    on ``per_page`` and the number of streams, never on how many rows match.
+    The cursor is the (date, stream name, pk) of the last row shown.
+    """
+
+    def __init__(self, streams, per_page):
+        self.streams = streams
+        self.per_page = per_page
+
+    def page(self, cursor_token=None):
+        cursor = decode_cursor(cursor_token)
+        limit = self.per_page + 1
+        merged = heapq.merge(
+            *(stream.fetch(cursor, limit) for stream in self.streams),
+            key=lambda row: row[0],
+            reverse=True,
+        )
+
+        rows = []
+        for row in merged:
+            rows.append(row)
+            if len(rows) == limit:
+                break
+
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = encode_cursor(rows[-1][0])
+        return CursorPage([item for _, item in rows], cursor_token if cursor else None, next_cursor)
+
+
+def encode_cursor(key):
+    """Serializes a (date, stream name, pk) key into an opaque URL-safe token."""
+    order_date, name, pk = key
+    raw = f"{order_date.isoformat()}|{name}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(token):
+    """Parses a cursor token back into a key. Invalid tokens restart from the first page."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8')
+        date_str, name, pk = raw.split('|')
+        order_date = parse_datetime(date_str)
+        if order_date is None:
+            raise ValueError(f"Unparseable cursor date: {date_str}")
+        return order_date, name, int(pk)
+    except (ValueError, UnicodeError) as e:
+        logger.warning(f"Ignoring invalid pagination cursor '{token}': {e}")
+        return None
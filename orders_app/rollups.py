@@ -0,0 +1,168 @@
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from facebook_app.models import Facebook_orders
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.models import WooCommerceOrder
+
+from .cache import bump_generation
+from .models import OrderStatusDailyCount
+from .sync import platform_for_model
+
+logger = logging.getLogger(__name__)
+
+# Source model -> (order date field, status fields counted per day)
+ROLLUP_SOURCES = {
+    WooCommerceOrder: ('date_created_woo', ['status', 'shipment_status']),
+    ShopifyOrder: ('created_at_shopify', ['financial_status', 'fulfillment_status', 'shipment_status']),
+    Facebook_orders: ('date_created', ['status', 'shipment_status']),
+}
+
+
+def state_from_values(model, values):
+    """
+    Reduces an order's values to its rollup state: (local day, {field: value}).
+    Orders without a date are not counted and yield None.
+    """
+    date_field, status_fields = ROLLUP_SOURCES[model]
+    order_date = values.get(date_field)
+    if order_date is None:
+        return None
+    if timezone.is_aware(order_date):
+        order_date = timezone.localtime(order_date)
+    return order_date.date(), {field: values.get(field) or '' for field in status_fields}
+
+
+def instance_rollup_state(instance):
+    """Rollup state of an in-memory order instance."""
+    date_field, status_fields = ROLLUP_SOURCES[type(instance)]
+    values = {field: getattr(instance, field) for field in [date_field] + status_fields}
+    return state_from_values(type(instance), values)
+
+
+def rollup_fields(model):
+    """Order date field followed by the status fields counted for ``model``."""
+    date_field, status_fields = ROLLUP_SOURCES[model]
+    return [date_field] + status_fields
+
+
+def stored_rollup_state(model, pk):
+    """
+    Rollup state of the row currently stored in the database (None if
+    missing). Locks the row, so call it inside the transaction that writes
+    it; concurrent saves of one order then compute their deltas in turn.
+    """
+    if pk is None:
+        return None
+    date_field, status_fields = ROLLUP_SOURCES[model]
+    values = model.objects.select_for_update().filter(pk=pk).values(date_field, *status_fields).first()
+    return state_from_values(model, values) if values else None
+
+
+def _bump(platform, day, status_field, status, delta):
+    counter, _ = OrderStatusDailyCount.objects.get_or_create(
+        platform=platform, day=day, status_field=status_field, status=status,
+    )
+    OrderStatusDailyCount.objects.filter(pk=counter.pk).update(count=F('count') + delta)
+
+
+def apply_rollup_delta(model, old_state, new_state):
+    """
+    Moves one order between counters: -1 on every bucket it left, +1 on every
+    bucket it entered. Unchanged buckets cost no queries.
+    """
+    if old_state == new_state:
+        return
+    platform = platform_for_model(model)
+    old_day, old_statuses = old_state if old_state else (None, {})
+    new_day, new_statuses = new_state if new_state else (None, {})
+    with transaction.atomic():
+        for field in ROLLUP_SOURCES[model][1]:
+            old_key = (old_day, old_statuses.get(field)) if old_state else None
+            new_key = (new_day, new_statuses.get(field)) if new_state else None
+            if old_key == new_key:
+                continue
+            if old_key:
+                _bump(platform, old_key[0], field, old_key[1], -1)
+            if new_key:
+                _bump(platform, new_key[0], field, new_key[1], 1)
+
+
+def apply_rollup_deltas(model, transitions):
+    """
+    Bulk form of apply_rollup_delta for many orders at once: ``transitions``
+    is an iterable of (old_state, new_state). Deltas are summed per bucket
+    first, so each touched counter costs one get_or_create and one update.
+    """
+    platform = platform_for_model(model)
+    deltas = Counter()
+    for old_state, new_state in transitions:
+        if old_state == new_state:
+            continue
+        old_day, old_statuses = old_state if old_state else (None, {})
+        new_day, new_statuses = new_state if new_state else (None, {})
+        for field in ROLLUP_SOURCES[model][1]:
+            old_key = (old_day, field, old_statuses.get(field)) if old_state else None
+            new_key = (new_day, field, new_statuses.get(field)) if new_state else None
+            if old_key == new_key:
+                continue
+            if old_key:
+                deltas[old_key] -= 1
+            if new_key:
+                deltas[new_key] += 1
+    with transaction.atomic():
+        for (day, field, status), delta in deltas.items():
+            if delta:
+                _bump(platform, day, field, status, delta)
+
+
+def status_counts_since(start_day):
+    """
+    Returns {(platform, status_field, status): orders} summed over every day
+    from ``start_day`` onwards, in a single aggregate query.
+    """
+    rows = (
+        OrderStatusDailyCount.objects.filter(day__gte=start_day)
+        .values('platform', 'status_field', 'status')
+        .annotate(total=Sum('count'))
+    )
+    return {(row['platform'], row['status_field'], row['status']): row['total'] for row in rows}
+
+
+def rebuild_rollups(since_day=None, chunk_size=2000):
+    """
+    Recomputes every counter (or those from ``since_day`` onwards) straight from
+    the order tables, correcting any drift. Rows are streamed, so memory only
+    grows with the number of distinct buckets. Returns the number of counters written.
+    """
+    written = 0
+    for model, (date_field, status_fields) in ROLLUP_SOURCES.items():
+        platform = platform_for_model(model)
+        queryset = model.objects.exclude(**{f'{date_field}__isnull': True})
+        if since_day:
+            start = timezone.make_aware(timezone.datetime.combine(since_day, timezone.datetime.min.time()))
+            queryset = queryset.filter(**{f'{date_field}__gte': start})
+
+        counts = Counter()
+        for values in queryset.values(date_field, *status_fields).iterator(chunk_size=chunk_size):
+            day, statuses = state_from_values(model, values)
+            for field, status in statuses.items():
+                counts[(day, field, status)] += 1
+
+        stale = OrderStatusDailyCount.objects.filter(platform=platform)
+        if since_day:
+            stale = stale.filter(day__gte=since_day)
+        with transaction.atomic():
+            stale.delete()
+            OrderStatusDailyCount.objects.bulk_create([
+                OrderStatusDailyCount(platform=platform, day=day, status_field=field, status=status, count=count)
+                for (day, field, status), count in counts.items()
+            ], batch_size=1000)
+        bump_generation(platform)
+        logger.info(f"Rebuilt {len(counts)} {platform} status counters.")
+        written += len(counts)
+    return written
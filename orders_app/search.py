@@ -0,0 +1,133 @@
+import logging
+import re
+
+from facebook_app.models import Facebook_orders
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.models import WooCommerceOrder
+
+from .models import OrderSearchToken, UnifiedOrder
+
+logger = logging.getLogger(__name__)
+
+TOKEN_MAX_LENGTH = 64
+MAX_SEARCH_TERMS = 5
+# Indian mobile numbers: keep the last 10 digits so +91/0 prefixes don't matter
+PHONE_DIGITS = 10
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_NON_DIGIT_RE = re.compile(r'\D')
+_PHONE_PUNCTUATION_RE = re.compile(r'[\s\-+().]')
+
+
+def normalize_phone(value):
+    """Reduces a phone number to its last 10 digits ('' if it has fewer than 6)."""
+    digits = _NON_DIGIT_RE.sub('', value or '')
+    return digits[-PHONE_DIGITS:] if len(digits) >= 6 else ''
+
+
+def _words(value):
+    return _WORD_RE.findall((value or '').lower())
+
+
+def _platform_extras(instance):
+    """Searchable values that only exist on the platform order, not on UnifiedOrder."""
+    if isinstance(instance, WooCommerceOrder):
+        return [instance.number], []
+    if isinstance(instance, ShopifyOrder):
+        billing = instance.billing_address_json if isinstance(instance.billing_address_json, dict) else {}
+        return [instance.financial_status, billing.get('city'), billing.get('zip')], [billing.get('phone')]
+    if isinstance(instance, Facebook_orders):
+        return [], [instance.alternet_number]
+    return [], []
+
+
+def order_search_tokens(order, instance=None):
+    """
+    Returns the set of tokens a UnifiedOrder should be found by. ``instance`` is
+    the platform order it was built from and contributes platform-only fields.
+    """
+    extra_words, extra_phones = _platform_extras(instance)
+    tokens = set()
+    for value in [order.external_id, order.customer, order.city, order.pincode, order.status] + extra_words:
+        tokens.update(_words(str(value) if value is not None else ''))
+    if order.email:
+        tokens.add(order.email.strip().lower())
+        tokens.update(_words(order.email))
+    for phone in [order.phone] + extra_phones:
+        phone = normalize_phone(phone)
+        if phone:
+            tokens.add(phone)
+    return {token[:TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+def index_unified_order(order, instance=None):
+    """Replaces the search tokens of a single saved UnifiedOrder."""
+    OrderSearchToken.objects.filter(order=order).delete()
+    OrderSearchToken.objects.bulk_create(
+        [OrderSearchToken(order=order, token=token) for token in order_search_tokens(order, instance)]
+    )
+
+
+def index_unified_orders(platform, pairs):
+    """
+    Replaces the search tokens of many orders at once. ``pairs`` is a list of
+    (unsaved or saved UnifiedOrder, platform order) as produced by the bulk
+    refresh path; the database ids are looked up by (platform, source_id).
+    """
+    if not pairs:
+        return
+    ids = dict(
+        UnifiedOrder.objects.filter(platform=platform, source_id__in=[o.source_id for o, _ in pairs])
+        .values_list('source_id', 'pk')
+    )
+    OrderSearchToken.objects.filter(order_id__in=ids.values()).delete()
+    OrderSearchToken.objects.bulk_create([
+        OrderSearchToken(order_id=ids[order.source_id], token=token)
+        for order, instance in pairs if order.source_id in ids
+        for token in order_search_tokens(order, instance)
+    ], batch_size=1000)
+
+
+def parse_search_terms(query):
+    """
+    Splits a search box value into (token, exact) terms. Digit-only terms (order
+    numbers, pincodes, phones) must match exactly; words match by prefix so
+    results update as the user types. A query that is only a phone number with
+    spaces/dashes/+91 is treated as one normalized phone term.
+    """
+    query = (query or '').strip().lower()
+    compact = _PHONE_PUNCTUATION_RE.sub('', query)
+    if compact.isdigit():
+        return [(normalize_phone(compact) if len(compact) > PHONE_DIGITS else compact, True)]
+
+    terms = []
+    for piece in query.split():
+        if '@' in piece:
+            terms.append((piece[:TOKEN_MAX_LENGTH], False))
+            continue
+        for word in _words(piece):
+            terms.append((word[:TOKEN_MAX_LENGTH], word.isdigit()))
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def search_unified_orders(query, platform=None, queryset=None):
+    """
+    Filters UnifiedOrder rows (optionally of one platform) to those matching
+    every term of ``query``. Each term is an indexed semi-join on the token table.
+    """
+    if queryset is None:
+        queryset = UnifiedOrder.objects.all()
+    if platform:
+        queryset = queryset.filter(platform=platform)
+    terms = parse_search_terms(query)
+    if not terms:
+        return queryset.none()
+    for token, exact in terms:
+        lookup = 'token' if exact else 'token__istartswith'
+        queryset = queryset.filter(pk__in=OrderSearchToken.objects.filter(**{lookup: token}).values('order_id'))
+    return queryset
+
+
+def search_source_ids(query, platform):
+    """Primary keys of the ``platform`` orders matching ``query``, as a subquery."""
+    return search_unified_orders(query, platform=platform).values('source_id')
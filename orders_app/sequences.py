@@ -0,0 +1,36 @@
+from django.db import IntegrityError, transaction
+
+from .models import Sequence
+
+
+def _seed_value(seed):
+    return int(seed() if callable(seed) else seed or 0)
+
+
+def next_value(name, seed=0):
+    """
+    Returns the next value of counter ``name``. The counter row is locked
+    for the increment, so concurrent callers always get distinct values;
+    inside an outer transaction the lock is held until it commits, and a
+    rollback gives the value back. A missing counter starts after ``seed``
+    (a number, or a callable computing it from existing rows).
+    """
+    with transaction.atomic():
+        sequence = Sequence.objects.select_for_update().filter(name=name).first()
+        if sequence is None:
+            try:
+                # Savepoint: a concurrent creator wins and we lock its row instead
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, value=_seed_value(seed))
+            except IntegrityError:
+                pass
+            sequence = Sequence.objects.select_for_update().get(name=name)
+        sequence.value += 1
+        sequence.save(update_fields=['value', 'updated_at'])
+        return sequence.value
+
+
+def peek_next(name, seed=0):
+    """The value next_value() would hand out now, without reserving it (for display only)."""
+    current = Sequence.objects.filter(name=name).values_list('value', flat=True).first()
+    return (current if current is not None else _seed_value(seed)) + 1
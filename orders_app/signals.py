@@ -0,0 +1,42 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .cache import bump_generation
+from .rollups import apply_rollup_delta, instance_rollup_state, stored_rollup_state
+from .sync import SOURCES, platform_for_model, remove_unified_order, sync_unified_order
+
+logger = logging.getLogger(__name__)
+
+
+def order_pre_save(sender, instance, raw=False, **kwargs):
+    """Remembers the stored date/statuses so post_save can move the dashboard counters."""
+    if raw:
+        return
+    instance._rollup_state = stored_rollup_state(sender, instance.pk)
+
+
+def order_saved(sender, instance, raw=False, **kwargs):
+    """
+    Mirrors every platform order save (webhooks, sync commands, edits) into
+    the read model. The platform models save inside transaction.atomic(), so
+    the counter delta and the order row commit or roll back together.
+    """
+    if raw:
+        return
+    sync_unified_order(instance)
+    apply_rollup_delta(sender, getattr(instance, '_rollup_state', None), instance_rollup_state(instance))
+    instance._rollup_state = instance_rollup_state(instance)
+    bump_generation(platform_for_model(sender))
+
+
+def order_deleted(sender, instance, **kwargs):
+    remove_unified_order(instance)
+    apply_rollup_delta(sender, instance_rollup_state(instance), None)
+    bump_generation(platform_for_model(sender))
+
+
+for _model in SOURCES:
+    pre_save.connect(order_pre_save, sender=_model, dispatch_uid=f'order_rollup_pre_save_{_model.__name__}')
+    post_save.connect(order_saved, sender=_model, dispatch_uid=f'unified_order_saved_{_model.__name__}')
+    post_delete.connect(order_deleted, sender=_model, dispatch_uid=f'unified_order_deleted_{_model.__name__}')
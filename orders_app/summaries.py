@@ -0,0 +1,157 @@
+import logging
+
+from facebook_app.models import ORDER_STATUS_CHOICES as FB_ORDER_STATUS_CHOICES
+
+from .cache import cached
+
+logger = logging.getLogger(__name__)
+
+
+class OrderSummary:
+    """
+    Compact, read-only stand-in for a model instance on list pages.
+
+    Subclasses are built with ``summary_type``: ``columns`` maps each attribute
+    to the ORM lookup fetched with ``values_list()`` (JSON key transforms such as
+    ``raw_data__meta_data`` are allowed), ``extra`` names attributes the view
+    fills in afterwards. Instances use ``__slots__`` and never load, decode or
+    keep the JSON blobs a list does not show.
+    """
+    __slots__ = ()
+    columns = {}
+    extra = ()
+
+    def __init__(self, values):
+        for name, value in zip(self.columns, values):
+            setattr(self, name, value)
+        for name in self.extra:
+            setattr(self, name, None)
+
+    @classmethod
+    def fetch(cls, queryset):
+        """Evaluates ``queryset`` fetching only this summary's columns."""
+        return [cls(row) for row in queryset.values_list(*cls.columns.values())]
+
+    def __repr__(self):
+        return f"<{type(self).__name__} pk={getattr(self, 'pk', None)}>"
+
+
+def summary_type(name, columns, extra=()):
+    """Creates an OrderSummary subclass whose slots are ``columns`` plus ``extra``."""
+    return type(name, (OrderSummary,), {
+        '__slots__': tuple(columns) + tuple(extra),
+        'columns': dict(columns),
+        'extra': tuple(extra),
+    })
+
+
+class SummaryProjection:
+    """
+    Lazy, countable and sliceable view of a queryset that yields summaries,
+    so it can be handed to Django's Paginator in place of the queryset. With a
+    ``cache_key`` (see orders_app.cache.order_cache_key) the count and every
+    page slice are served from the order cache.
+    """
+
+    def __init__(self, queryset, summary_cls, cache_key=None):
+        self.queryset = queryset
+        self.summary_cls = summary_cls
+        self.cache_key = cache_key
+
+    @property
+    def ordered(self):
+        return self.queryset.ordered
+
+    def count(self):
+        key = f'{self.cache_key}:count' if self.cache_key else None
+        return cached(key, self.queryset.count)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self.summary_cls.fetch(self.queryset))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            cache_key = f'{self.cache_key}:{key.start}:{key.stop}' if self.cache_key else None
+            return cached(cache_key, lambda: self.summary_cls.fetch(self.queryset[key]))
+        return self.summary_cls.fetch(self.queryset[key:key + 1])[0]
+
+
+# --- List page rows (querysets annotated by orders_app.overdue.annotate_overdue) ---
+
+UnifiedOrderRow = summary_type('UnifiedOrderRow', {
+    'pk': 'pk', 'platform': 'platform', 'external_id': 'external_id', 'order_date': 'order_date',
+    'status': 'status', 'amount': 'amount', 'customer': 'customer', 'phone': 'phone',
+    'pincode': 'pincode', 'city': 'city', 'note': 'note', 'tracking_url': 'tracking_url',
+    'is_overdue_highlight': 'is_overdue_highlight',
+})
+
+WooOrderRow = summary_type('WooOrderRow', {
+    'pk': 'pk', 'woo_id': 'woo_id', 'date_created_woo': 'date_created_woo',
+    'status': 'status', 'shipment_status': 'shipment_status', 'currency': 'currency',
+    'total_amount': 'total_amount', 'billing_first_name': 'billing_first_name',
+    'billing_phone': 'billing_phone', 'billing_postcode': 'billing_postcode',
+    'billing_city': 'billing_city', 'customer_note': 'customer_note',
+    'is_overdue_highlight': 'is_overdue_highlight',
+})
+
+ShopifyOrderRow = summary_type('ShopifyOrderRow', {
+    'pk': 'pk', 'shopify_id': 'shopify_id', 'name': 'name', 'created_at_shopify': 'created_at_shopify',
+    'fulfillment_status': 'fulfillment_status', 'currency': 'currency', 'total_price': 'total_price',
+    'customer_name': 'customer_name', 'phone': 'phone', 'zip': 'zip', 'city': 'city',
+    'internal_notes': 'internal_notes', 'is_overdue_highlight': 'is_overdue_highlight',
+})
+
+_FacebookOrderRowBase = summary_type('_FacebookOrderRowBase', {
+    'pk': 'pk', 'order_id': 'order_id', 'date_created': 'date_created', 'status': 'status',
+    'currency': 'currency', 'total_amount': 'total_amount', 'first_name': 'first_name',
+    'last_name': 'last_name', 'email': 'email', 'phone': 'phone', 'city': 'city', 'plateform': 'plateform',
+    'is_overdue_highlight': 'is_overdue_highlight',
+})
+
+
+class FacebookOrderRow(_FacebookOrderRowBase):
+    __slots__ = ()
+    _status_labels = dict(FB_ORDER_STATUS_CHOICES)
+
+    def get_status_display(self):
+        return self._status_labels.get(self.status, self.status)
+
+
+# --- Shipment cards (line items are needed, the full payload is not) ---
+
+_CARD_COLUMNS = {'unselected_items_for_clone': 'unselected_items_for_clone', 'shipment_status': 'shipment_status'}
+
+ShopifyCardRow = summary_type('ShopifyCardRow', {
+    'pk': 'pk', 'name': 'name', 'created_at_shopify': 'created_at_shopify',
+    'fulfillment_status': 'fulfillment_status', 'total_price': 'total_price',
+    'customer_name': 'customer_name', 'phone': 'phone', 'zip': 'zip', 'province': 'province',
+    'address1': 'shipping_address_json__address1', 'internal_notes': 'internal_notes',
+    'tracking_details_json': 'tracking_details_json', 'line_items_json': 'line_items_json',
+    **_CARD_COLUMNS,
+})
+
+WooCardRow = summary_type('WooCardRow', {
+    'pk': 'pk', 'woo_id': 'woo_id', 'date_created_woo': 'date_created_woo', 'status': 'status',
+    'total_amount': 'total_amount', 'billing_first_name': 'billing_first_name',
+    'billing_last_name': 'billing_last_name', 'billing_phone': 'billing_phone',
+    'billing_postcode': 'billing_postcode', 'billing_state': 'billing_state',
+    'billing_address_1': 'billing_address_1', 'customer_note': 'customer_note',
+    'meta_data': 'raw_data__meta_data', 'line_items_json': 'line_items_json',
+    **_CARD_COLUMNS,
+})
+
+FacebookCardRow = summary_type('FacebookCardRow', {
+    'pk': 'pk', 'order_id': 'order_id', 'date_created': 'date_created', 'status': 'status',
+    'total_amount': 'total_amount', 'first_name': 'first_name', 'last_name': 'last_name',
+    'address': 'address', 'phone': 'phone', 'postcode': 'postcode', 'state': 'state',
+    'customer_note': 'customer_note', 'tracking_info': 'tracking_info', 'products_json': 'products_json',
+    **_CARD_COLUMNS,
+})
+
+# Pending shipment cards also carry the SQL-computed age bucket (annotate_overdue)
+ShopifyPendingCardRow = summary_type('ShopifyPendingCardRow', {**ShopifyCardRow.columns, 'age_highlight': 'age_highlight'})
+WooPendingCardRow = summary_type('WooPendingCardRow', {**WooCardRow.columns, 'age_highlight': 'age_highlight'})
+FacebookPendingCardRow = summary_type('FacebookPendingCardRow', {**FacebookCardRow.columns, 'age_highlight': 'age_highlight'})
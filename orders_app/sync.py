@@ -0,0 +1,153 @@
+import logging
+
+from facebook_app.models import Facebook_orders
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.models import WooCommerceOrder
+
+from .bulk import bulk_upsert
+from .cache import bump_generation
+from .keys import register_order_keys
+from .search import index_unified_order, index_unified_orders
+from .models import (
+    UnifiedOrder,
+    PLATFORM_WOOCOMMERCE,
+    PLATFORM_SHOPIFY,
+    PLATFORM_FACEBOOK,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean the order still has to be packed and shipped
+WOO_ACTIONABLE_STATUSES = ['processing', 'on-hold', 'partial-paid']
+SHOPIFY_ACTIONABLE_STATUSES = ['unfulfilled', 'partially_fulfilled', 'scheduled', 'on_hold']
+FB_ACTIONABLE_STATUSES = ['pending', 'processing', 'on-hold']
+
+UNIFIED_FIELDS = [
+    'external_id', 'order_date', 'status', 'shipment_status', 'amount',
+    'customer', 'phone', 'email', 'pincode', 'city', 'note', 'tracking_url',
+    'needs_action', 'django_date_modified',
+]
+
+
+def _woo_row(order):
+    return {
+        'external_id': str(order.woo_id),
+        'order_date': order.date_created_woo,
+        'status': order.status,
+        'shipment_status': order.shipment_status,
+        'amount': order.total_amount,
+        'customer': f"{order.billing_first_name or ''} {order.billing_last_name or ''}".strip(),
+        'phone': order.billing_phone or '',
+        'email': order.billing_email,
+        'pincode': order.billing_postcode or '',
+        'city': order.billing_city or '',
+        'note': order.customer_note or '',
+        'tracking_url': f'https://nurserynisarga.in/admin-track-order/?track_order_id={order.woo_id}',
+        'needs_action': bool(order.status) and order.status.lower() in WOO_ACTIONABLE_STATUSES,
+    }
+
+
+def _shopify_row(order):
+    status = order.fulfillment_status
+    return {
+        'external_id': order.name or str(order.shopify_id),
+        'order_date': order.created_at_shopify,
+        'status': status,
+        'shipment_status': order.shipment_status,
+        'amount': order.total_price,
+        'customer': order.customer_name,
+        'phone': order.phone,
+        'email': order.email,
+        'pincode': order.zip,
+        'city': order.city,
+        'note': order.internal_notes or '',
+        'tracking_url': order.tracking_url or 'N/A',
+        'needs_action': status is None or status.lower() in SHOPIFY_ACTIONABLE_STATUSES,
+    }
+
+
+def _facebook_row(order):
+    tracking_info = order.tracking_info
+    return {
+        'external_id': order.order_id,
+        'order_date': order.date_created,
+        'status': order.status,
+        'shipment_status': order.shipment_status,
+        'amount': order.total_amount,
+        'customer': f"{order.first_name or ''} {order.last_name or ''}".strip(),
+        'phone': order.phone or '',
+        'email': order.email,
+        'pincode': order.postcode or '',
+        'city': order.city or '',
+        'note': order.customer_note or '',
+        'tracking_url': f'http://parcelx.in/tracking.php?waybill_no={tracking_info}' if tracking_info else 'N/A',
+        'needs_action': order.status in FB_ACTIONABLE_STATUSES,
+    }
+
+
+# Source model -> (platform label, row builder)
+SOURCES = {
+    WooCommerceOrder: (PLATFORM_WOOCOMMERCE, _woo_row),
+    ShopifyOrder: (PLATFORM_SHOPIFY, _shopify_row),
+    Facebook_orders: (PLATFORM_FACEBOOK, _facebook_row),
+}
+
+
+def platform_for_model(model):
+    """Returns the platform label for a source order model."""
+    return SOURCES[model][0]
+
+
+def build_unified_order(instance):
+    """Builds an unsaved UnifiedOrder from a platform order instance."""
+    platform, build_row = SOURCES[type(instance)]
+    return UnifiedOrder(platform=platform, source_id=instance.pk, **build_row(instance))
+
+
+def sync_unified_order(instance):
+    """Creates or refreshes the UnifiedOrder row, search tokens and order keys of a single platform order."""
+    platform, build_row = SOURCES[type(instance)]
+    order, _ = UnifiedOrder.objects.update_or_create(
+        platform=platform,
+        source_id=instance.pk,
+        defaults=build_row(instance),
+    )
+    index_unified_order(order, instance)
+    register_order_keys([instance])
+
+
+def remove_unified_order(instance):
+    """Drops the UnifiedOrder row of a deleted platform order."""
+    platform = platform_for_model(type(instance))
+    UnifiedOrder.objects.filter(platform=platform, source_id=instance.pk).delete()
+
+
+def refresh_unified_orders(model, queryset=None, batch_size=500):
+    """
+    Rebuilds UnifiedOrder rows, search tokens and order keys for ``queryset``
+    (defaults to every row of ``model``) in batches. Used by bulk ingestion paths, which bypass save() signals, and by
+    the rebuild_unified_orders command. Returns the number of rows written.
+    """
+    if queryset is None:
+        queryset = model.objects.all()
+    platform = platform_for_model(model)
+    written = 0
+    batch = []
+
+    def flush():
+        bulk_upsert(UnifiedOrder, [order for order, _ in batch], ['platform', 'source_id'], UNIFIED_FIELDS, batch_size)
+        index_unified_orders(platform, batch)
+        register_order_keys([instance for _, instance in batch])
+        return len(batch)
+
+    for instance in queryset.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append((build_unified_order(instance), instance))
+        if len(batch) >= batch_size:
+            written += flush()
+            batch = []
+    if batch:
+        written += flush()
+    # Bulk writes skip the save signals, so invalidate cached order pages here
+    bump_generation(platform)
+    logger.info(f"Refreshed {written} UnifiedOrder rows from {model.__name__}.")
+    return written
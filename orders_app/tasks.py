@@ -0,0 +1,25 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from .rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def rebuild_order_rollups_task(self, days=None):
+    """
+    Nightly drift correction for the dashboard status counters.
+    ``days`` limits the rebuild to recent history; None rebuilds everything.
+    """
+    since_day = timezone.localdate() - timedelta(days=days) if days else None
+    try:
+        written = rebuild_rollups(since_day=since_day)
+        logger.info(f"Order rollup rebuild finished: {written} counters written.")
+        return written
+    except Exception as exc:
+        logger.error(f"Order rollup rebuild failed: {exc}", exc_info=True)
+        raise self.retry(exc=exc)
@@ -0,0 +1,286 @@
+import io
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+
+from facebook_app.forms import facebook_order_id_preview, next_facebook_order_id
+from facebook_app.models import Facebook_orders
+from invoice_app.models import Order as InvoiceOrder
+from shopify_app.models import ShopifyOrder
+from woocommerce_app.ingest import ingest_orders, parse_api_datetime
+from woocommerce_app.models import WooCommerceOrder
+from .models import PLATFORM_WOOCOMMERCE, OrderStatusDailyCount, UnifiedOrder
+from .pagination import CursorStream, MergedCursorPaginator
+from .cache import cached, order_cache_key
+from .export import export_rows, stream_xlsx
+from .ingest import ingest_orders as ingest_rows
+from .keys import resolve_order
+from .overdue import annotate_overdue
+from .rollups import rebuild_rollups
+from .search import search_unified_orders
+from .sequences import next_value
+from .summaries import SummaryProjection, WooCardRow
+
+
+class MergedCursorPaginatorTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(5):
+            WooCommerceOrder.objects.create(woo_id=100 + i, status='processing', date_created_woo=now - timedelta(hours=2 * i))
+            Facebook_orders.objects.create(order_id=f'NS{i}', status='processing', date_created=now - timedelta(hours=2 * i + 1))
+        # Same timestamp on both platforms to exercise the tie-break
+        WooCommerceOrder.objects.create(woo_id=999, status='processing', date_created_woo=now - timedelta(days=1))
+        Facebook_orders.objects.create(order_id='NS999', status='processing', date_created=now - timedelta(days=1))
+
+    def _streams(self):
+        return [
+            CursorStream(WooCommerceOrder.objects.all(), 'WooCommerce', 'date_created_woo'),
+            CursorStream(Facebook_orders.objects.all(), 'Facebook', 'date_created'),
+        ]
+
+    def test_walks_every_order_once_newest_first(self):
+        paginator = MergedCursorPaginator(self._streams(), per_page=3)
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            seen.extend(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(len({(type(o), o.pk) for o in seen}), 12)
+        dates = [getattr(o, 'date_created_woo', None) or o.date_created for o in seen]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = MergedCursorPaginator(self._streams(), per_page=4)
+        self.assertEqual(
+            [o.pk for o in paginator.page('not-a-cursor')],
+            [o.pk for o in paginator.page()],
+        )
+
+
+class OrderStatusRollupTests(TestCase):
+    def _counters(self):
+        return {
+            (c.platform, c.day, c.status_field, c.status): c.count
+            for c in OrderStatusDailyCount.objects.exclude(count=0)
+        }
+
+    def test_incremental_counters_match_rebuild(self):
+        now = timezone.now()
+        woo = WooCommerceOrder.objects.create(woo_id=1, status='processing', date_created_woo=now)
+        WooCommerceOrder.objects.create(woo_id=2, status='pending', date_created_woo=now - timedelta(days=3))
+        ShopifyOrder.objects.create(shopify_id=10, name='#1010', financial_status='paid', created_at_shopify=now)
+        fb = Facebook_orders.objects.create(order_id='NS1', status='processing', date_created=now)
+
+        woo.status = 'completed'
+        woo.save()
+        fb.shipment_status = 'shipped'
+        fb.save()
+        WooCommerceOrder.objects.filter(woo_id=2).first().delete()
+
+        incremental = self._counters()
+        self.assertEqual(incremental[('WooCommerce', timezone.localdate(now), 'status', 'completed')], 1)
+        self.assertNotIn(('WooCommerce', timezone.localdate(now), 'status', 'processing'), incremental)
+        self.assertEqual(incremental[('Shopify', timezone.localdate(now), 'fulfillment_status', 'unfulfilled')], 1)
+
+        rebuild_rollups()
+        self.assertEqual(self._counters(), incremental)
+
+    def test_failed_counter_update_rolls_back_the_order_write(self):
+        woo = WooCommerceOrder.objects.create(woo_id=1, status='processing', date_created_woo=timezone.now())
+        counters = self._counters()
+        woo.status = 'completed'
+        with mock.patch('orders_app.signals.apply_rollup_delta', side_effect=DatabaseError('lock wait timeout')):
+            with self.assertRaises(DatabaseError):
+                woo.save()
+        self.assertEqual(WooCommerceOrder.objects.get(woo_id=1).status, 'processing')
+        self.assertEqual(self._counters(), counters)
+
+
+class OrderSearchTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        WooCommerceOrder.objects.create(
+            woo_id=501, status='processing', date_created_woo=now, billing_first_name='Asha',
+            billing_last_name='Rao', billing_phone='+91 98450-12345', billing_postcode='560001',
+        )
+        ShopifyOrder.objects.create(
+            shopify_id=77, name='#1077', created_at_shopify=now, email='Ravi@Example.com',
+            billing_address_json={'phone': '09845012399', 'city': 'Mysuru', 'zip': '570001'},
+        )
+
+    def _ids(self, query):
+        return sorted(search_unified_orders(query).values_list('external_id', flat=True))
+
+    def test_prefix_words_and_exact_numbers(self):
+        self.assertEqual(self._ids('ash'), ['501'])
+        self.assertEqual(self._ids('asha ra'), ['501'])
+        self.assertEqual(self._ids('9845012345'), ['501'])
+        self.assertEqual(self._ids('+91 98450 12345'), ['501'])
+        self.assertEqual(self._ids('98450'), [])
+        self.assertEqual(self._ids('#1077'), ['#1077'])
+        self.assertEqual(self._ids('570001'), ['#1077'])
+        self.assertEqual(self._ids('mys'), ['#1077'])
+        self.assertEqual(self._ids('ravi@example'), ['#1077'])
+
+    def test_tokens_follow_edits(self):
+        order = WooCommerceOrder.objects.get(woo_id=501)
+        order.billing_first_name = 'Meera'
+        order.save()
+        self.assertEqual(self._ids('asha'), [])
+        self.assertEqual(self._ids('meera'), ['501'])
+
+
+class SummaryProjectionTests(TestCase):
+    def test_paginates_compact_rows_with_json_key_columns(self):
+        for i in range(3):
+            WooCommerceOrder.objects.create(
+                woo_id=700 + i, status='processing', date_created_woo=timezone.now() - timedelta(hours=i),
+                raw_data={'meta_data': [{'key': '_pi_advance_amount', 'value': str(i)}], 'big': 'x' * 1000},
+            )
+        queryset = WooCommerceOrder.objects.order_by('-date_created_woo')
+        page = Paginator(SummaryProjection(queryset, WooCardRow), 2).page(1)
+
+        self.assertEqual([row.woo_id for row in page], [700, 701])
+        self.assertEqual(page.paginator.count, 3)
+        self.assertEqual(page[0].meta_data, [{'key': '_pi_advance_amount', 'value': '0'}])
+        self.assertFalse(hasattr(page[0], '__dict__'))
+
+
+class OrderKeyTests(TestCase):
+    def test_resolves_every_identifier_in_one_query(self):
+        woo = WooCommerceOrder.objects.create(woo_id=321, number='321')
+        shop = ShopifyOrder.objects.create(shopify_id=9000000001, name='#1321')
+        fb = Facebook_orders.objects.create(order_id='NS1321')
+
+        for identifier, expected in [('321', woo), ('#1321', shop), ('9000000001', shop), ('NS1321', fb)]:
+            with self.assertNumQueries(1):
+                order = resolve_order(identifier)
+            self.assertEqual((type(order), order.pk), (type(expected), expected.pk))
+        self.assertIsNone(resolve_order('#9999'))
+
+    def test_renamed_order_drops_old_key(self):
+        shop = ShopifyOrder.objects.create(shopify_id=9000000002, name='#2000')
+        shop.name = '#2001'
+        shop.save()
+        self.assertIsNone(resolve_order('#2000'))
+        self.assertEqual(resolve_order('#2001').pk, shop.pk)
+
+
+class OrderExportTests(TestCase):
+    def test_streams_one_row_per_line_item_across_chunks(self):
+        now = timezone.now()
+        for i in range(5):
+            WooCommerceOrder.objects.create(
+                woo_id=800 + i, status='processing', date_created_woo=now - timedelta(hours=i),
+                line_items_json=[{'name': 'Rose', 'quantity': 1, 'price': '10'}, {'name': 'Tulip', 'quantity': 2, 'price': '5'}],
+            )
+        Facebook_orders.objects.create(order_id='NS800', status='processing', date_created=now - timedelta(days=1))
+
+        rows = list(export_rows(UnifiedOrder.objects.all(), chunk_size=2))
+
+        self.assertEqual(rows[0][:2], ['Platform', 'Order ID'])
+        self.assertEqual(len(rows), 1 + 5 * 2 + 1)
+        self.assertEqual([r[1] for r in rows[1:4]], ['800', '800', '801'])
+        self.assertEqual(rows[-1][1], 'NS800')
+
+    def test_xlsx_is_a_valid_zip(self):
+        WooCommerceOrder.objects.create(woo_id=900, status='processing', date_created_woo=timezone.now())
+        data = b''.join(stream_xlsx(export_rows(UnifiedOrder.objects.all())))
+        with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('<t xml:space="preserve">900</t>', sheet)
+
+
+class OrderCacheTests(TestCase):
+    def test_order_write_moves_queries_to_a_new_generation(self):
+        key = order_cache_key('test', [PLATFORM_WOOCOMMERCE], {'page': 1})
+        self.assertEqual(cached(key, lambda: 'stale'), 'stale')
+        self.assertEqual(cached(key, lambda: 'recomputed'), 'stale')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WooCommerceOrder.objects.create(woo_id=1000, status='processing')
+
+        new_key = order_cache_key('test', [PLATFORM_WOOCOMMERCE], {'page': 1})
+        self.assertNotEqual(new_key, key)
+        self.assertEqual(cached(new_key, lambda: 'fresh'), 'fresh')
+
+
+class OrderIngestTests(TestCase):
+    def _payload(self, status, modified):
+        return {'id': 4001, 'number': '4001', 'status': status, 'date_created_gmt': '2025-01-01T10:00:00', 'date_modified_gmt': modified}
+
+    def test_skips_stale_and_unchanged_payloads(self):
+        first = ingest_orders([self._payload('processing', '2025-01-02T10:00:00')])
+        self.assertEqual((first.created, first.updated), (1, 0))
+        self.assertTrue(UnifiedOrder.objects.filter(external_id='4001').exists())
+
+        stale = ingest_orders([self._payload('pending', '2025-01-01T12:00:00')])
+        self.assertEqual((stale.written, stale.skipped), (0, 1))
+
+        with self.assertNumQueries(3):  # savepoint, locking SELECT, release
+            repeat = ingest_orders([self._payload('processing', '2025-01-02T10:00:00')])
+        self.assertEqual((repeat.written, repeat.unchanged), (0, 1))
+
+        newer = ingest_orders([self._payload('completed', '2025-01-03T10:00:00')])
+        self.assertEqual(newer.updated, 1)
+        self.assertEqual(WooCommerceOrder.objects.get(woo_id=4001).status, 'completed')
+
+    def test_stale_guard_holds_within_one_chunk(self):
+        result = ingest_orders([self._payload('completed', '2025-01-03T10:00:00'), self._payload('pending', '2025-01-02T10:00:00')])
+        self.assertEqual((result.created, result.skipped), (1, 1))
+        self.assertEqual(WooCommerceOrder.objects.get(woo_id=4001).status, 'completed')
+        self.assertEqual(OrderStatusDailyCount.objects.get(status='completed').count, 1)
+
+    def test_missing_keys_keep_stored_columns(self):
+        ingest_orders([dict(self._payload('processing', '2025-01-02T10:00:00'), billing={'city': 'Pune'})])
+        # Rows with different field sets share a chunk but not an upsert
+        ingest_rows(WooCommerceOrder, 'woo_id', [
+            {'woo_id': 4001, 'status': 'completed', 'date_modified_woo': parse_api_datetime('2025-01-03T10:00:00')},
+            {'woo_id': 4002, 'number': '4002', 'status': 'processing', 'billing_city': 'Delhi'},
+        ], guard_field='date_modified_woo')
+        self.assertEqual(
+            list(WooCommerceOrder.objects.order_by('woo_id').values_list('status', 'billing_city', 'number')),
+            [('completed', 'Pune', '4001'), ('processing', 'Delhi', '4002')],
+        )
+
+
+class OverdueAnnotationTests(TestCase):
+    def test_flags_and_age_buckets_are_computed_in_sql(self):
+        now = timezone.now()
+        for woo_id, status, days in [(1, 'processing', 1), (2, 'processing', 3), (3, 'completed', 3), (4, 'on-hold', 5)]:
+            WooCommerceOrder.objects.create(woo_id=woo_id, status=status, date_created_woo=now - timedelta(days=days))
+        ShopifyOrder.objects.create(shopify_id=20, name='#20', fulfillment_status=None, created_at_shopify=now - timedelta(days=3))
+
+        rows = annotate_overdue(WooCommerceOrder.objects.all(), now=now).order_by('-is_overdue_highlight', 'woo_id')
+        self.assertEqual(
+            [(o.woo_id, o.is_overdue_highlight, o.age_highlight) for o in rows],
+            [(2, True, 'two_days_old'), (4, True, 'three_days_old'), (1, False, 'normal'), (3, False, 'two_days_old')],
+        )
+        self.assertTrue(annotate_overdue(ShopifyOrder.objects.all(), now=now).filter(is_overdue_highlight=True).exists())
+
+
+class SequenceTests(TestCase):
+    def test_facebook_order_ids_continue_after_existing_orders(self):
+        prefix = f"NS{timezone.localdate().strftime('%d%m%y')}"
+        Facebook_orders.objects.create(order_id=f'{prefix}7')
+        Facebook_orders.objects.create(order_id=f'{prefix}12')
+
+        self.assertEqual(facebook_order_id_preview(), f'{prefix}13')
+        self.assertEqual([next_facebook_order_id() for _ in range(2)], [f'{prefix}13', f'{prefix}14'])
+        self.assertEqual(next_value('other', seed=41), 42)
+
+    def test_invoice_ids_are_sequential_and_skip_legacy_ones(self):
+        details = {'customer_name': 'Asha', 'customer_address': 'MG Road', 'customer_phone': '9845012345', 'order_total': 10}
+        InvoiceOrder.objects.create(order_id='legacy', invoice_id='100001', **details)
+        first = InvoiceOrder.objects.create(order_id='A', **details)
+        second = InvoiceOrder.objects.create(order_id='B', **details)
+        self.assertEqual((first.invoice_id, second.invoice_id), ('100000', '100002'))
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('search/', views.order_search_api, name='order_search_api'),
+    path('export/', views.export_orders, name='order_export'),
+]
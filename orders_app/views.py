@@ -0,0 +1,75 @@
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from .export import EXPORT_FORMATS, export_rows
+from .filters import filter_unified_orders
+from .search import search_unified_orders
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+
+@login_required
+@require_GET
+def order_search_api(request):
+    """
+    Search-as-you-type across all platforms. GET ``q`` (and optional ``platform``,
+    ``limit``) returns the newest matching orders as JSON.
+    """
+    query = request.GET.get('q', '').strip()
+    platform = request.GET.get('platform') or None
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_DEFAULT_LIMIT)), 1), SEARCH_MAX_LIMIT)
+    except (TypeError, ValueError):
+        limit = SEARCH_DEFAULT_LIMIT
+
+    if not query:
+        return JsonResponse({'query': query, 'results': []})
+
+    orders = search_unified_orders(query, platform=platform).only(
+        'platform', 'external_id', 'order_date', 'status', 'shipment_status',
+        'amount', 'customer', 'phone', 'city', 'pincode',
+    ).order_by('-order_date', '-id')[:limit]
+
+    results = [{
+        'platform': order.platform,
+        'order_id': order.external_id,
+        'order_date': order.order_date.isoformat() if order.order_date else None,
+        'status': order.status,
+        'shipment_status': order.shipment_status,
+        'amount': str(order.amount) if order.amount is not None else None,
+        'customer': order.customer,
+        'phone': order.phone,
+        'city': order.city,
+        'pincode': order.pincode,
+        'url': reverse('order_details_view', args=[order.external_id]),
+    } for order in orders]
+    return JsonResponse({'query': query, 'results': results})
+
+
+@login_required
+@require_GET
+def export_orders(request):
+    """
+    Streams every order matching the all-orders filters (plus ``date_from`` /
+    ``date_to``) as CSV or XLSX (``format``), one row per line item.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unsupported export format: {export_format}")
+    stream, content_type = EXPORT_FORMATS[export_format]
+
+    queryset, _, _ = filter_unified_orders(request.GET)
+    logger.info(f"Order export ({export_format}) started by {request.user} with filters {dict(request.GET.items())}")
+
+    response = StreamingHttpResponse(stream(export_rows(queryset)), content_type=content_type)
+    filename = f"orders_{timezone.localtime().strftime('%Y%m%d_%H%M')}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
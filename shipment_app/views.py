@@ -3,199 +3,234 @@ from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt 
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 import json
 from datetime import datetime, timedelta
+from django.utils import timezone
 
 
 # Assuming your models are imported correctly
 from shopify_app.models import ShopifyOrder
 from woocommerce_app.models import WooCommerceOrder
 from facebook_app.models import Facebook_orders 
+from orders_app.cache import ALL_PLATFORMS, cached, order_cache_key
+from orders_app.pagination import CursorStream, MergedCursorPaginator
+from orders_app.overdue import annotate_overdue
+from orders_app.summaries import (
+    FacebookCardRow, FacebookPendingCardRow, ShopifyCardRow, ShopifyPendingCardRow, WooCardRow, WooPendingCardRow,
+)
+from woocommerce_app.catalog import line_item_pot_size, lookup_product
 # Make sure these models have a JSONField, e.g.:
 # unselected_items_for_clone = models.JSONField(null=True, blank=True, default=list)
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Cards shown per page on the shipment screens
+SHIPMENT_PAGE_SIZE = 50
+
+PENDING_SHIPMENT_STATUSES = ['pending', 'processing', 'partially_shipped']
+SHIPPED_SHIPMENT_STATUSES = ['shipped', 'partially_shipped']
+
+
+def _woo_payment_meta(woo):
+    """Reads the partial-payment plugin amounts from a WooCommerce order's meta data."""
+    meta_data = woo.meta_data if isinstance(woo.meta_data, list) else []
+    advance_amount = None
+    balance_amount = None
+    original_total = woo.total_amount 
+    for meta in meta_data:
+        if meta.get("key") == "_pi_original_total": original_total = meta.get("value")
+        elif meta.get("key") == "_pi_advance_amount": advance_amount = meta.get("value")
+        elif meta.get("key") == "_pi_balance_amount": balance_amount = meta.get("value")
+    return original_total, advance_amount, balance_amount
+
+
+
+
+def _catalog_image(item):
+    product = lookup_product(item.get('variation_id'), item.get('product_id'), item.get('sku'))
+    return (product.image if product else None) or ''
+
+
+# ====================== Pending shipment cards =======================
+
+def _shopify_pending_card(o):
+    # Determine advance and balance amounts for Shopify
+    shopify_advance_amount = "0.00" 
+    shopify_balance_amount = o.total_price
+    shopify_original_total = o.total_price
+
+    order_data = {
+        'order_id': o.name,
+        'date': o.created_at_shopify,
+        'status': o.fulfillment_status or 'unfulfilled',
+        'amount': o.total_price,
+        'customer': o.customer_name or 'N/A',
+        'phone': o.phone or 'N/A',
+        'pincode': o.zip or 'N/A',
+        'state': o.province or 'N/A',
+        'address': o.address1 or 'N/A',
+        'note': o.internal_notes,
+        'tracking': o.tracking_details_json,
+        'platform': 'Shopify',
+        'shipment_status': o.shipment_status or 'Pending',
+        'original_total': shopify_original_total,
+        'advance_amount': shopify_advance_amount,
+        'balance_amount': shopify_balance_amount,
+        'is_overdue_highlight': o.age_highlight
+    }
+
+    if o.shipment_status == 'partially_shipped':
+        order_data.update({
+            'status': o.shipment_status,
+            'items': [{
+                'name': item.get('name', ''),
+                'quantity': item.get('quantity', 0),
+                'price': item.get('price', 0),
+                'pot_size': item.get('variant_title', '') or 'N/A'
+            } for item in o.unselected_items_for_clone]
+        })
+    else:
+        order_data.update({
+            'status': o.fulfillment_status,
+            'items': [{
+                'name': item.get('name', ''),
+                'quantity': item.get('quantity', 0),
+                'price': item.get('price', 0),
+                'pot_size': item.get('variant_title', '') or 'N/A'
+            } for item in o.line_items_json]
+        })
+    return order_data
+
+
+def _woo_pending_card(woo):
+    original_total, advance_amount, balance_amount = _woo_payment_meta(woo)
+
+    order_data = {
+        'order_id': woo.woo_id,
+        'date': woo.date_created_woo,
+        'amount': woo.total_amount,
+        'customer': f"{woo.billing_first_name or ''} {woo.billing_last_name or ''}".strip(),
+        'phone': woo.billing_phone,
+        'pincode': woo.billing_postcode,
+        'state': woo.billing_state,
+        'address': woo.billing_address_1,
+        'note': woo.customer_note,
+        'tracking': f'https://nurserynisarga.in/admin-track-order/?track_order_id={woo.woo_id}',
+        'platform': 'Wordpress',
+        'shipment_status': woo.shipment_status or 'Pending',
+        'original_total': original_total,
+        'advance_amount': advance_amount,
+        'balance_amount': balance_amount,
+        'is_overdue_highlight': woo.age_highlight
+    }
+    if woo.shipment_status == 'partially_shipped':
+        order_data.update({
+            'status': woo.shipment_status,
+            'items': [{
+                'name': item.get('name', ''),
+                'quantity': item.get('quantity', 0),
+                'price': item.get('price', 0),
+                'pot_size': line_item_pot_size(item)
+            } for item in woo.unselected_items_for_clone]
+        })
+    else:
+        order_data.update({
+            'status': woo.status,
+            'items': [{
+                'name': item.get('name', ''),
+                'quantity': item.get('quantity', 0),
+                'price': item.get('price', 0),
+                'pot_size': line_item_pot_size(item)
+            } for item in woo.line_items_json]
+        })
+    return order_data
+
+
+def _facebook_pending_card(f):
+    products = f.products_json if isinstance(f.products_json, list) else json.loads(f.products_json or '[]')
+    order_data = {
+        'order_id': f.order_id,
+        'date': f.date_created,
+        'status': f.status,
+        'amount': f.total_amount,
+        'customer': f"{f.first_name or ''} {f.last_name or ''}".strip(),
+        'address': f.address,                
+        'phone': f.phone,
+        'pincode': f.postcode,
+        'state': f.state,
+        'note': f.customer_note,
+        'tracking': f.tracking_info,
+        'platform': 'Facebook',
+        'shipment_status': f.shipment_status or 'Pending',
+        'original_total': f.total_amount,
+        'advance_amount': None,
+        'balance_amount': f.total_amount,
+        'is_overdue_highlight': f.age_highlight
+    }
+
+    if f.shipment_status == 'partially_shipped':
+        order_data.update({
+            'status': f.shipment_status,
+            'items': [{
+                'name': item.get('name', ''),
+                'quantity': item.get('quantity', 0),
+                'pot_size': item.get('potSize', 0),
+            } for item in f.unselected_items_for_clone]
+        })
+    else:
+        order_data.update({
+            'status': f.status,
+            'items': [{
+                'name': product.get('product_name', ''),
+                'quantity': product.get('quantity', 0),
+                'price': product.get('price', 0),
+                'pot_size': product.get('potSize', 'N/A')
+            } for product in products]
+        })
+    return order_data
+
 
 @login_required
 def home(request):
-    today = datetime.now().astimezone()
-    thirty_days_ago = today - timedelta(days=30)
-
-    shopify_qs = ShopifyOrder.objects.filter(created_at_shopify__gte=thirty_days_ago)
-    woo_qs = WooCommerceOrder.objects.filter(date_created_woo__gte=thirty_days_ago)
-    fb_qs = Facebook_orders.objects.filter(date_created__gte=thirty_days_ago)
-    
-    all_orders = []
-
-    # ====================== Shopify Orders =======================
-    for o in shopify_qs:
-        if o.fulfillment_status in ['unfulfilled', 'none'] and o.shipment_status in ['pending','processing', 'partially_shipped']:
-            days_since_order = (today - o.created_at_shopify.astimezone()).days
-            highlight = 'normal'
-            if days_since_order >= 4: highlight = 'three_days_old'
-            elif days_since_order >= 3: highlight = 'two_days_old'
-            
-            # Determine advance and balance amounts for Shopify
-            shopify_advance_amount = "0.00" 
-            shopify_balance_amount = o.total_price
-            shopify_original_total = o.total_price
-
-            order_data = {
-                'order_id': o.name,
-                'date': o.created_at_shopify,
-                'status': o.fulfillment_status or 'unfulfilled',
-                'amount': o.total_price,
-                'customer': o.shipping_address_json.get('name', 'N/A'),
-                'phone': o.shipping_address_json.get('phone', 'N/A'),
-                'pincode': o.shipping_address_json.get('zip', 'N/A'),
-                'state': o.shipping_address_json.get('province', 'N/A'),
-                'address': o.shipping_address_json.get('address1', 'N/A'),
-                'note': o.internal_notes,
-                'tracking': o.tracking_details_json,
-                'platform': 'Shopify',
-                'shipment_status': o.shipment_status or 'Pending',
-                'original_total': shopify_original_total,
-                'advance_amount': shopify_advance_amount,
-                'balance_amount': shopify_balance_amount,
-                'is_overdue_highlight': highlight
-            }
-
-            if o.shipment_status == 'partially_shipped':
-                order_data.update({
-                    'status': o.shipment_status,
-                    'items': [{
-                        'name': item.get('name', ''),
-                        'quantity': item.get('quantity', 0),
-                        'price': item.get('price', 0),
-                        'pot_size': item.get('variant_title', '') or 'N/A'
-                    } for item in o.unselected_items_for_clone]
-                })
-            else:
-                order_data.update({
-                    'status': o.fulfillment_status,
-                    'items': [{
-                        'name': item.get('name', ''),
-                        'quantity': item.get('quantity', 0),
-                        'price': item.get('price', 0),
-                        'pot_size': item.get('variant_title', '') or 'N/A'
-                    } for item in o.line_items_json]
-                })
-
-            all_orders.append(order_data)
-
-    # ======================== WooCommerce orders ======================
-    for woo in woo_qs:
-        if woo.status == 'processing' and woo.shipment_status in ['pending','processing', 'partially_shipped']:                      
-            days_since_order = (today - woo.date_created_woo.astimezone()).days
-            highlight = 'normal'
-            if days_since_order >= 4: highlight = 'three_days_old'
-            elif days_since_order >= 3: highlight = 'two_days_old'
-            raw_data = woo.raw_data if isinstance(woo.raw_data, dict) else json.loads(woo.raw_data or '{}')
-            advance_amount = None
-            balance_amount = None
-            original_total = woo.total_amount 
-            for meta in raw_data.get("meta_data", []):
-                if meta.get("key") == "_pi_original_total": original_total = meta.get("value")
-                elif meta.get("key") == "_pi_advance_amount": advance_amount = meta.get("value")
-                elif meta.get("key") == "_pi_balance_amount": balance_amount = meta.get("value")
-
-            order_data = {
-                'order_id': woo.woo_id,
-                'date': woo.date_created_woo,
-                'amount': woo.total_amount,
-                'customer': f"{woo.billing_first_name or ''} {woo.billing_last_name or ''}".strip(),
-                'phone': woo.billing_phone,
-                'pincode': woo.billing_postcode,
-                'state': woo.billing_state,
-                'address': woo.billing_address_1,
-                'note': woo.customer_note,
-                'tracking': f'https://nurserynisarga.in/admin-track-order/?track_order_id={woo.woo_id}',
-                'platform': 'Wordpress',
-                'shipment_status': woo.shipment_status or 'Pending',
-                'original_total': original_total,
-                'advance_amount': advance_amount,
-                'balance_amount': balance_amount,
-                'is_overdue_highlight': highlight
-            }
-            if woo.shipment_status == 'partially_shipped':
-                order_data.update({
-                    'status': woo.shipment_status,
-                    'items': [{
-                        'name': item.get('name', ''),
-                        'quantity': item.get('quantity', 0),
-                        'price': item.get('price', 0),
-                        'pot_size': next((m.get('value') for m in item.get('meta_data', []) if m.get('key') == 'pa_size' or m.get('display_key', '').lower() == 'size'), 'N/A')
-                    } for item in woo.unselected_items_for_clone]
-                })
-            else:
-                order_data.update({
-                    'status': woo.status,
-                    'items': [{
-                        'name': item.get('name', ''),
-                        'quantity': item.get('quantity', 0),
-                        'price': item.get('price', 0),
-                        'pot_size': next((m.get('value') for m in item.get('meta_data', []) if m.get('key') == 'pa_size' or m.get('display_key', '').lower() == 'size'), 'N/A')
-                    } for item in woo.line_items_json]
-                })
-
-            all_orders.append(order_data)
-
-    # ======================== Facebook orders ======================
-    for f in fb_qs:
-        
-        if f.status == 'processing' and f.shipment_status in ['pending','processing','partially_shipped']:
-            days_since_order = (today - f.date_created.astimezone()).days
-            highlight = 'normal'
-            if days_since_order >= 4: highlight = 'three_days_old'
-            elif days_since_order >= 3: highlight = 'two_days_old'
-            
-            products = f.products_json if isinstance(f.products_json, list) else json.loads(f.products_json or '[]')
-            # logger.info(f"Facebook order address: {f.address}")
-            order_data = {
-                'order_id': f.order_id,
-                'date': f.date_created,
-                'status': f.status,
-                'amount': f.total_amount,
-                'customer': f"{f.first_name or ''} {f.last_name or ''}".strip(),
-                'address': f.address,                
-                'phone': f.phone,
-                'pincode': f.postcode,
-                'state': f.state,
-                'note': f.customer_note,
-                'tracking': f.tracking_info,
-                'platform': 'Facebook',
-                'shipment_status': f.shipment_status or 'Pending',
-                'original_total': f.total_amount,
-                'advance_amount': None,
-                'balance_amount': f.total_amount,
-                'is_overdue_highlight': highlight
-            }
-
-            if f.shipment_status == 'partially_shipped':
-                order_data.update({
-                    'status': f.shipment_status,
-                    'items': [{
-                        'name': item.get('name', ''),
-                        'quantity': item.get('quantity', 0),
-                        'pot_size': item.get('potSize', 0),
-                    } for item in f.unselected_items_for_clone]
-                })
-            else:
-                order_data.update({
-                    'status': f.status,
-                    'items': [{
-                        'name': product.get('product_name', ''),
-                        'quantity': product.get('quantity', 0),
-                        'price': product.get('price', 0),
-                        'pot_size': product.get('potSize', 'N/A')
-                    } for product in products]
-                })
-
-            all_orders.append(order_data)    
-    all_orders.sort(key=lambda x: x['date'], reverse=True)
-    context = {'orders': all_orders, 'project_name': 'Order Dashboard'} 
+    now = timezone.now()
+    thirty_days_ago = now - timedelta(days=30)
+
+    # Only orders still waiting to be shipped; paged newest-first across platforms.
+    # Card age classes come from SQL (orders_app.overdue)
+    streams = [
+        CursorStream(
+            annotate_overdue(ShopifyOrder.objects.filter(
+                created_at_shopify__gte=thirty_days_ago,
+                fulfillment_status__in=['unfulfilled', 'none'],
+                shipment_status__in=PENDING_SHIPMENT_STATUSES,
+            ), now=now),
+            'Shopify', 'created_at_shopify', _shopify_pending_card, summary=ShopifyPendingCardRow,
+        ),
+        CursorStream(
+            annotate_overdue(WooCommerceOrder.objects.filter(
+                date_created_woo__gte=thirty_days_ago,
+                status='processing',
+                shipment_status__in=PENDING_SHIPMENT_STATUSES,
+            ), now=now),
+            'Wordpress', 'date_created_woo', _woo_pending_card, summary=WooPendingCardRow,
+        ),
+        CursorStream(
+            annotate_overdue(Facebook_orders.objects.filter(
+                date_created__gte=thirty_days_ago,
+                status='processing',
+                shipment_status__in=PENDING_SHIPMENT_STATUSES,
+            ), now=now),
+            'Facebook', 'date_created', _facebook_pending_card, summary=FacebookPendingCardRow,
+        ),
+    ]
+    cursor = request.GET.get('cursor')
+    orders_page = cached(
+        order_cache_key('shipment_pending', ALL_PLATFORMS, {'cursor': cursor}),
+        lambda: MergedCursorPaginator(streams, SHIPMENT_PAGE_SIZE).page(cursor),
+    )
+    context = {'orders': orders_page, 'project_name': 'Order Dashboard'} 
     return render(request, 'shipment/shipment.html', context)
 
 @login_required
@@ -249,7 +284,9 @@ def process_shipment(request):
         else:
             logger.warning(f"Model for {platform} ID {order_id_str} does not have 'unselected_items_for_clone' field.")
 
-        order_instance.save()
+        # Order row and dashboard counters commit together
+        with transaction.atomic():
+            order_instance.save()
         
         logger.info(f"Successfully processed shipment for {platform} Order ID {order_id_str}.")
 
@@ -266,171 +303,148 @@ def process_shipment(request):
         logger.error(f"Error processing shipment: {type(e).__name__} - {e}", exc_info=True)
         return JsonResponse({'error': f'An unexpected error occurred: {str(e)}'}, status=500)
 
+# ======================== Shipped cards ======================
+
+def _shopify_shipped_card(o):
+    # Determine advance and balance amounts for Shopify
+    shopify_advance_amount = "0.00" 
+    shopify_balance_amount = o.total_price
+    shopify_original_total = o.total_price
+
+    order_data = {
+        'order_id': o.name,
+        'date': o.created_at_shopify,
+        'status': o.fulfillment_status or 'fulfilled',
+        'amount': o.total_price,
+        'customer': o.customer_name or 'N/A',
+        'phone': o.phone or 'N/A',
+        'pincode': o.zip or 'N/A',
+        'state': o.province or 'N/A',
+        'note': o.internal_notes,
+        'tracking': o.tracking_details_json,
+        'platform': 'Shopify',
+        'shipment_status': o.shipment_status or 'Pending',
+        'original_total': shopify_original_total,
+        'advance_amount': shopify_advance_amount,
+        'balance_amount': shopify_balance_amount,
+        'is_overdue_highlight': 'normal'
+    }
+
+    unselected_name = [item.get('name') for item in o.unselected_items_for_clone]
+    new_items = [item for item in o.line_items_json if item.get('name') not in unselected_name]
+
+    order_data.update({
+        'status': "shipped",
+        'items': [{
+            'name': item.get('name', ''),
+            'quantity': item.get('quantity', 0),
+            'price': item.get('price', 0),
+            'pot_size': item.get('variant_title', '') or 'N/A'
+        } for item in new_items]
+    })
+    return order_data
+
+
+def _woo_shipped_card(woo):
+    original_total, advance_amount, balance_amount = _woo_payment_meta(woo)
+
+    order_data = {
+        'order_id': woo.woo_id,
+        'date': woo.date_created_woo,
+        'amount': woo.total_amount,
+        'customer': f"{woo.billing_first_name or ''} {woo.billing_last_name or ''}".strip(),
+        'phone': woo.billing_phone,
+        'pincode': woo.billing_postcode,
+        'state': woo.billing_state,
+        'note': woo.customer_note,
+        'tracking': f'https://nurserynisarga.in/admin-track-order/?track_order_id={woo.woo_id}',
+        'platform': 'Wordpress',
+        'shipment_status': woo.shipment_status or 'Pending',
+        'original_total': original_total,
+        'advance_amount': advance_amount,
+        'balance_amount': balance_amount,
+        'is_overdue_highlight': 'normal'
+    }
+
+    unselected_name = [item.get('name') for item in woo.unselected_items_for_clone] if woo.unselected_items_for_clone else []            
+    new_items = [item for item in woo.line_items_json if item.get('name') not in unselected_name]
+
+    order_data.update({
+        'status': "shipped",
+        'items': [{
+            'name': item.get('name', ''),
+            'quantity': item.get('quantity', 0),
+            'price': float(item.get('price', 0)),
+            'pot_size': line_item_pot_size(item),
+            'sku': item.get('sku', ''),
+            'image': item.get('image', {}).get('src', '') or _catalog_image(item),
+            'product_id': item.get('product_id', ''),
+            'variation_id': item.get('variation_id', 0)
+        } for item in new_items]
+    })
+    return order_data
+
+
+def _facebook_shipped_card(f):
+    products = f.products_json if isinstance(f.products_json, list) else json.loads(f.products_json or '[]')
+
+    order_data = {
+        'order_id': f.order_id,
+        'date': f.date_created,
+        'status': f.status,
+        'amount': f.total_amount,
+        'customer': f"{f.first_name or ''} {f.last_name or ''}".strip(),
+        'phone': f.phone,
+        'pincode': f.postcode,
+        'state': f.state,
+        'note': f.customer_note,
+        'tracking': f.tracking_info,
+        'platform': 'Facebook',
+        'shipment_status': f.shipment_status or 'Pending',
+        'original_total': f.total_amount,
+        'advance_amount': None,
+        'balance_amount': f.total_amount,
+        'is_overdue_highlight': 'normal'
+    }
+
+    unselected_name = [item.get('name') for item in f.unselected_items_for_clone]
+    new_items = [item for item in products if item.get('product_name') not in unselected_name]
+
+    order_data.update({
+        'status': "shipped",
+        'items': [{
+            'name': item.get('product_name', ''),
+            'quantity': item.get('quantity', 0),
+            'price': item.get('price', 0),
+            'pot_size': item.get('variant_details', {}).get('size', 'N/A')
+        } for item in new_items]
+    })
+    return order_data
+
+
 @login_required
 def shipped(request):
     today = datetime.now().astimezone()
     thirty_days_ago = today - timedelta(days=30)
 
-    shopify_qs = ShopifyOrder.objects.filter(created_at_shopify__gte=thirty_days_ago)
-    woo_qs = WooCommerceOrder.objects.filter(date_created_woo__gte=thirty_days_ago)
-    fb_qs = Facebook_orders.objects.filter(date_created__gte=thirty_days_ago)
-    
-    all_orders = []
-
-    #============================== Shopify =================================
-    for o in shopify_qs:
-        if o.shipment_status in ['shipped', 'partially_shipped']:
-            days_since_order = (today - o.created_at_shopify.astimezone()).days
-            highlight = 'normal'
-            
-            # Determine advance and balance amounts for Shopify
-            shopify_advance_amount = "0.00" 
-            shopify_balance_amount = o.total_price
-            shopify_original_total = o.total_price
-
-            order_data = {
-                'order_id': o.name,
-                'date': o.created_at_shopify,
-                'status': o.fulfillment_status or 'fulfilled',
-                'amount': o.total_price,
-                'customer': o.shipping_address_json.get('name', 'N/A'),
-                'phone': o.shipping_address_json.get('phone', 'N/A'),
-                'pincode': o.shipping_address_json.get('zip', 'N/A'),
-                'state': o.shipping_address_json.get('province', 'N/A'),                
-                'note': o.internal_notes,
-                'tracking': o.tracking_details_json,
-                'platform': 'Shopify',
-                'shipment_status': o.shipment_status or 'Pending',
-                'original_total': shopify_original_total,
-                'advance_amount': shopify_advance_amount,
-                'balance_amount': shopify_balance_amount,
-                'is_overdue_highlight': highlight
-            }
-
-            unselected_name = [item.get('name') for item in o.unselected_items_for_clone]
-            all_items = o.line_items_json
-            new_items = []
-
-            for item in all_items:
-                if item.get('name') not in unselected_name:
-                    new_items.append(item)  
-
-            order_data.update({
-                'status': "shipped",
-                'items': [{
-                    'name': item.get('name', ''),
-                    'quantity': item.get('quantity', 0),
-                    'price': item.get('price', 0),
-                    'pot_size': item.get('variant_title', '') or 'N/A'
-                } for item in new_items]
-            })
-
-            all_orders.append(order_data)
-    # ======================== WooCommerce orders ======================
-    for woo in woo_qs:
-        if woo.shipment_status in ['shipped', 'partially_shipped']:                      
-            days_since_order = (today - woo.date_created_woo.astimezone()).days
-            highlight = 'normal'
-            
-            raw_data = woo.raw_data if isinstance(woo.raw_data, dict) else json.loads(woo.raw_data or '{}')
-            advance_amount = None
-            balance_amount = None
-            original_total = woo.total_amount 
-            for meta in raw_data.get("meta_data", []):
-                if meta.get("key") == "_pi_original_total": original_total = meta.get("value")
-                elif meta.get("key") == "_pi_advance_amount": advance_amount = meta.get("value")
-                elif meta.get("key") == "_pi_balance_amount": balance_amount = meta.get("value")
-
-            order_data = {
-                'order_id': woo.woo_id,
-                'date': woo.date_created_woo,
-                'amount': woo.total_amount,
-                'customer': f"{woo.billing_first_name or ''} {woo.billing_last_name or ''}".strip(),
-                'phone': woo.billing_phone,
-                'pincode': woo.billing_postcode,
-                'state': woo.billing_state,
-                'note': woo.customer_note,
-                'tracking': f'https://nurserynisarga.in/admin-track-order/?track_order_id={woo.woo_id}',
-                'platform': 'Wordpress',
-                'shipment_status': woo.shipment_status or 'Pending',
-                'original_total': original_total,
-                'advance_amount': advance_amount,
-                'balance_amount': balance_amount,
-                'is_overdue_highlight': highlight
-            }
-
-            unselected_name = [item.get('name') for item in woo.unselected_items_for_clone] if woo.unselected_items_for_clone else []            
-            all_items = woo.line_items_json
-            new_items = []
-
-            for item in all_items:
-                if item.get('name') not in unselected_name:
-                    new_items.append(item)
-
-            order_data.update({
-                'status': "shipped",
-                'items': [{
-                    'name': item.get('name', ''),
-                    'quantity': item.get('quantity', 0),
-                    'price': float(item.get('price', 0)),
-                    'pot_size': next((m.get('value') for m in item.get('meta_data', []) if m.get('key') == 'pa_size' or m.get('display_key', '').lower() == 'size'), 'N/A'),
-                    'sku': item.get('sku', ''),
-                    'image': item.get('image', {}).get('src', ''),
-                    'product_id': item.get('product_id', ''),
-                    'variation_id': item.get('variation_id', 0)
-                } for item in new_items]
-            })
-
-            all_orders.append(order_data)
-
-    # ======================== Facebook orders ======================
-    for f in fb_qs:
-        if f.shipment_status in ['shipped', 'partially_shipped']:
-            days_since_order = (today - f.date_created.astimezone()).days
-            highlight = 'normal'
-        
-            
-            products = f.products_json if isinstance(f.products_json, list) else json.loads(f.products_json or '[]')
-
-            order_data = {
-                'order_id': f.order_id,
-                'date': f.date_created,
-                'status': f.status,
-                'amount': f.total_amount,
-                'customer': f"{f.first_name or ''} {f.last_name or ''}".strip(),
-                'phone': f.phone,
-                'pincode': f.postcode,
-                'state': f.state,
-                'note': f.customer_note,
-                'tracking': f.tracking_info,
-                'platform': 'Facebook',
-                'shipment_status': f.shipment_status or 'Pending',
-                'original_total': f.total_amount,
-                'advance_amount': None,
-                'balance_amount': f.total_amount,
-                'is_overdue_highlight': highlight
-            }
-
-            unselected_name = [item.get('name') for item in f.unselected_items_for_clone]
-            all_items = products
-            new_items = []
-
-            for item in all_items:
-                if item.get('product_name') not in unselected_name:
-                    new_items.append(item)
-
-            order_data.update({
-                'status': "shipped",
-                'items': [{
-                    'name': item.get('product_name', ''),
-                    'quantity': item.get('quantity', 0),
-                    'price': item.get('price', 0),
-                    'pot_size': item.get('variant_details', {}).get('size', 'N/A')
-                } for item in new_items]
-            })
-
-            all_orders.append(order_data)    
-
-    all_orders.sort(key=lambda x: x['date'], reverse=True)
-    context = {'orders': all_orders, 'project_name': 'Order Dashboard'} 
-    return render(request, 'shipment/shipped_order.html', context)
\ No newline at end of file
+    streams = [
+        CursorStream(
+            ShopifyOrder.objects.filter(created_at_shopify__gte=thirty_days_ago, shipment_status__in=SHIPPED_SHIPMENT_STATUSES),
+            'Shopify', 'created_at_shopify', _shopify_shipped_card, summary=ShopifyCardRow,
+        ),
+        CursorStream(
+            WooCommerceOrder.objects.filter(date_created_woo__gte=thirty_days_ago, shipment_status__in=SHIPPED_SHIPMENT_STATUSES),
+            'Wordpress', 'date_created_woo', _woo_shipped_card, summary=WooCardRow,
+        ),
+        CursorStream(
+            Facebook_orders.objects.filter(date_created__gte=thirty_days_ago, shipment_status__in=SHIPPED_SHIPMENT_STATUSES),
+            'Facebook', 'date_created', _facebook_shipped_card, summary=FacebookCardRow,
+        ),
+    ]
+    cursor = request.GET.get('cursor')
+    orders_page = cached(
+        order_cache_key('shipment_shipped', ALL_PLATFORMS, {'cursor': cursor}),
+        lambda: MergedCursorPaginator(streams, SHIPMENT_PAGE_SIZE).page(cursor),
+    )
+    context = {'orders': orders_page, 'project_name': 'Order Dashboard'} 
+    return render(request, 'shipment/shipped_order.html', context)
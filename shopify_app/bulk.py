@@ -0,0 +1,111 @@
+import json
+import logging
+import time
+
+import requests
+
+from .graphql import FULFILLMENT_FIELDS, LINE_ITEM_FIELDS, ORDER_FIELDS, order_from_graphql
+from .utils import shopify_graphql
+
+logger = logging.getLogger(__name__)
+
+# Seconds between status polls, and how long to wait for an export at most
+BULK_POLL_SECONDS = 5
+BULK_TIMEOUT_SECONDS = 6 * 60 * 60
+
+# Orders sorted by ID so an interrupted backfill resumes with "id:>last"
+BULK_ORDERS_QUERY = """
+{
+  orders(query: %%(search)s, sortKey: ID) {
+    edges { node {
+      %(order)s
+      fulfillments { %(fulfillment)s }
+      lineItems { edges { node { %(line_item)s } } }
+    } }
+  }
+}
+""" % {'order': ORDER_FIELDS, 'fulfillment': FULFILLMENT_FIELDS, 'line_item': LINE_ITEM_FIELDS}
+
+RUN_BULK_QUERY = """
+mutation($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+CURRENT_BULK_OPERATION = """
+{ currentBulkOperation { id status errorCode objectCount url partialDataUrl } }
+"""
+
+
+class BulkOperationError(Exception):
+    """A bulk operation could not be started or did not complete."""
+
+
+def start_bulk_order_export(search='', after_id=None):
+    """
+    Submits a bulk export of all orders matching the order ``search``
+    syntax (e.g. "status:open"), optionally only those after Shopify order
+    ``after_id``. Returns the bulk operation ID.
+    """
+    terms = [search] if search else []
+    if after_id:
+        terms.append(f'id:>{after_id}')
+    query = BULK_ORDERS_QUERY % {'search': json.dumps(' '.join(terms))}
+    result = shopify_graphql(RUN_BULK_QUERY, {'query': query})['bulkOperationRunQuery']
+    if result.get('userErrors'):
+        raise BulkOperationError(f"Shopify rejected the bulk export: {result['userErrors']}")
+    operation = result['bulkOperation']
+    logger.info(f"Started Shopify bulk order export {operation['id']} ({' '.join(terms) or 'all orders'}).")
+    return operation['id']
+
+
+def wait_for_bulk_operation(operation_id, poll_seconds=BULK_POLL_SECONDS, timeout=BULK_TIMEOUT_SECONDS, progress=None):
+    """
+    Polls the shop's current bulk operation until it finishes. Calls
+    ``progress(object_count)`` after each poll. Returns the JSONL URL (None
+    when the export matched nothing); raises BulkOperationError on failure.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        operation = shopify_graphql(CURRENT_BULK_OPERATION).get('currentBulkOperation') or {}
+        if operation.get('id') != operation_id:
+            raise BulkOperationError(f"Bulk operation {operation_id} was replaced by {operation.get('id')}.")
+        status = operation.get('status')
+        if progress:
+            progress(int(operation.get('objectCount') or 0))
+        if status == 'COMPLETED':
+            return operation.get('url')
+        if status in ('FAILED', 'CANCELED', 'EXPIRED'):
+            raise BulkOperationError(f"Bulk operation {operation_id} {status.lower()}: {operation.get('errorCode')}")
+        if time.monotonic() > deadline:
+            raise BulkOperationError(f"Bulk operation {operation_id} still {status} after {timeout}s.")
+        time.sleep(poll_seconds)
+
+
+def iter_bulk_orders(url, chunk_size=64 * 1024):
+    """
+    Streams a bulk export's JSONL file and yields one REST-shaped order at a
+    time. Only the order being assembled is held in memory: Shopify writes
+    every line item right after its parent order.
+    """
+    node, line_items = None, []
+    with requests.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(chunk_size=chunk_size):
+            if not line:
+                continue
+            record = json.loads(line)
+            parent = record.get('__parentId')
+            if parent is None:
+                if node is not None:
+                    yield order_from_graphql(node, line_items)
+                node, line_items = record, []
+            elif node is not None and parent == node['id']:
+                line_items.append(record)
+            else:
+                logger.warning(f"Skipping bulk export line for {parent}: not after its parent order.")
+    if node is not None:
+        yield order_from_graphql(node, line_items)
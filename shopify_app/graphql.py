@@ -0,0 +1,149 @@
+import logging
+
+from .utils import shopify_graphql
+
+logger = logging.getLogger(__name__)
+
+# Only the order fields the app reads (ingest columns, order detail page,
+# tracking); shared by the single-order query and the bulk export
+ORDER_FIELDS = """
+id legacyResourceId name email note createdAt updatedAt closedAt
+displayFinancialStatus displayFulfillmentStatus currencyCode
+totalPriceSet { shopMoney { amount } }
+billingAddress { firstName lastName name company address1 address2 city province provinceCode zip country countryCodeV2 phone }
+shippingAddress { firstName lastName name company address1 address2 city province provinceCode zip country countryCodeV2 phone }
+"""
+FULFILLMENT_FIELDS = "status createdAt trackingInfo { company number url }"
+LINE_ITEM_FIELDS = """
+id name title quantity sku variantTitle
+originalUnitPriceSet { shopMoney { amount } }
+product { legacyResourceId }
+variant { legacyResourceId }
+"""
+
+# Line items per single-order query; larger orders fall back to REST. Keeps
+# the requested query cost well under Shopify's 1000-point ceiling.
+ORDER_LINE_ITEMS = 50
+
+ORDER_QUERY = """
+query($id: ID!) {
+  order(id: $id) {
+    %(order)s
+    fulfillments(first: 20) { %(fulfillment)s }
+    lineItems(first: %(line_items)d) { pageInfo { hasNextPage } edges { node { %(line_item)s } } }
+  }
+}
+""" % {'order': ORDER_FIELDS, 'fulfillment': FULFILLMENT_FIELDS, 'line_items': ORDER_LINE_ITEMS, 'line_item': LINE_ITEM_FIELDS}
+
+# displayFulfillmentStatus -> REST fulfillment_status, which is only ever null,
+# partial, fulfilled or restocked; the GraphQL-only stages all read as null
+FULFILLMENT_STATUSES = {
+    'FULFILLED': 'fulfilled',
+    'PARTIALLY_FULFILLED': 'partial',
+    'RESTOCKED': 'restocked',
+    'UNFULFILLED': None,
+    'OPEN': None,
+    'IN_PROGRESS': None,
+    'ON_HOLD': None,
+    'SCHEDULED': None,
+    'PENDING_FULFILLMENT': None,
+    'REQUEST_DECLINED': None,
+}
+
+
+def _money(money_set):
+    return ((money_set or {}).get('shopMoney') or {}).get('amount')
+
+
+def _legacy_id(node):
+    return int(node['legacyResourceId']) if node and node.get('legacyResourceId') else None
+
+
+def _address(address):
+    if address is None:
+        return None
+    return {
+        'first_name': address.get('firstName'), 'last_name': address.get('lastName'), 'name': address.get('name'),
+        'company': address.get('company'), 'address1': address.get('address1'), 'address2': address.get('address2'),
+        'city': address.get('city'), 'province': address.get('province'), 'province_code': address.get('provinceCode'),
+        'zip': address.get('zip'), 'country': address.get('country'), 'country_code': address.get('countryCodeV2'),
+        'phone': address.get('phone'),
+    }
+
+
+def _line_item(node):
+    return {
+        'id': int(node['id'].rsplit('/', 1)[-1]),
+        'name': node.get('name'),
+        'title': node.get('title'),
+        'quantity': node.get('quantity'),
+        'sku': node.get('sku'),
+        'variant_title': node.get('variantTitle'),
+        'price': _money(node.get('originalUnitPriceSet')),
+        'product_id': _legacy_id(node.get('product')),
+        'variant_id': _legacy_id(node.get('variant')),
+    }
+
+
+def _fulfillment(node):
+    tracking = node.get('trackingInfo') or []
+    first = tracking[0] if tracking else {}
+    return {
+        'status': (node.get('status') or '').lower(),
+        'created_at': node.get('createdAt'),
+        'tracking_company': first.get('company'),
+        'tracking_number': first.get('number'),
+        'tracking_url': first.get('url'),
+        'tracking_numbers': [t.get('number') for t in tracking],
+        'tracking_urls': [t.get('url') for t in tracking],
+    }
+
+
+def _fulfillment_status(value):
+    if value and value not in FULFILLMENT_STATUSES:
+        logger.warning(f"Unknown Shopify displayFulfillmentStatus {value!r}; treating it as null (unfulfilled).")
+    return FULFILLMENT_STATUSES.get(value)
+
+
+def order_from_graphql(node, line_items):
+    """Reshapes a GraphQL order node into the REST payload shopify_app.ingest maps."""
+    return {
+        'id': _legacy_id(node),
+        'admin_graphql_api_id': node['id'],
+        'name': node.get('name'),
+        'email': node.get('email'),
+        'note': node.get('note'),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'closed_at': node.get('closedAt'),
+        'financial_status': (node.get('displayFinancialStatus') or '').lower() or None,
+        'fulfillment_status': _fulfillment_status(node.get('displayFulfillmentStatus')),
+        'currency': node.get('currencyCode'),
+        'total_price': _money(node.get('totalPriceSet')),
+        'billing_address': _address(node.get('billingAddress')),
+        'shipping_address': _address(node.get('shippingAddress')),
+        'fulfillments': [_fulfillment(f) for f in node.get('fulfillments') or []],
+        'line_items': [_line_item(item) for item in line_items],
+    }
+
+
+def fetch_order_lean(order_id):
+    """
+    Fetches Shopify order ``order_id`` through GraphQL, selecting only the
+    fields the app uses, and returns it in REST shape. Returns None when the
+    order is missing, the request fails, or it has more than
+    ORDER_LINE_ITEMS line items (the caller then uses the REST fetch).
+    """
+    try:
+        node = shopify_graphql(ORDER_QUERY, {'id': f'gid://shopify/Order/{order_id}'}).get('order')
+    except Exception as e:
+        logger.error(f"GraphQL fetch failed for Shopify order {order_id}: {e}")
+        return None
+    if not node:
+        logger.warning(f"Shopify order {order_id} not found via GraphQL.")
+        return None
+    line_items = node.get('lineItems') or {}
+    if (line_items.get('pageInfo') or {}).get('hasNextPage'):
+        logger.info(f"Shopify order {order_id} has over {ORDER_LINE_ITEMS} line items; needs the REST fetch.")
+        return None
+    return order_from_graphql(node, [edge['node'] for edge in line_items.get('edges') or []])
@@ -0,0 +1,88 @@
+import logging
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from orders_app.ingest import ingest_orders as ingest_platform_orders
+
+from .models import ShopifyOrder
+from .utils import extract_order_columns
+
+logger = logging.getLogger(__name__)
+
+
+def parse_api_datetime(date_string):
+    """Parses a Shopify ISO 8601 timestamp (with offset) into an aware UTC datetime."""
+    if not date_string:
+        return None
+    try:
+        dt = parse_datetime(date_string)
+    except (ValueError, TypeError):
+        dt = None
+    if dt is None:
+        logger.warning(f"Could not parse datetime string from Shopify: {date_string}")
+        return None
+    return timezone.make_aware(dt, dt_timezone.utc) if timezone.is_naive(dt) else dt.astimezone(dt_timezone.utc)
+
+
+def order_fields(order_data):
+    """
+    Maps one Shopify API order to ShopifyOrder field values. Values the
+    payload does not carry (None) are left out, so they never clear stored
+    columns; shipment_status and internal notes are local and never mapped.
+    """
+    fields = {
+        'shopify_id': order_data.get('id'),
+        'name': order_data.get('name'),
+        'email': order_data.get('email'),
+        'financial_status': order_data.get('financial_status'),
+        'fulfillment_status': order_data.get('fulfillment_status'),
+        'total_price': order_data.get('total_price'),
+        'currency': order_data.get('currency'),
+        'billing_address_json': order_data.get('billing_address'),
+        'shipping_address_json': order_data.get('shipping_address'),
+        'line_items_json': order_data.get('line_items'),
+        'tracking_details_json': order_data.get('fulfillments'),
+        'created_at_shopify': parse_api_datetime(order_data.get('created_at')),
+        'updated_at_shopify': parse_api_datetime(order_data.get('updated_at')),
+        'closed_at_shopify': parse_api_datetime(order_data.get('closed_at')),
+        'raw_data': order_data,
+    }
+    # Flattened address/tracking/line-item columns used by list views and search
+    fields.update(extract_order_columns(order_data))
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+def ingest_orders(orders_data, chunk_size=500):
+    """
+    Upserts Shopify API orders in bulk (see orders_app.ingest). Orders
+    without an id are skipped; data older than the stored updated_at_shopify
+    is ignored and orders whose payload hash is unchanged are not rewritten.
+    Returns an IngestResult.
+    """
+    rows = []
+    for order_data in orders_data:
+        if not order_data.get('id'):
+            logger.warning("Skipping Shopify order data with missing id.")
+            continue
+        rows.append(order_fields(order_data))
+    return ingest_platform_orders(ShopifyOrder, 'shopify_id', rows, guard_field='updated_at_shopify', hash_field='payload_hash', chunk_size=chunk_size)
+
+
+def process_order_data(order_data_dict):
+    """
+    Upserts a single Shopify order fetched from the API and returns the
+    stored ShopifyOrder, or None if the data has no id or could not be saved.
+    """
+    shopify_id = order_data_dict.get('id')
+    if not shopify_id:
+        logger.warning("Shopify order data is missing the 'id'. Cannot process.")
+        return None
+    try:
+        result = ingest_orders([order_data_dict])
+        logger.info(f"{'Created' if result.created else 'Updated' if result.updated else 'Unchanged' if result.unchanged else 'Kept newer'} ShopifyOrder for shopify_id={shopify_id}.")
+        return ShopifyOrder.objects.get(shopify_id=shopify_id)
+    except Exception as e:
+        logger.exception(f"Database error processing Shopify order ID {shopify_id}: {e}")
+        return None
@@ -0,0 +1,63 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders_app.sync import refresh_unified_orders
+from shopify_app.models import ShopifyOrder
+from shopify_app.utils import extract_order_columns
+
+logger = logging.getLogger(__name__)
+
+EXTRACTED_FIELDS = ['customer_name', 'phone', 'zip', 'province', 'city', 'tracking_url', 'line_item_count']
+
+
+class Command(BaseCommand):
+    """
+    Fills the flattened ShopifyOrder columns (customer name, phone, zip,
+    province, city, tracking URL, line item count) from the JSON already
+    stored on existing rows. New orders get them at ingest; run this once
+    after deploying the columns.
+    """
+    help = 'Backfills flattened address/tracking columns on existing Shopify orders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=500,
+            help='Number of orders updated per batch (default: 500).',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(self.style.SUCCESS("Backfilling Shopify order columns..."))
+
+        queryset = ShopifyOrder.objects.only('pk', 'shipping_address_json', 'line_items_json', 'raw_data').order_by('pk')
+        updated = 0
+        batch = []
+        for order in queryset.iterator(chunk_size=batch_size):
+            raw = order.raw_data if isinstance(order.raw_data, dict) else {}
+            payload = {
+                'shipping_address': order.shipping_address_json,
+                'line_items': order.line_items_json,
+                'fulfillments': raw.get('fulfillments'),
+            }
+            for field, value in extract_order_columns(payload).items():
+                setattr(order, field, value)
+            batch.append(order)
+            if len(batch) >= batch_size:
+                updated += self._flush(batch)
+                batch = []
+        if batch:
+            updated += self._flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {updated} Shopify orders backfilled."))
+
+    def _flush(self, batch):
+        with transaction.atomic():
+            ShopifyOrder.objects.bulk_update(batch, EXTRACTED_FIELDS)
+            # bulk_update skips signals; keep the unified read model in step
+            refresh_unified_orders(ShopifyOrder, ShopifyOrder.objects.filter(pk__in=[o.pk for o in batch]))
+        self.stdout.write(f"Backfilled {len(batch)} orders (up to id {batch[-1].pk}).")
+        return len(batch)
@@ -1,15 +1,19 @@
 import logging
 import time
-from dateutil import parser # For robust date string parsing
-from django.core.management.base import BaseCommand
+from datetime import datetime, time as dt_time
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from django.utils.timezone import make_aware, is_naive # For date parsing helper
-from datetime import timezone # For date parsing helper
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from orders_app.jobs import JobAlreadyRunning, finish_job, record_batch, record_failed_batch, start_job
 
 # --- Adjust 'shopify_app' if your app name is different ---
 try:
     from shopify_app.models import ShopifyOrder
-    from shopify_app.utils import fetch_shopify_orders # Use the Shopify util
+    from shopify_app.bulk import BulkOperationError, iter_bulk_orders, start_bulk_order_export, wait_for_bulk_operation
+    from shopify_app.ingest import ingest_orders
+    from shopify_app.utils import fetch_shopify_orders, iter_shopify_order_pages_sliced # Use the Shopify util
 except ImportError:
     print("ERROR: Could not import ShopifyOrder or fetch_shopify_orders.")
     print("Please ensure:")
@@ -19,6 +23,7 @@ except ImportError:
     # Define dummy classes/functions for basic parsing if needed
     class ShopifyOrder: pass
     def fetch_shopify_orders(*args, **kwargs): return []
+    def ingest_orders(*args, **kwargs): return None
     print("WARNING: Using dummy definitions for ShopifyOrder and fetch_shopify_orders.")
 
 logger = logging.getLogger(__name__) # Uses Django's logging setup
@@ -26,7 +31,9 @@ logger = logging.getLogger(__name__) # Uses Django's logging setup
 class Command(BaseCommand):
     """
     Django management command to sync historical orders from the Shopify REST API
-    to the local database using since_id pagination.
+    to the local database using since_id pagination. Progress is checkpointed
+    in a SyncJob, so rerunning after a crash resumes after the last batch.
+    Each batch is saved with one bulk upsert on the Shopify order ID.
     """
     help = 'Syncs historical orders from Shopify REST API to the local database.'
 
@@ -41,8 +48,12 @@ class Command(BaseCommand):
         parser.add_argument(
             '--start_id',
             type=int,
-            default=0,
-            help='Shopify Order ID to start fetching *after* (default: 0, fetches from the beginning).',
+            help='Shopify Order ID to start fetching *after* (default: resume after the last committed batch, else 0).',
+        )
+        parser.add_argument(
+            '--fresh',
+            action='store_true',
+            help='Abandon any unfinished sync job with the same options and start from the beginning.',
         )
         parser.add_argument(
             '--max_batches',
@@ -61,11 +72,45 @@ class Command(BaseCommand):
             default='any',
             help='Filter orders by financial status (e.g., paid, pending, refunded, any - default: any).',
         )
-        # Add more filters as needed (e.g., created_at_min/max, fulfillment_status)
-        # parser.add_argument('--created_at_min', type=str, help='Fetch orders created after this ISO date (YYYY-MM-DDTHH:MM:SSZ)')
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Export all matching orders with one GraphQL bulk operation and stream the result (fastest for large backfills).',
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=500,
+            help='With --bulk: orders saved per database batch (default: 500).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Fetch with this many parallel workers, each paging through its own created_at time slice (requires --created_at_min).',
+        )
+        parser.add_argument(
+            '--slices',
+            type=int,
+            help='With --workers: number of created_at slices (default: 4 per worker, max: 400).',
+        )
+        parser.add_argument(
+            '--created_at_min',
+            type=str,
+            help='With --workers: first order creation date to fetch (YYYY-MM-DD or ISO datetime).',
+        )
+        parser.add_argument(
+            '--created_at_max',
+            type=str,
+            help='With --workers: last order creation date to fetch (default: now; pass it explicitly so a rerun can resume).',
+        )
+        # Add more filters as needed (e.g., fulfillment_status)
 
     def handle(self, *args, **options):
         """The main execution logic of the command."""
+        if options['bulk']:
+            return self.handle_bulk(options)
+        if options['workers']:
+            return self.handle_sliced(options)
         self.stdout.write(self.style.SUCCESS("Starting historical Shopify order sync..."))
 
         # --- Parameters & Counters ---
@@ -79,142 +124,129 @@ class Command(BaseCommand):
         financial_status_filter = options['financial_status']
         # Add other filters here
 
+        try:
+            # Same options as an unfinished job: resume it instead of starting over
+            job = start_job(
+                'sync_old_shopify_orders',
+                {'limit': limit, 'status': status_filter, 'financial_status': financial_status_filter},
+                fresh=options['fresh'],
+            )
+        except JobAlreadyRunning as e:
+            raise CommandError(str(e))
+        if current_since_id is None:
+            current_since_id = int(job.cursor) if job.cursor else 0
+            if job.cursor:
+                self.stdout.write(f"Resuming sync job #{job.pk} after Shopify order ID {job.cursor}.")
+        reached_end = False
+        failure = None
+        last_batch_at = time.monotonic()
+
         batches_fetched = 0
         orders_processed = 0
         orders_created = 0
         orders_updated = 0
 
         # --- Main Sync Loop (using since_id) ---
-        while True:
-            # Check batch limit if set
-            if max_batches is not None and batches_fetched >= max_batches:
-                self.stdout.write(f"Reached specified batch limit ({max_batches}). Stopping.")
-                break
-
-            self.stdout.write(f"Fetching batch {batches_fetched + 1} (Limit: {limit}, Since ID: {current_since_id})...")
-
-            # --- Prepare API Parameters ---
-            params = {
-                'limit': limit,
-                'since_id': current_since_id,
-                'status': status_filter,
-                'financial_status': financial_status_filter,
-                'order': 'id asc', # Crucial for since_id pagination
-                # Add other optional parameters based on args
-                # 'fields': 'id,name,email,...' # To fetch only specific fields
-            }
-            # Example: Add created_at_min if provided
-            # if options.get('created_at_min'):
-            #     params['created_at_min'] = options['created_at_min']
-
-            # --- API Call ---
-            try:
-                # Use the utility function to fetch orders (it handles retries/errors)
-                orders_data = fetch_shopify_orders(params=params) # Expects a list of orders
-                # fetch_shopify_orders should return [] on error/no data
-                if orders_data is None: # Should not happen if util returns [] on error
-                    self.stderr.write(self.style.ERROR(f"API fetch returned None for batch {batches_fetched + 1}. Stopping."))
+        try:
+            while True:
+                # Check batch limit if set
+                if max_batches is not None and batches_fetched >= max_batches:
+                    self.stdout.write(f"Reached specified batch limit ({max_batches}). Stopping.")
                     break
-                elif not isinstance(orders_data, list):
-                     self.stderr.write(self.style.ERROR(f"API fetch did not return a list for batch {batches_fetched + 1}. Got: {type(orders_data)}. Stopping."))
-                     break
 
-                self.stdout.write(self.style.SUCCESS(f"Fetched {len(orders_data)} orders in this batch."))
-
-            except Exception as e:
-                # Although util should handle errors, catch unexpected issues here
-                self.stderr.write(self.style.ERROR(f"Unexpected error during API call for batch {batches_fetched + 1}: {e}"))
-                break # Stop the sync on unexpected errors
-
-            # --- Exit Condition ---
-            if not orders_data:
-                self.stdout.write("No more orders found matching criteria. Sync complete.")
-                break # Exit loop if no orders are returned in the batch
-
-            last_order_id_in_batch = 0 # Track the last ID for the next 'since_id'
-
-            # --- Process Fetched Orders ---
-            for order_data in orders_data:
-                orders_processed += 1
-                shopify_id = order_data.get('id')
-
-                if not shopify_id:
-                    self.stderr.write(self.style.ERROR("Skipping order data with missing Shopify ID."))
-                    continue
+                self.stdout.write(f"Fetching batch {batches_fetched + 1} (Limit: {limit}, Since ID: {current_since_id})...")
+
+                # --- Prepare API Parameters ---
+                params = {
+                    'limit': limit,
+                    'since_id': current_since_id,
+                    'status': status_filter,
+                    'financial_status': financial_status_filter,
+                    'order': 'id asc', # Crucial for since_id pagination
+                    # Add other optional parameters based on args
+                    # 'fields': 'id,name,email,...' # To fetch only specific fields
+                }
+                # Example: Add created_at_min if provided
+                # if options.get('created_at_min'):
+                #     params['created_at_min'] = options['created_at_min']
+
+                # --- API Call ---
+                try:
+                    # Use the utility function to fetch orders (it handles retries); a failed
+                    # request raises, so [] below really is the end of the orders
+                    orders_data = fetch_shopify_orders(params=params, raise_errors=True) # Expects a list of orders
+                    if orders_data is None: # Should not happen if util returns [] on error
+                        failure = f"API fetch returned None for batch {batches_fetched + 1}."
+                        self.stderr.write(self.style.ERROR(f"{failure} Stopping."))
+                        break
+                    elif not isinstance(orders_data, list):
+                         failure = f"API fetch did not return a list for batch {batches_fetched + 1}. Got: {type(orders_data)}."
+                         self.stderr.write(self.style.ERROR(f"{failure} Stopping."))
+                         break
+
+                    self.stdout.write(self.style.SUCCESS(f"Fetched {len(orders_data)} orders in this batch."))
 
-                # Keep track of the highest ID encountered in this batch
-                last_order_id_in_batch = max(last_order_id_in_batch, shopify_id)
+                except Exception as e:
+                    # Not the end of the orders: fail with the cursor at the last committed batch
+                    failure = f"API request for batch {batches_fetched + 1} failed: {e}"
+                    self.stderr.write(self.style.ERROR(f"{failure} Stopping; run the command again to resume."))
+                    break # Stop the sync on API errors
+
+                # --- Exit Condition ---
+                if not orders_data:
+                    self.stdout.write("No more orders found matching criteria. Sync complete.")
+                    reached_end = True
+                    break # Exit loop if no orders are returned in the batch
+
+                orders_data = [o for o in orders_data if o.get('id')]
+                if not orders_data:
+                    failure = f"Batch {batches_fetched + 1} has no Shopify order IDs."
+                    self.stderr.write(self.style.ERROR(f"{failure} Stopping."))
+                    break
+                # Highest ID in the batch is the next 'since_id'
+                last_order_id_in_batch = max(o['id'] for o in orders_data)
 
+                # --- Save the batch with one bulk upsert ---
+                # The checkpoint commits with the batch's orders, so a crash
+                # repeats nothing that was saved
                 try:
-                    # Use atomic transaction for each order
                     with transaction.atomic():
-                        # Prepare data for the ShopifyOrder model fields
-                        defaults = {
-                            'name': order_data.get('name'), # e.g., #1001
-                            'email': order_data.get('email'),
-                            'financial_status': order_data.get('financial_status'),
-                            'fulfillment_status': order_data.get('fulfillment_status'), # Map directly
-                            'total_price': order_data.get('total_price'),
-                            'currency': order_data.get('currency'),
-
-                            # JSON Fields - Store the relevant structures directly
-                            'billing_address_json': order_data.get('billing_address'),
-                            'shipping_address_json': order_data.get('shipping_address'),
-                            'line_items_json': order_data.get('line_items', []),
-
-                            # NOTE: shipment_status - Leave to default 'pending' or add custom logic
-                            # based on fulfillment_status or fulfillment data if needed.
-                            # 'shipment_status': self.determine_shipment_status(order_data),
-
-                            # NOTE: tracking_details_json requires parsing 'fulfillments' array
-                            # which might not be fully included by default or requires another API call.
-                            # Leave as null for basic sync.
-                            'tracking_details_json': order_data.get('fulfillments'), # Store fulfillments if present
-
-                            # NOTE: internal_notes is not from Shopify, leave blank/null.
-                            # 'internal_notes': '',
-
-                            # Timestamps (Parse safely using helper) - Use Shopify's timestamps
-                            'created_at_shopify': self.parse_datetime(order_data.get('created_at')),
-                            'updated_at_shopify': self.parse_datetime(order_data.get('updated_at')),
-                            'closed_at_shopify': self.parse_datetime(order_data.get('closed_at')), # Note: 'closed_at' field name
-
-                            # Store the raw payload
-                            'raw_data': order_data,
-                        }
-
-                        # Remove None values ONLY if your model fields explicitly forbid null=True
-                        # Be careful, as setting blank=True, null=True (common) means None is okay.
-                        # defaults = {k: v for k, v in defaults.items() if v is not None}
-
-                        # --- Database Operation ---
-                        order_obj, created = ShopifyOrder.objects.update_or_create(
-                            shopify_id=shopify_id, # Unique key
-                            defaults=defaults      # Fields to update/create
+                        result = ingest_orders(orders_data)
+                        created, updated = result.created, result.updated
+                        record_batch(
+                            job, last_order_id_in_batch, len(orders_data), created, updated,
+                            seconds=time.monotonic() - last_batch_at,
                         )
-
-                        if created:
-                            orders_created += 1
-                            # Verbose logging:
-                            # self.stdout.write(f"CREATED Order: Shopify ID {shopify_id} -> DB ID {order_obj.id}")
-                        else:
-                            orders_updated += 1
-                            # Verbose logging:
-                            # self.stdout.write(f"UPDATED Order: Shopify ID {shopify_id} -> DB ID {order_obj.id}")
-
                 except Exception as e:
-                    self.stderr.write(self.style.ERROR(f"Failed to process or save Shopify order ID {shopify_id}: {e}"))
-                    logger.error(f"Error processing Shopify order ID {shopify_id}. Data snippet: {str(order_data)[:500]}", exc_info=True)
-                    # Continue with the next order in the batch
-                    continue
-
-            # --- Prepare for Next Iteration ---
-            # Update since_id to the ID of the last successfully processed order in this batch
-            current_since_id = last_order_id_in_batch
-            batches_fetched += 1
-
-            # Optional: Add delay between batches if hitting secondary rate limits
-            # time.sleep(0.5) # Shopify's bucket refills at 2/sec (plus burst)
+                    logger.error(f"Error saving Shopify orders after since_id {current_since_id}", exc_info=True)
+                    # The cursor stays at the last committed batch, so a rerun retries this one
+                    failure = f"Failed to save batch after Shopify order ID {current_since_id}: {e}"
+                    record_failed_batch(job, len(orders_data), failure)
+                    self.stderr.write(self.style.ERROR(f"{failure} Stopping."))
+                    break
+                last_batch_at = time.monotonic()
+
+                # --- Prepare for Next Iteration ---
+                orders_processed += len(orders_data)
+                orders_created += created
+                orders_updated += updated
+                current_since_id = last_order_id_in_batch
+                batches_fetched += 1
+
+                # Optional: Add delay between batches if hitting secondary rate limits
+                # time.sleep(0.5) # Shopify's bucket refills at 2/sec (plus burst)
+        except BaseException as e:
+            # Crash, Ctrl+C or kill: the next run resumes after the last committed batch
+            finish_job(job, error=e if isinstance(e, Exception) else 'Interrupted')
+            raise
+
+        if failure:
+            finish_job(job, error=failure)
+        elif reached_end:
+            finish_job(job)
+        else:
+            finish_job(job, paused=True)
+            self.stdout.write(f"Stopped after Shopify order ID {job.cursor}; run the command again to resume.")
 
         # --- Final Summary ---
         self.stdout.write(self.style.SUCCESS("-" * 30))
@@ -223,33 +255,188 @@ class Command(BaseCommand):
         self.stdout.write(f"New Orders Created in DB: {orders_created}")
         self.stdout.write(f"Existing Orders Updated in DB: {orders_updated}")
         self.stdout.write(f"API Batches Fetched: {batches_fetched}")
+        self.stdout.write(f"Sync job #{job.pk}: {job.status}, {job.processed} orders in total")
         self.stdout.write(self.style.SUCCESS("-" * 30))
 
+    def handle_bulk(self, options):
+        """
+        Backfill through a GraphQL bulk operation: Shopify builds a JSONL file
+        of every matching order, which is streamed line by line and saved in
+        batches. The SyncJob cursor is the last saved order ID, so a rerun
+        exports only the orders after it.
+        """
+        self.stdout.write(self.style.SUCCESS("Starting Shopify bulk order backfill..."))
+        filters = {'status': options['status'], 'financial_status': options['financial_status']}
+        search = ' '.join(f'{name}:{value}' for name, value in filters.items() if value != 'any')
+        batch_size = max(1, options['batch_size'])
+        max_batches = options['max_batches']
+        try:
+            job = start_job('sync_old_shopify_orders', dict(filters, mode='bulk'), fresh=options['fresh'])
+        except JobAlreadyRunning as e:
+            raise CommandError(str(e))
+        after_id = options['start_id'] if options['start_id'] is not None else (int(job.cursor) if job.cursor else None)
+        if after_id:
+            self.stdout.write(f"Exporting orders after Shopify order ID {after_id}.")
+
+        started = last_batch_at = time.monotonic()
+        processed = created = updated = batches = 0
+        paused = False
+
+        def save(batch):
+            nonlocal created, updated, last_batch_at
+            last_id = max(order['id'] for order in batch)
+            try:
+                with transaction.atomic():
+                    result = ingest_orders(batch)
+                    record_batch(job, last_id, len(batch), result.created, result.updated, seconds=time.monotonic() - last_batch_at)
+                created += result.created
+                updated += result.updated
+            except Exception as e:
+                logger.error(f"Error saving Shopify bulk batch ending at {last_id}", exc_info=True)
+                # Stop with the cursor at the last committed batch; a rerun exports from there
+                failure = f"Failed to save batch ending at Shopify order ID {last_id}: {e}"
+                record_failed_batch(job, len(batch), failure)
+                raise CommandError(failure)
+            last_batch_at = time.monotonic()
+
+        try:
+            operation_id = start_bulk_order_export(search, after_id)
+            url = wait_for_bulk_operation(
+                operation_id, progress=lambda count: self.stdout.write(f"Bulk export running: {count} objects so far..."),
+            )
+            export_seconds = time.monotonic() - started
+            self.stdout.write(f"Bulk export finished in {export_seconds:.0f} s; streaming results.")
+
+            batch = []
+            for order in iter_bulk_orders(url) if url else ():
+                if not order.get('id'):
+                    continue
+                batch.append(order)
+                if len(batch) >= batch_size:
+                    save(batch)
+                    processed += len(batch)
+                    batches += 1
+                    batch = []
+                    self.stdout.write(f"Saved {processed} orders ({created} new, {updated} updated).")
+                    if max_batches is not None and batches >= max_batches:
+                        paused = True
+                        break
+            if batch and not paused:
+                save(batch)
+                processed += len(batch)
+        except BulkOperationError as e:
+            finish_job(job, error=e)
+            raise CommandError(str(e))
+        except BaseException as e:
+            finish_job(job, error=e if isinstance(e, Exception) else 'Interrupted')
+            raise
+
+        finish_job(job, paused=paused)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS("-" * 30))
+        self.stdout.write(self.style.SUCCESS("Shopify bulk backfill finished!" if not paused else "Shopify bulk backfill paused."))
+        self.stdout.write(f"Orders streamed: {processed} ({created} new, {updated} updated)")
+        self.stdout.write(f"Elapsed: {elapsed:.1f} s ({processed / elapsed if elapsed else 0:.1f} orders/s)")
+        self.stdout.write(f"Sync job #{job.pk}: {job.status}, {job.processed} orders in total")
+        self.stdout.write(self.style.SUCCESS("-" * 30))
 
-    def parse_datetime(self, date_string):
+    def parse_date_option(self, value, end_of_day=False):
+        """Parses a --created_at_min/max value into an aware datetime."""
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid date '{value}'. Use YYYY-MM-DD or an ISO datetime.")
+            parsed = datetime.combine(day, dt_time.max if end_of_day else dt_time.min)
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def handle_sliced(self, options):
         """
-        Safely parses an ISO 8601 date string (used by Shopify) into a
-        timezone-aware datetime object (using UTC).
-        Returns None if parsing fails or input is empty/None.
+        Parallel backfill: the created_at range is split into slices that
+        --workers threads page through with Link cursors, and pages are saved
+        here as they arrive. The SyncJob cursor is a hex bitmask of finished
+        slices, so a rerun with the same options fetches only the rest.
         """
-        if not date_string:
-            return None
+        if not options['created_at_min']:
+            raise CommandError("--workers requires --created_at_min.")
+        limit = options['limit']
+        if not 1 <= limit <= 250:
+            raise CommandError("Invalid limit. Must be between 1 and 250.")
+        workers = max(1, options['workers'])
+        slices = options['slices'] or workers * 4
+        if not 1 <= slices <= 400:
+            raise CommandError("Invalid slices. Must be between 1 and 400.")
+        created_at_min = self.parse_date_option(options['created_at_min'])
+        created_at_max = self.parse_date_option(options['created_at_max'], end_of_day=True) if options['created_at_max'] else timezone.now()
+        if created_at_max < created_at_min:
+            raise CommandError("--created_at_max is before --created_at_min.")
+        filters = {'limit': limit, 'status': options['status'], 'financial_status': options['financial_status']}
+        try:
+            job = start_job(
+                'sync_old_shopify_orders',
+                dict(filters, mode='sliced', slices=slices,
+                     created_at_min=created_at_min.isoformat(), created_at_max=created_at_max.isoformat()),
+                fresh=options['fresh'],
+            )
+        except JobAlreadyRunning as e:
+            raise CommandError(str(e))
+        done_mask = int(job.cursor, 16) if job.cursor else 0
+        done = {index for index in range(slices) if done_mask >> index & 1}
+        if done:
+            self.stdout.write(f"Resuming sync job #{job.pk}: {len(done)} of {slices} slices already saved.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Starting Shopify order sync from {created_at_min} to {created_at_max}: {workers} workers, {slices} slices..."
+        ))
+
+        started = last_batch_at = time.monotonic()
+        processed = created = updated = batches = 0
+        paused = False
+        failed = set()
         try:
-            # dateutil.parser handles ISO 8601 format well, including timezones
-            dt = parser.parse(date_string)
-
-            # Ensure it's timezone-aware. If parser didn't make it aware (unlikely for ISO 8601),
-            # make it UTC. If it is aware, convert it to UTC for consistency.
-            if is_naive(dt):
-                logger.warning(f"Parsed date '{date_string}' as naive, assuming UTC.")
-                return make_aware(dt, timezone.utc)
-            else:
-                # Convert to UTC if it's not already (e.g., if offset was -04:00)
-                return dt.astimezone(timezone.utc)
-
-        except (ValueError, TypeError, parser.ParserError) as e:
-            logger.warning(f"Could not parse date string '{date_string}': {e}")
-            return None
+            for index, orders, slice_done in iter_shopify_order_pages_sliced(
+                created_at_min, created_at_max, workers=workers, slices=slices, params=filters, skip=done,
+            ):
+                orders = [o for o in orders if o.get('id')]
+                # A slice with a page that failed to save stays unfinished
+                slice_done = slice_done and index not in failed
+                mask = done_mask | (1 << index) if slice_done else done_mask
+                try:
+                    with transaction.atomic():
+                        result = ingest_orders(orders)
+                        record_batch(job, f'{mask:x}', len(orders), result.created, result.updated, seconds=time.monotonic() - last_batch_at)
+                    created += result.created
+                    updated += result.updated
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(f"Failed to save a page of slice {index}: {e}"))
+                    logger.error(f"Error saving Shopify orders of created_at slice {index}", exc_info=True)
+                    record_batch(job, f'{done_mask:x}', len(orders), errors=len(orders), last_error=f"Slice {index}: {e}")
+                    failed.add(index)
+                    slice_done = False
+                if slice_done:
+                    done_mask = mask
+                last_batch_at = time.monotonic()
+                processed += len(orders)
+                batches += 1
+                if batches % 10 == 0 or slice_done:
+                    self.stdout.write(f"Saved {processed} orders ({created} new, {updated} updated); {bin(done_mask).count('1')}/{slices} slices done.")
+                if options['max_batches'] is not None and batches >= options['max_batches']:
+                    paused = True
+                    break
+        except BaseException as e:
+            finish_job(job, error=e if isinstance(e, Exception) else 'Interrupted')
+            if isinstance(e, ValueError):
+                raise CommandError(str(e))
+            raise
+
+        finish_job(job, paused=paused or bin(done_mask).count('1') < slices)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS("-" * 30))
+        self.stdout.write(self.style.SUCCESS("Shopify sliced sync finished!" if job.status == job.STATUS_COMPLETED else "Shopify sliced sync paused."))
+        self.stdout.write(f"Orders fetched: {processed} ({created} new, {updated} updated)")
+        self.stdout.write(f"Elapsed: {elapsed:.1f} s ({processed / elapsed if elapsed else 0:.1f} orders/s)")
+        self.stdout.write(f"Sync job #{job.pk}: {job.status}, {job.processed} orders in total")
+        self.stdout.write(self.style.SUCCESS("-" * 30))
+
 
 # Instructions for running the command
 # =====================================
@@ -262,6 +449,10 @@ class Command(BaseCommand):
 # To specify the number of orders per batch (limit):
 # python manage.py sync_old_shopify_orders --limit=100
 
+# An interrupted run resumes automatically when rerun with the same options;
+# to ignore the unfinished job and start from the beginning:
+# python manage.py sync_old_shopify_orders --fresh
+
 # To start syncing orders CREATED AFTER a specific order ID:
 # python manage.py sync_old_shopify_orders --start_id=1234567890
 
@@ -271,5 +462,11 @@ class Command(BaseCommand):
 # To filter by status:
 # python manage.py sync_old_shopify_orders --status=open --financial_status=paid
 
+# To backfill everything through one GraphQL bulk operation (streamed JSONL):
+# python manage.py sync_old_shopify_orders --bulk --batch_size=1000
+
+# To fetch a date range with 8 parallel workers (time-sliced, resumable):
+# python manage.py sync_old_shopify_orders --workers=8 --created_at_min=2021-01-01 --created_at_max=2024-12-31 --limit=250
+
 # Combine options:
 # python manage.py sync_old_shopify_orders --limit=250 --start_id=1234567890 --status=closed
\ No newline at end of file
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify_app', '0008_shopifyorder_unselected_items_for_clone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='city',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='customer_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='line_item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='phone',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Shipping phone, last 10 digits', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='province',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='tracking_url',
+            field=models.CharField(blank=True, default='', help_text='Tracking URL of the first fulfillment', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='zip',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+    ]
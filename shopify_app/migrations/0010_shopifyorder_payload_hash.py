@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify_app', '0009_shopifyorder_city_shopifyorder_customer_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 of the mapped Shopify payload last written; unchanged payloads are not rewritten', max_length=64),
+        ),
+    ]
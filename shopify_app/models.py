@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 
@@ -38,6 +38,16 @@ class ShopifyOrder(models.Model):
     shipping_address_json = models.JSONField(blank=True, null=True)
     line_items_json = models.JSONField(blank=True, null=True)
 
+    # Hot fields flattened out of the JSON payload at ingest (see utils.extract_order_columns)
+    # so list/shipment views and search never decode the JSON columns per row
+    customer_name = models.CharField(max_length=255, blank=True, default='')
+    phone = models.CharField(max_length=20, blank=True, default='', db_index=True, help_text="Shipping phone, last 10 digits")
+    zip = models.CharField(max_length=20, blank=True, default='', db_index=True)
+    province = models.CharField(max_length=100, blank=True, default='')
+    city = models.CharField(max_length=100, blank=True, default='', db_index=True)
+    tracking_url = models.CharField(max_length=500, blank=True, default='', help_text="Tracking URL of the first fulfillment")
+    line_item_count = models.PositiveIntegerField(default=0)
+
     # --- NEW FIELD for Tracking Details ---
     tracking_details_json = models.JSONField(
         blank=True,
@@ -60,6 +70,10 @@ class ShopifyOrder(models.Model):
 
     # Store the full raw data for reference or if fields are missed
     raw_data = models.JSONField(blank=True, null=True, help_text="Raw JSON data from API or webhook")
+    payload_hash = models.CharField(
+        max_length=64, blank=True, default='', editable=False,
+        help_text="SHA-256 of the mapped Shopify payload last written; unchanged payloads are not rewritten"
+    )
 
     clone_orders = models.JSONField(default=list, blank=True, 
         help_text="Store clone orders as a JSON list, e.g., [{'order_id': 'XXX', 'platform': 'Shopify'}, ...]")
@@ -76,6 +90,13 @@ class ShopifyOrder(models.Model):
     django_date_modified = models.DateTimeField(auto_now=True)
 
 
+    def save(self, *args, **kwargs):
+        # A local edit may touch synced fields; the next payload is written in full
+        self.payload_hash = ''
+        # The post_save handlers (dashboard counters, UnifiedOrder) commit with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Shopify Order {self.name or self.shopify_id} ({self.financial_status})"
 
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Callers that must not wait behind backfills (webhook refetches) use HIGH;
+# LOW callers stop SHOPIFY_RATE_LIMIT_RESERVE calls short of the limit.
+PRIORITY_HIGH = 'high'
+PRIORITY_LOW = 'low'
+
+# Shopify REST leaky bucket: 40 calls leaking 2/s (Plus stores: 80 leaking 4/s).
+# The real size is learned from the X-Shopify-Shop-Api-Call-Limit header.
+DEFAULT_CAPACITY = 40
+LEAK_SECONDS = 20  # a full bucket drains in 20 s on every plan
+BUCKET_KEY = 'shopify:ratelimit:bucket'
+# After a Redis error the process paces itself locally for this long
+REDIS_RETRY_SECONDS = 60
+
+# KEYS[1] bucket hash; ARGV: now, cost, reserve, default capacity, leak seconds.
+# Returns 0 when the call may go ahead, else the seconds to wait.
+ACQUIRE_SCRIPT = """
+local level = tonumber(redis.call('HGET', KEYS[1], 'level') or '0')
+local ts = tonumber(redis.call('HGET', KEYS[1], 'ts') or ARGV[1])
+local capacity = tonumber(redis.call('HGET', KEYS[1], 'capacity') or ARGV[4])
+local rate = capacity / tonumber(ARGV[5])
+local now = tonumber(ARGV[1])
+level = math.max(0, level - (now - ts) * rate)
+local limit = capacity - tonumber(ARGV[3])
+local wait = 0
+if level + tonumber(ARGV[2]) > limit then
+  wait = (level + tonumber(ARGV[2]) - limit) / rate
+else
+  level = level + tonumber(ARGV[2])
+end
+redis.call('HSET', KEYS[1], 'level', tostring(level), 'ts', tostring(now), 'capacity', tostring(capacity))
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+# KEYS[1] bucket hash; ARGV: now, used, capacity, leak seconds. Never lowers the level:
+# calls reserved here may not be counted by Shopify yet.
+OBSERVE_SCRIPT = """
+local level = tonumber(redis.call('HGET', KEYS[1], 'level') or '0')
+local ts = tonumber(redis.call('HGET', KEYS[1], 'ts') or ARGV[1])
+local capacity = tonumber(ARGV[3])
+local rate = capacity / tonumber(ARGV[4])
+level = math.max(0, level - (tonumber(ARGV[1]) - ts) * rate)
+level = math.max(level, tonumber(ARGV[2]))
+redis.call('HSET', KEYS[1], 'level', tostring(level), 'ts', ARGV[1], 'capacity', ARGV[3])
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(level)
+"""
+
+
+def parse_call_limit(header):
+    """'32/40' -> (32, 40); None for a missing or malformed header."""
+    try:
+        used, capacity = (int(part) for part in header.split('/'))
+        return used, capacity
+    except (AttributeError, ValueError):
+        return None
+
+
+class ShopifyRateLimiter:
+    """
+    Token bucket mirroring Shopify's REST leaky bucket, shared by every
+    worker and command through Redis. ``acquire()`` blocks until a call fits
+    under the limit; ``observe()`` syncs the bucket with the call-limit
+    header of each response. Falls back to a per-process bucket while Redis
+    is unreachable.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._redis_down_until = 0.0
+        self._lock = threading.Lock()
+        self._local = {'level': 0.0, 'ts': time.time(), 'capacity': DEFAULT_CAPACITY}
+
+    def _redis(self):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._client is None:
+            import redis
+            url = getattr(settings, 'SHOPIFY_RATE_LIMIT_REDIS_URL', None)
+            if not url:
+                return None
+            client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+            self._acquire = client.register_script(ACQUIRE_SCRIPT)
+            self._observe = client.register_script(OBSERVE_SCRIPT)
+            self._client = client
+        return self._client
+
+    def _redis_failed(self, e):
+        logger.warning(f"Shopify rate limiter falling back to a local bucket for {REDIS_RETRY_SECONDS}s: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _try_acquire(self, reserve, cost=1):
+        now = time.time()
+        if self._redis() is not None:
+            try:
+                return float(self._acquire(keys=[BUCKET_KEY], args=[now, cost, reserve, DEFAULT_CAPACITY, LEAK_SECONDS]))
+            except Exception as e:
+                self._redis_failed(e)
+        with self._lock:
+            bucket = self._local
+            rate = bucket['capacity'] / LEAK_SECONDS
+            level = max(0.0, bucket['level'] - (now - bucket['ts']) * rate)
+            limit = bucket['capacity'] - reserve
+            bucket['ts'] = now
+            if level + cost > limit:
+                bucket['level'] = level
+                return (level + cost - limit) / rate
+            bucket['level'] = level + cost
+            return 0.0
+
+    def acquire(self, priority=PRIORITY_HIGH):
+        """Waits until one call fits in the bucket (LOW keeps the reserve free)."""
+        reserve = getattr(settings, 'SHOPIFY_RATE_LIMIT_RESERVE', 10) if priority == PRIORITY_LOW else 0
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(reserve)
+            if wait <= 0:
+                if waited >= 1:
+                    logger.info(f"Shopify {priority}-priority call waited {waited:.1f}s for the rate limit.")
+                return waited
+            # Re-check at least every second so a drained bucket is used promptly
+            wait = min(wait, 1.0)
+            time.sleep(wait)
+            waited += wait
+
+    def observe(self, header=None, throttled=False):
+        """Syncs the bucket with a response's X-Shopify-Shop-Api-Call-Limit (or a 429)."""
+        parsed = parse_call_limit(header)
+        if parsed is None and not throttled:
+            return
+        now = time.time()
+        used, capacity = parsed or (None, None)
+        if throttled:
+            capacity = capacity or self._local['capacity']
+            used = capacity
+        if self._redis() is not None:
+            try:
+                self._observe(keys=[BUCKET_KEY], args=[now, used, capacity, LEAK_SECONDS])
+                return
+            except Exception as e:
+                self._redis_failed(e)
+        with self._lock:
+            bucket = self._local
+            level = max(0.0, bucket['level'] - (now - bucket['ts']) * bucket['capacity'] / LEAK_SECONDS)
+            bucket.update(level=max(level, used), ts=now, capacity=capacity)
+
+
+rate_limiter = ShopifyRateLimiter()
@@ -0,0 +1,83 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from .graphql import fetch_order_lean
+from .ingest import process_order_data
+from .utils import fetch_shopify_order
+
+logger = logging.getLogger(__name__)
+
+# Failed webhook refetches back off 1, 2, 4 ... minutes up to an hour between
+# attempts, about five hours in total
+WEBHOOK_MAX_RETRIES = 10
+WEBHOOK_RETRY_BASE_SECONDS = 60
+WEBHOOK_RETRY_MAX_SECONDS = 60 * 60
+
+
+def fetch_order(shopify_id):
+    """
+    Latest data of order ``shopify_id``: the lean GraphQL selection, or the
+    full REST order when SHOPIFY_ORDER_FETCH_FULL_PAYLOAD is set (debugging)
+    or the lean query cannot return it.
+    """
+    if not getattr(settings, 'SHOPIFY_ORDER_FETCH_FULL_PAYLOAD', False):
+        order_data = fetch_order_lean(shopify_id)
+        if order_data:
+            return order_data
+    return fetch_shopify_order(shopify_id)
+
+
+def _webhook_key(webhook_id):
+    return f'shopify:webhook:seen:{webhook_id}'
+
+
+def claim_webhook(webhook_id):
+    """
+    Records delivery ``webhook_id`` (X-Shopify-Webhook-Id) as seen. Returns
+    False when it was already claimed, i.e. this is a retry or duplicate of
+    a delivery being or already processed. Deliveries without an ID, or
+    while the cache is unreachable, are always processed.
+    """
+    if not webhook_id:
+        return True
+    ttl = getattr(settings, 'SHOPIFY_WEBHOOK_ID_TTL_SECONDS', 48 * 60 * 60)
+    try:
+        return cache.add(_webhook_key(webhook_id), 1, timeout=ttl)
+    except Exception as e:
+        logger.warning(f"Webhook deduplication unavailable, processing {webhook_id}: {e}")
+        return True
+
+
+def release_webhook(webhook_id):
+    """Forgets ``webhook_id`` so a redelivery is processed again."""
+    if webhook_id:
+        cache.delete(_webhook_key(webhook_id))
+
+
+@shared_task(bind=True, max_retries=WEBHOOK_MAX_RETRIES)
+def process_order_webhook_task(self, shopify_id, webhook_id=None):
+    """
+    Refetches Shopify order ``shopify_id`` from the API and upserts it.
+    Shopify already got a 2xx for the webhook and will not redeliver it, so
+    failures are retried with exponential backoff for several hours.
+    """
+    order_data = fetch_order(shopify_id)
+    order_obj = process_order_data(order_data) if order_data else None
+    if not order_obj:
+        step = 'API fetch' if not order_data else 'Save'
+        if self.request.retries >= self.max_retries:
+            # Nothing will redeliver this event: the order stays stale until it changes again
+            logger.error(
+                f"Task {self.request.id}: {step} for Shopify order {shopify_id} (webhook {webhook_id}) "
+                f"failed after {self.max_retries} retries; giving up. Resync it with sync_old_shopify_orders."
+            )
+            return None
+        countdown = min(WEBHOOK_RETRY_BASE_SECONDS * 2 ** self.request.retries, WEBHOOK_RETRY_MAX_SECONDS)
+        logger.error(f"Task {self.request.id}: {step} for Shopify order {shopify_id} failed; retrying in {countdown}s.")
+        raise self.retry(countdown=countdown)
+
+    logger.info(f"Task {self.request.id}: Shopify order {shopify_id} refreshed from webhook {webhook_id}.")
+    return order_obj.pk
@@ -1,3 +1,274 @@
-from django.test import TestCase
+import base64
+import hashlib
+import hmac
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, quote, urlparse
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.dateparse import parse_datetime
+
+from orders_app.models import PLATFORM_SHOPIFY, SyncJob, UnifiedOrder
+from .graphql import order_from_graphql
+from .ingest import ingest_orders
+from .models import ShopifyOrder
+from .ratelimit import PRIORITY_HIGH, ShopifyRateLimiter, parse_call_limit
+from .tasks import process_order_webhook_task
+from .utils import extract_order_columns
+
+
+BULK_EXPORT_JSONL = b"""{"id":"gid://shopify/Order/1","legacyResourceId":"9100000001","name":"#3001","email":"a@x.com","createdAt":"2025-01-01T10:00:00Z","updatedAt":"2025-01-02T10:00:00Z","displayFinancialStatus":"PAID","displayFulfillmentStatus":"UNFULFILLED","currencyCode":"INR","totalPriceSet":{"shopMoney":{"amount":"499.00"}},"shippingAddress":{"name":"Asha","phone":"9845012345","zip":"560001","city":"Bengaluru"},"fulfillments":[]}
+{"id":"gid://shopify/LineItem/11","name":"Rose - Small","title":"Rose","quantity":2,"variantTitle":"Small","originalUnitPriceSet":{"shopMoney":{"amount":"199.50"}},"__parentId":"gid://shopify/Order/1"}
+{"id":"gid://shopify/Order/2","legacyResourceId":"9100000002","name":"#3002","createdAt":"2025-01-03T10:00:00Z","updatedAt":"2025-01-03T11:00:00Z","displayFinancialStatus":"PAID","displayFulfillmentStatus":"FULFILLED","currencyCode":"INR","totalPriceSet":{"shopMoney":{"amount":"99.00"}},"fulfillments":[{"status":"SUCCESS","trackingInfo":[{"number":"T1","url":"http://track/T1"}]}]}
+"""
+
+
+REST_ORDERS = [
+    {'id': 9200000000 + day, 'name': f'#40{day:02d}', 'financial_status': 'paid', 'fulfillment_status': None,
+     'created_at': f'2025-01-{day:02d}T10:00:00+00:00', 'updated_at': f'2025-01-{day:02d}T11:00:00+00:00'}
+    for day in (1, 2, 2, 2, 9, 20)
+]
+for _n, _order in enumerate(REST_ORDERS):
+    _order['id'] += _n * 100
+
+
+class _ShopifyStandIn(BaseHTTPRequestHandler):
+    """Answers the bulk-operation GraphQL calls, serves a canned JSONL export and pages REST orders."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        query = body['query']
+        if 'order(id: $id)' in query:
+            order = next(o for o in REST_ORDERS if f"/{o['id']}" in body['variables']['id'])
+            data = {'order': {
+                'id': body['variables']['id'], 'legacyResourceId': str(order['id']), 'name': order['name'],
+                'createdAt': order['created_at'], 'updatedAt': order['updated_at'],
+                'displayFinancialStatus': 'PAID', 'displayFulfillmentStatus': 'UNFULFILLED',
+                'lineItems': {'pageInfo': {'hasNextPage': False}, 'edges': []},
+            }}
+        elif 'bulkOperationRunQuery' in query:
+            data = {'bulkOperationRunQuery': {'bulkOperation': {'id': 'gid://shopify/BulkOperation/1', 'status': 'CREATED'}, 'userErrors': []}}
+        else:
+            url = f'http://127.0.0.1:{self.server.server_port}/export.jsonl'
+            data = {'currentBulkOperation': {'id': 'gid://shopify/BulkOperation/1', 'status': 'COMPLETED', 'objectCount': '3', 'url': url}}
+        self._send(json.dumps({'data': data}).encode(), 'application/json')
+
+    def do_GET(self):
+        single = next((o for o in REST_ORDERS if self.path.endswith(f"/orders/{o['id']}.json")), None)
+        if single:
+            return self._send(json.dumps({'order': single}).encode(), 'application/json')
+        if 'orders.json' not in self.path:
+            return self._send(BULK_EXPORT_JSONL, 'application/jsonl')
+        # REST orders: filtered by created_at, paged with an offset page_info cursor
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        self.server.requests.append(query)
+        if 'page_info' in query:
+            offset, low, high = query['page_info'].split('|')
+            offset = int(offset)
+        else:
+            offset, low, high = 0, query['created_at_min'], query['created_at_max']
+        matching = [o for o in REST_ORDERS if parse_datetime(low) <= parse_datetime(o['created_at']) <= parse_datetime(high)]
+        limit = int(query['limit'])
+        body = json.dumps({'orders': matching[offset:offset + limit]}).encode()
+        self.send_response(200)
+        if offset + limit < len(matching):
+            cursor = quote(f'{offset + limit}|{low}|{high}')
+            self.send_header('Link', f'<http://127.0.0.1/admin/api/2024-04/orders.json?limit={limit}&page_info={cursor}>; rel="next"')
+        self.send_header('X-Shopify-Shop-Api-Call-Limit', '1/40')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ShopifyStandInTestCase(TestCase):
+    """Runs _ShopifyStandIn on a local port for the duration of each test."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _ShopifyStandIn)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+
+class OrderColumnsTests(TestCase):
+    ORDER = {
+        'id': 9300000001, 'name': '#5001', 'updated_at': '2025-02-01T10:00:00+00:00',
+        'shipping_address': {'name': 'Ravi', 'phone': '+91 98450 12345', 'zip': '411001 ', 'province': 'Maharashtra', 'city': 'Pune'},
+        'fulfillments': [{'tracking_url': 'http://track/R1'}],
+        'line_items': [{'id': 1}, {'id': 2}],
+    }
+
+    def test_partial_payload_keeps_stored_columns(self):
+        self.assertEqual(extract_order_columns({'line_items': []}), {'line_item_count': 0})
+
+        ingest_orders([self.ORDER])
+        ingest_orders([{'id': 9300000001, 'updated_at': '2025-02-02T10:00:00+00:00', 'financial_status': 'refunded'}])
+        order = ShopifyOrder.objects.get(shopify_id=9300000001)
+        self.assertEqual(order.financial_status, 'refunded')
+        self.assertEqual(
+            (order.customer_name, order.phone, order.zip, order.city, order.tracking_url, order.line_item_count),
+            ('Ravi', '9845012345', '411001', 'Pune', 'http://track/R1', 2),
+        )
+        self.assertEqual(len(order.line_items_json), 2)
+
+    def test_backfill_fills_existing_rows_and_their_unified_orders(self):
+        order = ShopifyOrder.objects.create(
+            shopify_id=9300000001, name='#5001', shipping_address_json=self.ORDER['shipping_address'],
+            line_items_json=self.ORDER['line_items'], raw_data=self.ORDER,
+        )
+        self.assertEqual(UnifiedOrder.objects.get(platform=PLATFORM_SHOPIFY, source_id=order.pk).city, '')
+
+        call_command('backfill_shopify_columns', stdout=io.StringIO())
+        order.refresh_from_db()
+        self.assertEqual((order.customer_name, order.city, order.tracking_url, order.line_item_count), ('Ravi', 'Pune', 'http://track/R1', 2))
+        unified = UnifiedOrder.objects.get(platform=PLATFORM_SHOPIFY, source_id=order.pk)
+        self.assertEqual((unified.customer, unified.pincode, unified.city, unified.tracking_url), ('Ravi', '411001', 'Pune', 'http://track/R1'))
+
+
+class GraphQLOrderTests(TestCase):
+    def test_fulfillment_statuses_map_to_rest_values(self):
+        def status(value):
+            node = {'id': 'gid://shopify/Order/1', 'legacyResourceId': '9400000001', 'displayFulfillmentStatus': value}
+            return order_from_graphql(node, [])['fulfillment_status']
+
+        self.assertEqual([status(v) for v in ('ON_HOLD', 'IN_PROGRESS', 'SCHEDULED', 'UNFULFILLED')], [None] * 4)
+        self.assertEqual(
+            [status(v) for v in ('PARTIALLY_FULFILLED', 'FULFILLED', 'RESTOCKED')],
+            ['partial', 'fulfilled', 'restocked'],
+        )
+
+
+class ShopifyBulkBackfillTests(ShopifyStandInTestCase):
+    def test_streams_bulk_export_into_orders(self):
+        domain = f'http://127.0.0.1:{self.server.server_port}'
+        with override_settings(SHOPIFY_STORE_DOMAIN=domain, SHOPIFY_ADMIN_ACCESS_TOKEN='shpat_test', SHOPIFY_API_VERSION='2024-04'):
+            call_command('sync_old_shopify_orders', bulk=True, batch_size=1, stdout=io.StringIO())
+
+        first, second = ShopifyOrder.objects.order_by('shopify_id')
+        self.assertEqual((first.name, first.financial_status, first.fulfillment_status), ('#3001', 'paid', 'unfulfilled'))
+        self.assertEqual(first.line_items_json[0]['price'], '199.50')
+        self.assertEqual((first.line_item_count, first.phone, first.city), (1, '9845012345', 'Bengaluru'))
+        self.assertEqual((second.fulfillment_status, second.tracking_url), ('fulfilled', 'http://track/T1'))
+        self.assertIn('sortKey: ID', self.server.requests[0]['variables']['query'])
+
+    @override_settings(SHOPIFY_RATE_LIMIT_REDIS_URL=None)
+    def test_parallel_slices_follow_page_info_cursors(self):
+        domain = f'http://127.0.0.1:{self.server.server_port}'
+        with override_settings(SHOPIFY_STORE_DOMAIN=domain, SHOPIFY_ADMIN_ACCESS_TOKEN='shpat_test', SHOPIFY_API_VERSION='2024-04'):
+            call_command(
+                'sync_old_shopify_orders', workers=2, slices=3, limit=2,
+                created_at_min='2025-01-01', created_at_max='2025-01-31', stdout=io.StringIO(),
+            )
+
+        self.assertEqual(ShopifyOrder.objects.count(), len(REST_ORDERS))
+        job = SyncJob.objects.get(command='sync_old_shopify_orders')
+        self.assertEqual((job.status, job.cursor, job.processed), (SyncJob.STATUS_COMPLETED, '7', len(REST_ORDERS)))
+        # Cursor pages repeat only limit and page_info
+        followups = [q for q in self.server.requests if 'page_info' in q]
+        self.assertTrue(followups)
+        self.assertTrue(all(set(q) == {'limit', 'page_info'} for q in followups))
+
+
+class ShopifyHistoricalSyncTests(TestCase):
+    def test_api_error_fails_the_job_instead_of_completing_it(self):
+        def fetch(params, raise_errors=False):
+            if params['since_id'] == 0:
+                return REST_ORDERS[:2]
+            raise ConnectionError('timed out')
+
+        command = 'shopify_app.management.commands.sync_old_shopify_orders'
+        with mock.patch(f'{command}.fetch_shopify_orders', side_effect=fetch):
+            call_command('sync_old_shopify_orders', limit=2, stdout=io.StringIO(), stderr=io.StringIO())
+        job = SyncJob.objects.get(command='sync_old_shopify_orders')
+        self.assertEqual((job.status, job.cursor), (SyncJob.STATUS_FAILED, str(REST_ORDERS[1]['id'])))
+
+        # The rerun resumes the same job after the last committed batch
+        with mock.patch(f'{command}.fetch_shopify_orders', return_value=[]) as fetch_again:
+            call_command('sync_old_shopify_orders', limit=2, stdout=io.StringIO())
+        self.assertEqual(fetch_again.call_args.kwargs['params']['since_id'], REST_ORDERS[1]['id'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_COMPLETED)
+        self.assertEqual(ShopifyOrder.objects.count(), 2)
+
+
+WEBHOOK_URL = '/shopify/webhooks/receive-shopify-e5d4f3c2b1/'
+
+
+@override_settings(SHOPIFY_WEBHOOK_SECRET='whsec')
+class ShopifyWebhookTests(ShopifyStandInTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def deliver(self, payload, topic='orders/updated', webhook_id='wh-1'):
+        body = json.dumps(payload).encode()
+        signature = base64.b64encode(hmac.new(b'whsec', body, hashlib.sha256).digest()).decode()
+        return self.client.post(
+            WEBHOOK_URL, body, content_type='application/json',
+            HTTP_X_SHOPIFY_HMAC_SHA256=signature, HTTP_X_SHOPIFY_TOPIC=topic, HTTP_X_SHOPIFY_WEBHOOK_ID=webhook_id,
+        )
+
+    def test_duplicate_order_webhooks_queue_one_refetch(self):
+        order_id = REST_ORDERS[0]['id']
+        with mock.patch.object(process_order_webhook_task, 'delay') as delay:
+            first = self.deliver({'id': order_id})
+            second = self.deliver({'id': order_id})
+        self.assertEqual((first.status_code, second.status_code), (202, 200))
+        self.assertEqual(second.content, b'Webhook already received.')
+        delay.assert_called_once_with(order_id, 'wh-1')
+
+    def test_unqueued_or_ignored_deliveries_do_not_hold_their_id(self):
+        order_id = REST_ORDERS[0]['id']
+        with mock.patch.object(process_order_webhook_task, 'delay', side_effect=ConnectionError('broker down')):
+            self.assertEqual(self.deliver({'id': order_id}).status_code, 500)
+        self.assertEqual(self.deliver({'id': order_id}, topic='products/update', webhook_id='wh-2').status_code, 200)
+
+        with mock.patch.object(process_order_webhook_task, 'delay') as delay:
+            # Shopify's redelivery of the failed webhook, and the ignored ID reused for an order
+            self.assertEqual(self.deliver({'id': order_id}).status_code, 202)
+            self.assertEqual(self.deliver({'id': order_id}, webhook_id='wh-2').status_code, 202)
+        self.assertEqual(delay.call_count, 2)
+
+    @override_settings(SHOPIFY_RATE_LIMIT_REDIS_URL=None)
+    def test_task_saves_order_from_lean_graphql_fetch(self):
+        order = REST_ORDERS[0]
+        domain = f'http://127.0.0.1:{self.server.server_port}'
+        with override_settings(SHOPIFY_STORE_DOMAIN=domain, SHOPIFY_ADMIN_ACCESS_TOKEN='shpat_test', SHOPIFY_API_VERSION='2024-04'):
+            process_order_webhook_task.apply(args=(order['id'], 'wh-1')).get()
+        saved = ShopifyOrder.objects.get()
+        self.assertEqual((saved.name, saved.financial_status), (order['name'], 'paid'))
+        # Fetched through the lean GraphQL selection, not the full REST order
+        self.assertIn('admin_graphql_api_id', saved.raw_data)
+        self.assertIn('lineItems(first: 50)', self.server.requests[-1]['query'])
+
+
+@override_settings(SHOPIFY_RATE_LIMIT_REDIS_URL=None, SHOPIFY_RATE_LIMIT_RESERVE=10)
+class ShopifyRateLimiterTests(TestCase):
+    def test_low_priority_leaves_reserve_for_webhooks(self):
+        self.assertEqual(parse_call_limit('32/40'), (32, 40))
+        self.assertIsNone(parse_call_limit(None))
+
+        limiter = ShopifyRateLimiter()
+        limiter.observe('30/40')
+        self.assertGreater(limiter._try_acquire(reserve=10), 0)
+        self.assertEqual(limiter.acquire(PRIORITY_HIGH), 0)
+
+        limiter.observe(throttled=True)
+        self.assertGreater(limiter._try_acquire(reserve=0), 0)
@@ -1,11 +1,17 @@
 import requests
 import time
 import logging
+import queue
+import threading
+from datetime import timedelta
 import hmac # For webhook verification
 import hashlib # For webhook verification
 import base64 # For webhook verification
 from django.conf import settings
-from urllib.parse import urljoin
+from urllib.parse import parse_qs, urljoin, urlparse
+from orders_app.search import normalize_phone
+
+from .ratelimit import PRIORITY_HIGH, PRIORITY_LOW, rate_limiter
 
 # Use the logger configured for 'shopify_app' in settings.py
 logger = logging.getLogger(__name__)
@@ -17,9 +23,11 @@ def get_shopify_api_base_url():
     if not domain or not api_version:
         logger.error("Shopify domain or API version not configured in settings.")
         raise ValueError("Shopify domain and API version must be set.")
+    # An explicit http:// is kept (local stand-in servers); everything else is https
+    scheme = 'http' if domain.startswith('http://') else 'https'
     # Ensure domain doesn't have https:// prefix already
     domain = domain.replace('https://', '').replace('http://', '')
-    return f"https://{domain}/admin/api/{api_version}/"
+    return f"{scheme}://{domain}/admin/api/{api_version}/"
 
 def get_shopify_api_headers():
     """Returns the necessary headers for Shopify API requests."""
@@ -33,11 +41,17 @@ def get_shopify_api_headers():
         "X-Shopify-Access-Token": token,
     }
 
-def make_shopify_request(method, endpoint, params=None, json_data=None, retries=3, base_delay=1):
+def make_shopify_request(method, endpoint, params=None, json_data=None, retries=3, base_delay=1, priority=PRIORITY_HIGH, with_headers=False):
     """
     Makes a generic request to the Shopify API with enhanced logging,
     error handling, and retries for rate limiting.
+    REST calls first wait for room in the shared rate-limit bucket (see
+    shopify_app.ratelimit); ``priority`` PRIORITY_LOW leaves headroom for
+    webhook-driven fetches. GraphQL has its own cost-based limit.
+    ``with_headers`` returns (json, response headers) on success, e.g. for
+    the Link pagination header.
     """
+    rest_call = not endpoint.lstrip('/').startswith('graphql')
     try:
         base_url = get_shopify_api_base_url()
         headers = get_shopify_api_headers()
@@ -60,6 +74,8 @@ def make_shopify_request(method, endpoint, params=None, json_data=None, retries=
 
     for attempt in range(retries):
         try:
+            if rest_call:
+                rate_limiter.acquire(priority)
             response = requests.request(
                 method.upper(), 
                 url,
@@ -70,6 +86,8 @@ def make_shopify_request(method, endpoint, params=None, json_data=None, retries=
             )
 
             logger.debug(f"Shopify API Response Status: {response.status_code} for {method.upper()} {url}")
+            if rest_call:
+                rate_limiter.observe(response.headers.get('X-Shopify-Shop-Api-Call-Limit'), throttled=response.status_code == 429)
 
             # Check for rate limiting (429 Too Many Requests)
             if response.status_code == 429:
@@ -84,13 +102,13 @@ def make_shopify_request(method, endpoint, params=None, json_data=None, retries=
             # Handle successful requests with no content (e.g., 204 No Content for DELETE)
             if not response.content or response.status_code == 204:
                 logger.info(f"Shopify API request successful ({method.upper()} {url}), response body is empty (Status: {response.status_code}).")
-                return None
+                return (None, response.headers) if with_headers else None
 
             # Try to parse JSON for successful responses with content
             try:
                 response_json = response.json()
                 # logger.debug(f"Response JSON: {response_json}") # Can be very verbose, uncomment if needed
-                return response_json
+                return (response_json, response.headers) if with_headers else response_json
             except requests.exceptions.JSONDecodeError:
                 logger.error(f"Failed to decode JSON response for {method.upper()} {url}. Status: {response.status_code}. Response Text: {response.text[:500]}...")
                 # Treat JSON decode error as a failure for this attempt
@@ -146,10 +164,12 @@ def fetch_shopify_order(order_id):
         logger.error(f"Util: Fetch failed for Shopify order {order_id}.")
         return None
 
-def fetch_shopify_orders(params=None):
+def fetch_shopify_orders(params=None, priority=PRIORITY_LOW, raise_errors=False):
     """
-    Fetches a list of orders from Shopify. Uses basic limit/status filter.
-    NOTE: Consider implementing cursor-based pagination for production use.
+    Fetches a single page of orders from Shopify. Uses basic limit/status filter.
+    Use iter_shopify_order_pages() to follow the pagination cursor.
+    A failed request returns [], which looks like an empty page; pass
+    ``raise_errors`` to get an exception instead.
     """
     # Default parameters if none provided
     if params is None:
@@ -158,7 +178,7 @@ def fetch_shopify_orders(params=None):
     logger.debug(f"Util: Attempting to fetch Shopify orders with params: {params}")
     endpoint = "orders.json"
     try:
-        response_data = make_shopify_request("GET", endpoint, params=params)
+        response_data = make_shopify_request("GET", endpoint, params=params, priority=priority)
         # Check if response is not None and contains the 'orders' key which should be a list
         if response_data and isinstance(response_data, dict) and 'orders' in response_data and isinstance(response_data['orders'], list):
             order_list = response_data['orders']
@@ -166,11 +186,185 @@ def fetch_shopify_orders(params=None):
             return order_list
         else:
             logger.warning(f"Util: No 'orders' key found or invalid response when fetching orders. Params: {params}. Response: {response_data}")
+            if raise_errors:
+                raise ValueError(f"Invalid Shopify orders response (params: {params}).")
             return [] # Return empty list on failure or unexpected format
     except Exception as e:
          logger.error(f"Util: Failed to fetch Shopify orders list.")
+         if raise_errors:
+             raise
          return []
 
+# --- Paginated order fetching ---
+
+# Sliced fetches: time slices per worker (more slices than workers balances
+# uneven order volume), and pages buffered per worker ahead of the consumer
+SLICES_PER_WORKER = 4
+PAGES_AHEAD_PER_WORKER = 2
+
+
+def next_page_info(link_header):
+    """page_info cursor of the rel="next" URL in a Link header, or None on the last page."""
+    for link in requests.utils.parse_header_links(link_header or ''):
+        if link.get('rel') == 'next':
+            return parse_qs(urlparse(link['url']).query).get('page_info', [None])[0]
+    return None
+
+
+def iter_shopify_order_pages(params=None, priority=PRIORITY_LOW):
+    """
+    Yields every page (a list of order dicts) of the orders matching
+    ``params``, following the Link header's page_info cursor. Page requests
+    after the first may only repeat ``limit`` and ``fields``. Raises
+    ValueError when a page cannot be fetched, so callers never mistake a
+    failure for the end of the results.
+    """
+    params = dict({'limit': 250, 'status': 'any'}, **(params or {}))
+    page = 1
+    while True:
+        response = make_shopify_request("GET", "orders.json", params=params, priority=priority, with_headers=True)
+        if not response or not isinstance(response[0], dict) or not isinstance(response[0].get('orders'), list):
+            raise ValueError(f"Shopify orders page {page} could not be fetched (params: {params}).")
+        data, headers = response
+        logger.debug(f"Util: Fetched Shopify orders page {page} ({len(data['orders'])} orders).")
+        if data['orders']:
+            yield data['orders']
+        cursor = next_page_info(headers.get('Link'))
+        if not cursor:
+            return
+        params = {key: params[key] for key in ('limit', 'fields') if key in params}
+        params['page_info'] = cursor
+        page += 1
+
+
+def created_at_slices(start, end, count):
+    """
+    Splits [start, end] into ``count`` contiguous (min, max) datetime ranges
+    on whole seconds. Shopify's created_at_min/max are both inclusive, so
+    each slice ends one second before the next starts.
+    """
+    start, end = start.replace(microsecond=0), end.replace(microsecond=0)
+    step = (end - start) / max(count, 1)
+    starts = sorted({(start + step * n).replace(microsecond=0) for n in range(max(count, 1))})
+    ends = [lower - timedelta(seconds=1) for lower in starts[1:]] + [end]
+    return list(zip(starts, ends))
+
+
+def iter_shopify_order_pages_sliced(created_at_min, created_at_max, workers=4, slices=None, params=None, skip=()):
+    """
+    Fetches the orders created in [created_at_min, created_at_max] with
+    ``workers`` threads, each paging through its own created_at slice (see
+    created_at_slices; ``slices`` defaults to SLICES_PER_WORKER per worker),
+    and yields (slice_index, orders, slice_done) as pages arrive, in no
+    particular order. ``slice_done`` is True on the slice's last yield (with
+    an empty page for an empty slice). Slice indexes in ``skip`` are not
+    fetched, so a resumed sync repeats only unfinished slices. Only HTTP
+    runs in the threads; the caller writes to the database. An error in
+    any worker stops the others and is re-raised here.
+    """
+    bounds = created_at_slices(created_at_min, created_at_max, slices or workers * SLICES_PER_WORKER)
+    todo = queue.Queue()
+    for index in range(len(bounds)):
+        if index not in skip:
+            todo.put(index)
+    pending = todo.qsize()
+    if not pending:
+        return
+    pages = queue.Queue(maxsize=workers * PAGES_AHEAD_PER_WORKER)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def work():
+        while not stop.is_set():
+            try:
+                index = todo.get_nowait()
+            except queue.Empty:
+                return
+            lower, upper = bounds[index]
+            slice_params = dict(params or {}, created_at_min=lower.isoformat(), created_at_max=upper.isoformat())
+            try:
+                previous = []
+                for orders in iter_shopify_order_pages(slice_params):
+                    # Hold one page back so the slice's last page carries slice_done
+                    if previous and not put((index, previous, False)):
+                        return
+                    previous = orders
+                if not put((index, previous, True)):
+                    return
+            except Exception as e:
+                put(e)
+                return
+
+    threads = [threading.Thread(target=work, daemon=True, name=f'shopify-slice-{n}') for n in range(min(workers, pending))]
+    for thread in threads:
+        thread.start()
+    logger.info(f"Util: Fetching {pending} Shopify created_at slices with {len(threads)} workers.")
+    try:
+        while pending:
+            item = pages.get()
+            if isinstance(item, Exception):
+                raise item
+            if item[2]:
+                pending -= 1
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def shopify_graphql(query, variables=None):
+    """
+    Runs an Admin GraphQL query and returns its ``data``. Raises ValueError
+    when the request fails or the response carries top-level errors.
+    """
+    response = make_shopify_request("POST", "graphql.json", json_data={'query': query, 'variables': variables or {}})
+    if not response:
+        raise ValueError("Shopify GraphQL request failed.")
+    if response.get('errors'):
+        raise ValueError(f"Shopify GraphQL errors: {response['errors']}")
+    return response.get('data') or {}
+
+# --- Column Extraction ---
+
+def primary_tracking_url(fulfillments):
+    """Returns the tracking URL of the first fulfillment in a Shopify payload, or ''."""
+    if isinstance(fulfillments, list) and fulfillments and isinstance(fulfillments[0], dict):
+        return fulfillments[0].get('tracking_url') or ''
+    return ''
+
+
+def extract_order_columns(order_data):
+    """
+    Maps a Shopify order payload onto the flattened ShopifyOrder columns.
+    Only keys present in the payload produce values, so a partial payload
+    never blanks columns that were filled by an earlier, complete one.
+    """
+    columns = {}
+    if 'shipping_address' in order_data:
+        shipping = order_data.get('shipping_address') or {}
+        columns.update({
+            'customer_name': (shipping.get('name') or '')[:255],
+            'phone': normalize_phone(shipping.get('phone')),
+            'zip': (shipping.get('zip') or '').strip()[:20],
+            'province': (shipping.get('province') or '')[:100],
+            'city': (shipping.get('city') or '')[:100],
+        })
+    if 'fulfillments' in order_data:
+        columns['tracking_url'] = primary_tracking_url(order_data.get('fulfillments'))[:500]
+    if 'line_items' in order_data:
+        columns['line_item_count'] = len(order_data.get('line_items') or [])
+    return columns
+
+
 # --- Webhook Verification Function ---
 
 def verify_shopify_webhook(request):
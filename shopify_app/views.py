@@ -14,12 +14,11 @@ from django.views.decorators.http import require_POST, require_GET
 from datetime import timedelta
 from django.utils import timezone
 from django.contrib import messages
-from django.utils.dateparse import parse_datetime,parse_date
+from django.utils.dateparse import parse_date
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils import timezone
 from django.views import View 
 from django.utils.decorators import method_decorator 
-from django.db.models import Q
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 from .forms import ShopifyOrderEditForm
@@ -32,72 +31,13 @@ logger = logging.getLogger(__name__)
 # Local Imports (from shopify_app)
 from .models import ShopifyOrder
 # --- Import helper functions from your utils.py ---
-from .utils import verify_shopify_webhook, fetch_shopify_order
-
-# --- Helper Functions ---
-
-def _parse_iso_datetime(datetime_str):
-    """Safely parses ISO 8601 datetime strings from Shopify."""
-    if datetime_str:
-        try:
-            # parse_datetime handles ISO 8601 format including timezone offsets
-            return parse_datetime(datetime_str)
-        except (ValueError, TypeError):
-            logger.warning(f"Could not parse datetime string from Shopify: {datetime_str}")
-    return None
-
-def _process_shopify_order_data(order_data_dict):
-    """
-    Processes Shopify order data (fetched from API) and updates or creates
-    a ShopifyOrder model instance in the Django database.
-    """
-    shopify_id = order_data_dict.get('id')
-    if not shopify_id:
-        logger.warning("Shopify order data is missing the 'id'. Cannot process.")
-        return None
-
-    # Map Shopify API data to your model fields
-    defaults = {
-        'name': order_data_dict.get('name'),
-        'email': order_data_dict.get('email'),
-        'financial_status': order_data_dict.get('financial_status'),
-        'fulfillment_status': order_data_dict.get('fulfillment_status'),
-        'total_price': order_data_dict.get('total_price'),
-        'currency': order_data_dict.get('currency'),
-        # Store complex nested data as JSON
-        'billing_address_json': order_data_dict.get('billing_address'),
-        'shipping_address_json': order_data_dict.get('shipping_address'),
-        'line_items_json': order_data_dict.get('line_items', []),
-        # Parse timestamps
-        'created_at_shopify': _parse_iso_datetime(order_data_dict.get('created_at')),
-        'updated_at_shopify': _parse_iso_datetime(order_data_dict.get('updated_at')),
-        # Store the full raw data for reference/debugging
-        'raw_data': order_data_dict,
-        # Set Django timestamp for modification
-        'django_date_modified': timezone.now(),
-    }
-    # Remove None values from defaults to avoid accidentally clearing existing fields
-    # if the API response didn't include them for some reason.
-    defaults = {k: v for k, v in defaults.items() if v is not None}
-
-    try:
-        # Use update_or_create to handle both new and existing orders
-        order_obj, created = ShopifyOrder.objects.update_or_create(
-            shopify_id=shopify_id, # Match based on Shopify's unique ID
-            defaults=defaults      # Apply the mapped data
-        )
-        status_log = "Created" if created else "Updated"
-        # Set creation timestamp only if newly created
-        # Note: update_or_create doesn't automatically update auto_now_add fields
-        # on creation if using defaults. We set it manually if needed.
-        # The model now uses default=timezone.now for django_date_created.
-
-        logger.info(f"{status_log} ShopifyOrder object for shopify_id={shopify_id}.")
-        return order_obj
-    except Exception as e:
-        # Log database errors specifically
-        logger.exception(f"Database error processing Shopify order ID {shopify_id}: {e}")
-        return None
+from .tasks import claim_webhook, process_order_webhook_task, release_webhook
+from .utils import verify_shopify_webhook
+from orders_app.cache import order_cache_key
+from orders_app.models import PLATFORM_SHOPIFY
+from orders_app.overdue import annotate_overdue, overdue_q
+from orders_app.search import search_source_ids
+from orders_app.summaries import ShopifyOrderRow, SummaryProjection
 
 # --- Shopify Webhook Receiver View ---
 
@@ -108,64 +48,54 @@ def shopify_webhook_receiver(request):
     Handles incoming webhooks from Shopify.
     1. Verifies the HMAC signature using the secret key.
     2. Parses the payload to get the resource ID.
-    3. Fetches the latest resource data (e.g., Order) via the API.
-    4. Processes and saves the fetched data to the local database.
+    3. Acknowledges retries and duplicates of an already queued
+       X-Shopify-Webhook-Id without touching the API or the database.
+    4. Queues a Celery task that refetches the order via the API and saves it.
     """
     # Step 1: Verify Signature (using the function imported from utils.py)
     if not verify_shopify_webhook(request):
         # Verification function already logs the specific failure reason (missing/mismatch)
         return HttpResponseForbidden("Invalid HMAC signature.") # Return 403 Forbidden
 
-    # --- Signature is VALID, proceed ---
-    logger.info("Shopify webhook signature verified successfully.")
     topic = request.headers.get('X-Shopify-Topic', 'unknown/topic')
+    webhook_id = request.headers.get('X-Shopify-Webhook-Id')
 
     # Step 2: Parse Payload and Get Resource ID
     try:
         payload = json.loads(request.body)
-        # Shopify ID is usually top-level 'id' for core resources
-        # May need adjustment for other events (e.g., fulfillments use 'order_id')
-        resource_id = payload.get('id') or payload.get('order_id')
-        logger.info(f"Processing webhook for topic '{topic}', resource ID '{resource_id}'.")
-
-        if not resource_id:
-             logger.warning(f"Webhook payload for topic '{topic}' missing expected resource ID. Acknowledging receipt.")
-             # Return 200 OK because signature was valid, but log we couldn't process fully.
-             return HttpResponse(f"Webhook payload missing resource ID for topic {topic}.", status=200)
-
-        # Step 3: Handle Specific Topics (Example: Orders)
-        # Use startswith for broader matching (e.g., orders/create, orders/updated, etc.)
-        if topic.startswith('orders/'):
-            logger.info(f"Order-related topic detected. Fetching latest data for order ID {resource_id} via API...")
-            # Step 3a: Fetch fresh data via API
-            latest_order_data = fetch_shopify_order(resource_id) # Call API fetch function from utils
-
-            # Step 3b: Process and Save API data
-            if latest_order_data:
-                order_obj = _process_shopify_order_data(latest_order_data)
-                if order_obj:
-                    # Success!
-                    return HttpResponse("Webhook processed: Order data fetched via API and saved.", status=200)
-                else:
-                    # Error during database save (already logged)
-                    return HttpResponse("Server error saving fetched order data.", status=500) # Internal error
-            else:
-                # API fetch failed (already logged by fetch_shopify_order)
-                logger.error(f"API fetch failed for Shopify order {resource_id}. Webhook partially processed.")
-                # Return 500 to encourage Shopify retry if API failure might be temporary
-                return HttpResponse("Webhook received, but failed to fetch full order details via API.", status=500)
-        else:
-            # Handle other topics if needed, or just acknowledge them
-            logger.info(f"Ignoring non-order topic: {topic}")
-            return HttpResponse(f"Webhook received and verified for ignored topic: {topic}", status=200)
-
     except json.JSONDecodeError:
         logger.error("Invalid JSON received in Shopify webhook body.")
         return HttpResponseBadRequest("Invalid JSON payload.")
+    # Shopify ID is usually top-level 'id' for core resources
+    # May need adjustment for other events (e.g., fulfillments use 'order_id')
+    resource_id = payload.get('id') or payload.get('order_id')
+    logger.info(f"Webhook {webhook_id} for topic '{topic}', resource ID '{resource_id}'.")
+
+    if not resource_id:
+        logger.warning(f"Webhook payload for topic '{topic}' missing expected resource ID. Acknowledging receipt.")
+        # Return 200 OK because signature was valid, but log we couldn't process fully.
+        return HttpResponse(f"Webhook payload missing resource ID for topic {topic}.", status=200)
+
+    # Use startswith for broader matching (e.g., orders/create, orders/updated, etc.)
+    if not topic.startswith('orders/'):
+        logger.info(f"Ignoring non-order topic: {topic}")
+        return HttpResponse(f"Webhook received and verified for ignored topic: {topic}", status=200)
+
+    # Step 3: Drop deliveries that were already queued. Claimed only here,
+    # so a rejected or ignored delivery never holds its ID
+    if not claim_webhook(webhook_id):
+        logger.info(f"Duplicate Shopify webhook {webhook_id} ({topic}) acknowledged.")
+        return HttpResponse("Webhook already received.", status=200)
+
+    # Step 4: Queue the API refetch and save
+    try:
+        process_order_webhook_task.delay(resource_id, webhook_id)
     except Exception as e:
-        logger.exception(f"Unexpected error processing Shopify webhook (topic: {topic}): {e}")
-        # Return 500 for unexpected server errors during processing
-        return HttpResponse("Internal server error processing webhook.", status=500)
+        # Nothing was queued: forget the ID and let Shopify deliver it again
+        release_webhook(webhook_id)
+        logger.exception(f"Could not queue Shopify order {resource_id} from webhook {webhook_id}: {e}")
+        return HttpResponse(f"Could not queue order {resource_id} for processing.", status=500)
+    return HttpResponse("Order refetch queued.", status=202)
 
 
 # --- Basic Frontend Views ---
@@ -212,33 +142,29 @@ def shopify_order_list_view(request):
             logger.warning(f"Shopify Invalid days filter value received: {days_filter_str}")
             # Keep days_filter_str for context, but don't mark active_filter=True
     elif not_shipped_filter_str:
-        not_shipped = ['unfulfilled', 'partially_fulfilled', 'scheduled', 'on_hold','null']
-        two_days_ago = timezone.now() - timedelta(days=2)
-        query_filter = Q(fulfillment_status__in=not_shipped) & Q(created_at_shopify__lt=two_days_ago)
-        queryset = queryset.filter(query_filter)
+        queryset = queryset.filter(overdue_q(ShopifyOrder))
         active_filter = True
 
     # --- Apply Search Filter (in addition to date/days filters) ---
     if search_query:
         logger.debug(f"Shopify Applying search filter: '{search_query}'")
-        # Use Q objects for OR query on various fields 
-        # Use icontains for case-insensitive containment search
-        query_filter = (
-            Q(email__icontains=search_query) |
-            Q(name__icontains=search_query) | # 'name' is like #1001
-            Q(financial_status__icontains=search_query) |
-            Q(fulfillment_status__icontains=search_query) |
-            # Assuming billing_address_json is a JSONField and you want to search within it
-            Q(billing_address_json__phone__icontains=search_query) |
-            Q(billing_address_json__city__icontains=search_query) |
-            Q(billing_address_json__zip__icontains=search_query)
-        )
-        queryset = queryset.filter(query_filter)
+        # Indexed lookup in the shared order search tokens (see orders_app.search);
+        # billing phone/city/zip are tokenized at ingest instead of JSON-path scans
+        queryset = queryset.filter(pk__in=search_source_ids(search_query, PLATFORM_SHOPIFY))
         active_filter = True # Search counts as an active filter
-    ordered_queryset = queryset.order_by('-created_at_shopify', '-shopify_id')
+    # Overdue flag computed in SQL; ?sort=overdue lists overdue orders first
+    queryset = annotate_overdue(queryset)
+    ordering = ['-created_at_shopify', '-shopify_id']
+    if request.GET.get('sort') == 'overdue':
+        ordering.insert(0, '-is_overdue_highlight')
+    ordered_queryset = queryset.order_by(*ordering)
 
     # --- Pagination ---
-    paginator = Paginator(ordered_queryset, 15) # Show 15 orders per page
+    # Rows are compact summaries built from the flattened columns, no JSON is loaded
+    paginator = Paginator(SummaryProjection(
+        ordered_queryset, ShopifyOrderRow,
+        cache_key=order_cache_key('shopify_list', [PLATFORM_SHOPIFY], request.GET),
+    ), 15) # Show 15 orders per page
     page_number = request.GET.get('page')
     try:
         orders = paginator.page(page_number)
@@ -248,42 +174,6 @@ def shopify_order_list_view(request):
         # If page is out of range (e.g. 9999), deliver last page of results.
         orders = paginator.page(paginator.num_pages)
 
-    # --- >>> Calculate Overdue Highlight Flag for Shopify <<< ---
-    now = timezone.now()
-    two_days_ago = now - timedelta(days=2)
-    # Define which fulfillment statuses indicate the order needs action
-    actionable_fulfillment_statuses = ['unfulfilled', 'partially_fulfilled', 'scheduled', 'on_hold']
-
-    for order in orders:
-        # Set a default value first 
-        order.is_overdue_highlight = False
-        try:
-            # Check if required fields exist and date is valid before processing
-            if (hasattr(order, 'fulfillment_status') and 
-                hasattr(order, 'created_at_shopify') and
-                order.created_at_shopify):
-
-                # Check Shopify fulfillment status
-                current_status = order.fulfillment_status
-                needs_action_shopify = (
-                    current_status is None or
-                    (isinstance(current_status, str) and
-                     current_status.lower() in actionable_fulfillment_statuses)
-                )
-
-                # Check if it's older than 2 days
-                is_old = order.created_at_shopify < two_days_ago
-
-                # Highlight if status condition and age condition are met
-                if needs_action_shopify and is_old:
-                    order.is_overdue_highlight = True
-
-        except Exception as e:
-            # Log unexpected errors during highlight calculation for a specific order
-            shopify_order_id = getattr(order, 'shopify_id', getattr(order, 'id', 'N/A'))
-            logger.error(f"Error calculating highlight for Shopify Order ID {shopify_order_id}: {e}", exc_info=True)
-            order.is_overdue_highlight = False 
-
     # --- Prepare Context ---
     context = {
         'orders': orders, 
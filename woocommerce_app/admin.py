@@ -1,4 +1,10 @@
 from django.contrib import admin
-from .models import WooCommerceOrder
+from .models import WooCommerceOrder, WooCommerceProduct
 
 admin.site.register(WooCommerceOrder)
+
+@admin.register(WooCommerceProduct)
+class WooCommerceProductAdmin(admin.ModelAdmin):
+    list_display = ('woo_id', 'name', 'sku', 'type', 'parent_id', 'price', 'stock_status', 'weight')
+    list_filter = ('type', 'status', 'stock_status')
+    search_fields = ('name', 'sku', 'woo_id')
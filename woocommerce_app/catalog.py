@@ -0,0 +1,288 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from orders_app.bulk import bulk_upsert
+from orders_app.ingest import IngestResult
+from orders_app.models import SyncCheckpoint
+
+from .ingest import parse_api_datetime
+from .models import WooCommerceProduct
+from .sync import api_time, iter_modified_pages
+from .utils import fetch_product_variations_from_woo, fetch_products_from_woo
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_SOURCE = 'woocommerce.products'
+CATALOG_VERSION_KEY = 'woocommerce:catalog:version'
+# How often a process asks Redis whether the catalog changed
+CATALOG_CHECK_SECONDS = 60
+
+ProductInfo = namedtuple('ProductInfo', 'woo_id parent_id name sku size weight image')
+
+
+# ============================ Field mapping ============================
+
+def _decimal(value):
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return None
+
+
+def _int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _is_size_attribute(attribute):
+    return attribute.get('slug') == 'pa_size' or (attribute.get('name') or '').lower() in ('size', 'pa_size')
+
+
+def attribute_size(attributes):
+    """Size option of a variation, or of a product offered in exactly one size."""
+    for attribute in attributes or []:
+        if not _is_size_attribute(attribute):
+            continue
+        if attribute.get('option'):
+            return attribute['option']
+        options = attribute.get('options') or []
+        if len(options) == 1:
+            return options[0]
+    return None
+
+
+def product_fields(data, parent=None):
+    """
+    Maps a WooCommerce API product, or a variation of ``parent``, to
+    WooCommerceProduct field values.
+    """
+    images = data.get('images')
+    if images is None:
+        # Variations carry a single image
+        images = [data['image']] if data.get('image') else []
+    name = data.get('name')
+    if parent is not None and not name:
+        options = ', '.join(a.get('option', '') for a in data.get('attributes') or [])
+        name = f"{parent.get('name', '')} - {options}" if options else parent.get('name')
+    return {
+        'woo_id': data['id'],
+        'parent_id': parent['id'] if parent is not None else (data.get('parent_id') or None),
+        'name': (name or '')[:255],
+        'slug': data.get('slug') or None,
+        'sku': data.get('sku') or None,
+        'permalink': data.get('permalink') or None,
+        'type': 'variation' if parent is not None else data.get('type'),
+        'status': data.get('status'),
+        'featured': bool(data.get('featured')),
+        'catalog_visibility': data.get('catalog_visibility'),
+        'description': data.get('description'),
+        'short_description': data.get('short_description'),
+        'price': _decimal(data.get('price')),
+        'regular_price': _decimal(data.get('regular_price')),
+        'sale_price': _decimal(data.get('sale_price')),
+        'on_sale': bool(data.get('on_sale')),
+        'total_sales': _int(data.get('total_sales'), 0),
+        'weight': data.get('weight') or None,
+        'dimensions': data.get('dimensions'),
+        'stock_status': data.get('stock_status'),
+        'stock_quantity': _int(data.get('stock_quantity')),
+        'backorders': data.get('backorders'),
+        'low_stock_amount': _int(data.get('low_stock_amount')),
+        'reviews_allowed': data.get('reviews_allowed', True) is not False,
+        'average_rating': _decimal(data.get('average_rating')),
+        'rating_count': _int(data.get('rating_count'), 0),
+        'categories_json': data.get('categories'),
+        'tags_json': data.get('tags'),
+        'images_json': images,
+        'attributes_json': data.get('attributes'),
+        'variations_json': data.get('variations'),
+        'menu_order': _int(data.get('menu_order'), 0),
+        'meta_data_json': data.get('meta_data'),
+        'raw_data': data,
+    }
+
+
+# =============================== Writes ================================
+
+def ingest_products(rows):
+    """Bulk upserts mapped product rows on woo_id. Returns an IngestResult."""
+    result = IngestResult()
+    if not rows:
+        return result
+    started = time.monotonic()
+    rows = list({row['woo_id']: row for row in rows}.values())
+    keys = [row['woo_id'] for row in rows]
+    existing = set(WooCommerceProduct.objects.filter(woo_id__in=keys).values_list('woo_id', flat=True))
+    update_fields = [f for f in rows[0] if f != 'woo_id'] + ['django_date_modified']
+    bulk_upsert(WooCommerceProduct, [WooCommerceProduct(**row) for row in rows], ['woo_id'], update_fields)
+    result.updated = len(existing)
+    result.created = len(rows) - len(existing)
+    result.seconds = time.monotonic() - started
+    transaction.on_commit(bump_catalog_version)
+    return result
+
+
+def _fetch_variations(product):
+    variations, page = [], 1
+    while True:
+        # A failed page raises: a parent is never saved with part of its variations
+        data, total_pages = fetch_product_variations_from_woo(product['id'], params={'per_page': 100, 'page': page}, raise_errors=True)
+        variations.extend(data)
+        if not data or page >= (total_pages or 1):
+            return product, variations
+        page += 1
+
+
+def _page_rows(pool, products):
+    rows = [product_fields(product) for product in products]
+    variable = [product for product in products if product.get('type') == 'variable' or product.get('variations')]
+    for parent, variations in pool.map(_fetch_variations, variable):
+        rows.extend(product_fields(variation, parent=parent) for variation in variations)
+    return rows
+
+
+def sync_products(per_page=100, full=False, since=None, concurrency=4):
+    """
+    Upserts WooCommerce products, with the variations of every variable
+    product, page by page (oldest modification first, see
+    woocommerce_app.sync.iter_modified_pages). Incremental by default: only
+    products modified after the stored checkpoint (minus the
+    WOOCOMMERCE_SYNC_OVERLAP_SECONDS window) are fetched; ``full`` fetches
+    the whole catalog and ``since`` overrides the checkpoint. Variations are
+    fetched by ``concurrency`` threads. A failed request raises before its
+    page is written, leaving the checkpoint at the last complete page.
+    Returns an IngestResult, or None if another run holds the lock.
+    """
+    lock_key = f'sync:lock:{CHECKPOINT_SOURCE}'
+    if not cache.add(lock_key, 1, timeout=getattr(settings, 'WOOCOMMERCE_SYNC_LOCK_SECONDS', 600)):
+        logger.info("WooCommerce product sync already running; skipping this run.")
+        return None
+
+    try:
+        checkpoint, _ = SyncCheckpoint.objects.get_or_create(source=CHECKPOINT_SOURCE)
+        high_water = since or (None if full else checkpoint.high_water)
+        modified_after = None
+        if high_water:
+            modified_after = high_water - timedelta(seconds=getattr(settings, 'WOOCOMMERCE_SYNC_OVERLAP_SECONDS', 60))
+        logger.info(f"WooCommerce product sync: {'products modified after ' + api_time(modified_after) + ' UTC' if modified_after else 'full catalog'}.")
+
+        result = IngestResult()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            pages = iter_modified_pages(fetch_products_from_woo, {'per_page': per_page}, modified_after)
+            for page, products in enumerate(pages, start=1):
+                rows = _page_rows(pool, products)
+                with transaction.atomic():
+                    result.add(ingest_products(rows))
+                    modified = [parse_api_datetime(p.get('date_modified_gmt')) for p in products]
+                    newest = max((m for m in modified if m), default=None)
+                    if newest and (checkpoint.high_water is None or newest > checkpoint.high_water):
+                        checkpoint.high_water = newest
+                    checkpoint.last_count = result.written
+                    checkpoint.save()
+                logger.info(f"Product page {page}: {len(products)} products, {len(rows) - len(products)} variations.")
+
+        checkpoint.last_run_at = timezone.now()
+        checkpoint.save()
+        logger.info(f"WooCommerce product sync finished: {result!r}")
+        return result
+    finally:
+        cache.delete(lock_key)
+
+
+# ============================ Product lookup ===========================
+
+class _Catalog:
+    def __init__(self, version=None, by_id=None, by_sku=None):
+        self.version = version
+        self.by_id = by_id or {}
+        self.by_sku = by_sku or {}
+        self.checked_at = time.monotonic()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def bump_catalog_version():
+    """Makes every process reload its product lookup on its next check."""
+    global _catalog
+    try:
+        if not cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None):
+            cache.incr(CATALOG_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Could not bump WooCommerce catalog version: {e}")
+    _catalog = None
+
+
+def _load_catalog(version):
+    by_id, by_sku = {}, {}
+    rows = WooCommerceProduct.objects.values_list('woo_id', 'parent_id', 'name', 'sku', 'weight', 'attributes_json', 'images_json')
+    for woo_id, parent_id, name, sku, weight, attributes, images in rows.iterator(chunk_size=2000):
+        image = images[0].get('src') if images and isinstance(images[0], dict) else None
+        info = ProductInfo(woo_id, parent_id, name, sku, attribute_size(attributes), weight, image)
+        by_id[woo_id] = info
+    for woo_id, info in by_id.items():
+        parent = by_id.get(info.parent_id)
+        if not info.image and parent and parent.image:
+            # Variations without their own picture show the parent's
+            by_id[woo_id] = info = info._replace(image=parent.image)
+        if info.sku:
+            by_sku[info.sku] = info
+    logger.info(f"Loaded {len(by_id)} WooCommerce products into the lookup cache.")
+    return _Catalog(version, by_id, by_sku)
+
+
+def _current_catalog():
+    global _catalog
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - catalog.checked_at < CATALOG_CHECK_SECONDS:
+        return catalog
+    with _catalog_lock:
+        try:
+            version = cache.get(CATALOG_VERSION_KEY)
+        except Exception:
+            version = catalog.version if catalog else None
+        if _catalog is None or _catalog.version != version:
+            _catalog = _load_catalog(version)
+        else:
+            _catalog.checked_at = time.monotonic()
+        return _catalog
+
+
+def lookup_product(variation_id=None, product_id=None, sku=None):
+    """
+    Resolves a line item's product from the in-process catalog cache: the
+    variation first, then the product, then the SKU. Returns a ProductInfo
+    (woo_id, parent_id, name, sku, size, weight, image) or None.
+    """
+    catalog = _current_catalog()
+    for woo_id in (variation_id, product_id):
+        if woo_id and woo_id in catalog.by_id:
+            return catalog.by_id[woo_id]
+    return catalog.by_sku.get(sku) if sku else None
+
+
+def line_item_pot_size(item, default='N/A'):
+    """Pot size of a WooCommerce line item: catalog size, else the item's own meta data."""
+    product = lookup_product(item.get('variation_id'), item.get('product_id'), item.get('sku'))
+    if product and product.size:
+        return product.size
+    return next(
+        (m.get('value') for m in item.get('meta_data') or []
+         if m.get('key') == 'pa_size' or (m.get('display_key') or '').lower() == 'size'),
+        default,
+    )
@@ -0,0 +1,102 @@
+import logging
+from datetime import timezone as dt_timezone
+
+from dateutil import parser
+from django.utils import timezone
+
+from orders_app.ingest import ingest_orders as ingest_platform_orders
+
+from .models import WooCommerceOrder
+
+logger = logging.getLogger(__name__)
+
+
+def parse_api_datetime(date_string):
+    """
+    Parses a WooCommerce ``*_gmt`` timestamp into an aware UTC datetime.
+    Returns None if parsing fails or input is empty/None.
+    """
+    if not date_string:
+        return None
+    try:
+        dt = parser.parse(date_string)
+    except (ValueError, TypeError, parser.ParserError) as e:
+        logger.warning(f"Could not parse date string '{date_string}': {e}")
+        return None
+    # *_gmt fields carry no offset but are UTC
+    return timezone.make_aware(dt, dt_timezone.utc) if timezone.is_naive(dt) else dt
+
+
+def _api_datetime(order_data, field):
+    # Prefer the UTC variant; older payloads may only carry the site-local one
+    return parse_api_datetime(order_data.get(f'{field}_gmt')) or parse_api_datetime(order_data.get(field))
+
+
+def order_fields(order_data):
+    """
+    Maps one WooCommerce API order (or webhook body) to WooCommerceOrder
+    field values. shipment_status is not in the payload; the local shipping
+    workflow owns it.
+    """
+    billing_info = order_data.get('billing') or {}
+    return {
+        'woo_id': order_data.get('id'),
+        'number': order_data.get('number'),
+        'status': order_data.get('status', 'unknown'),
+        'currency': order_data.get('currency'),
+        'total_amount': order_data.get('total'),
+        'customer_note': order_data.get('customer_note', ''),
+        'billing_first_name': billing_info.get('first_name', ''),
+        'billing_last_name': billing_info.get('last_name', ''),
+        'billing_company': billing_info.get('company', ''),
+        'billing_address_1': billing_info.get('address_1', ''),
+        'billing_address_2': billing_info.get('address_2', ''),
+        'billing_city': billing_info.get('city', ''),
+        'billing_state': billing_info.get('state', ''),
+        'billing_postcode': billing_info.get('postcode', ''),
+        'billing_country': billing_info.get('country', ''),
+        'billing_email': billing_info.get('email'),
+        'billing_phone': billing_info.get('phone', ''),
+        'date_created_woo': _api_datetime(order_data, 'date_created'),
+        'date_modified_woo': _api_datetime(order_data, 'date_modified'),
+        'date_paid_woo': _api_datetime(order_data, 'date_paid'),
+        'date_completed_woo': _api_datetime(order_data, 'date_completed'),
+        'line_items_json': order_data.get('line_items', []),
+        'shipping_lines_json': order_data.get('shipping_lines', []),
+        'raw_data': order_data,
+    }
+
+
+def ingest_orders(orders_data, chunk_size=500):
+    """
+    Upserts WooCommerce API orders in bulk (see orders_app.ingest). Orders
+    without an id are skipped; data older than the stored date_modified_woo
+    is ignored and orders whose payload hash is unchanged are not rewritten.
+    Returns an IngestResult.
+    """
+    rows = []
+    for order_data in orders_data:
+        if not order_data.get('id'):
+            logger.warning("Skipping WooCommerce order data with missing id.")
+            continue
+        rows.append(order_fields(order_data))
+    return ingest_platform_orders(WooCommerceOrder, 'woo_id', rows, guard_field='date_modified_woo', hash_field='payload_hash', chunk_size=chunk_size)
+
+
+def process_order_data(order_data_dict):
+    """
+    Upserts a single order (API response or trusted webhook body) and returns
+    the stored WooCommerceOrder, which is the newer stored one when the data
+    was stale. Returns None if the data has no id or could not be saved.
+    """
+    woo_id = order_data_dict.get('id')
+    if not woo_id:
+        logger.warning("Order data is missing the 'id'. Cannot process.")
+        return None
+    try:
+        result = ingest_orders([order_data_dict])
+        logger.info(f"{'Created' if result.created else 'Updated' if result.updated else 'Unchanged' if result.unchanged else 'Kept newer'} WooCommerceOrder for woo_id={woo_id}.")
+        return WooCommerceOrder.objects.get(woo_id=woo_id)
+    except Exception as e:
+        logger.exception(f"Database error processing order ID {woo_id}: {e}")
+        return None
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from woocommerce_app.catalog import sync_products
+
+
+class Command(BaseCommand):
+    """
+    Fills WooCommerceProduct from the WooCommerce API, variations included.
+    By default only products modified since the last run are fetched; the
+    same sync runs hourly (and in full nightly) from Celery beat.
+    """
+    help = 'Syncs WooCommerce products and variations into the local catalog.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Fetch the whole catalog instead of recent changes.')
+        parser.add_argument('--since', help='Fetch products modified after this ISO datetime (e.g. 2025-01-31T00:00).')
+        parser.add_argument('--per_page', type=int, default=100, help='Products per API call (default: 100).')
+        parser.add_argument('--concurrency', type=int, default=4, help='Parallel variation requests (default: 4).')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since value: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        result = sync_products(
+            per_page=options['per_page'], full=options['full'], since=since, concurrency=options['concurrency'],
+        )
+        if result is None:
+            self.stdout.write(self.style.WARNING("Another product sync is running; nothing done."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced {result.written} products and variations ({result.created} new, {result.updated} updated)."
+        ))
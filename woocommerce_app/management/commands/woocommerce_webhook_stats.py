@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from woocommerce_app.tasks import reset_webhook_metrics, webhook_metrics
+
+
+class Command(BaseCommand):
+    """
+    Shows how many WooCommerce webhook events were received, how many were
+    saved straight from a trusted payload or coalesced into an already
+    scheduled refetch, and how many refetches were processed or failed.
+    """
+    help = 'Prints the WooCommerce webhook ingestion counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them.')
+
+    def handle(self, *args, **options):
+        metrics = webhook_metrics()
+        for name, value in metrics.items():
+            self.stdout.write(f"{name:>10}: {value}")
+        if metrics['received']:
+            saved = (metrics['coalesced'] + metrics['trusted']) / metrics['received']
+            self.stdout.write(self.style.SUCCESS(f"{saved:.0%} of received events needed no API refetch."))
+        if options['reset']:
+            reset_webhook_metrics()
+            self.stdout.write("Counters reset.")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('woocommerce_app', '0006_woocommerceorder_unselected_items_for_clone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woocommerceorder',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 of the mapped WooCommerce payload last written; unchanged payloads are not rewritten', max_length=64),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone 
 
 
@@ -56,6 +56,10 @@ class WooCommerceOrder(models.Model):
     line_items_json = models.JSONField(blank=True, null=True, help_text="Raw JSON data for line items")
     shipping_lines_json = models.JSONField(blank=True, null=True, help_text="Raw JSON data for shipping lines")
     raw_data = models.JSONField(blank=True, null=True, help_text="Full webhook payload or API response")
+    payload_hash = models.CharField(
+        max_length=64, blank=True, default='', editable=False,
+        help_text="SHA-256 of the mapped WooCommerce payload last written; unchanged payloads are not rewritten"
+    )
 
     # Clone orders save here
     clone_orders = models.JSONField(default=list, blank=True, 
@@ -73,6 +77,13 @@ class WooCommerceOrder(models.Model):
     django_date_created = models.DateTimeField(auto_now_add=True)
     django_date_modified = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        # A local edit may touch synced fields; the next payload is written in full
+        self.payload_hash = ''
+        # The post_save handlers (dashboard counters, UnifiedOrder) commit with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"WooCommerce Order #{self.number or self.woo_id} ({self.status})"
 
@@ -0,0 +1,133 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from .catalog import sync_products
+from .ingest import process_order_data
+from .sync import sync_modified_orders
+from .utils import fetch_order_from_woo, is_complete_order_payload
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_METRICS = ('received', 'trusted', 'coalesced', 'processed', 'failed')
+
+
+def _pending_key(woo_id):
+    return f'woocommerce:webhook:pending:{woo_id}'
+
+
+def _metric_key(name):
+    return f'woocommerce:webhook:metrics:{name}'
+
+
+def _count(name):
+    key = _metric_key(name)
+    try:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Could not record WooCommerce webhook metric '{name}': {e}")
+
+
+def webhook_metrics():
+    """Event counters since they were last reset (see WEBHOOK_METRICS)."""
+    values = cache.get_many([_metric_key(name) for name in WEBHOOK_METRICS])
+    return {name: values.get(_metric_key(name), 0) for name in WEBHOOK_METRICS}
+
+
+def reset_webhook_metrics():
+    cache.delete_many([_metric_key(name) for name in WEBHOOK_METRICS])
+
+
+def apply_trusted_payload(payload):
+    """
+    Saves a signature-verified webhook body directly, without the API
+    refetch. Returns the saved (or newer, already stored) order, or None
+    when the payload is incomplete and has to be refetched instead.
+    """
+    if not is_complete_order_payload(payload):
+        return None
+    order_obj = process_order_data(payload)
+    if order_obj:
+        _count('received')
+        _count('trusted')
+    return order_obj
+
+
+def enqueue_order_refresh(woo_id):
+    """
+    Schedules one API refetch of order ``woo_id`` after the coalescing window.
+    Events for an order that is already scheduled are dropped (counted as
+    coalesced), so a burst of ``order.updated`` webhooks costs one fetch.
+    Returns True when a new refetch was scheduled.
+    """
+    window = getattr(settings, 'WOOCOMMERCE_WEBHOOK_COALESCE_SECONDS', 10)
+    _count('received')
+    try:
+        # Marker outlives the countdown so a delayed worker still sees it
+        scheduled = cache.add(_pending_key(woo_id), 1, timeout=window + 300)
+    except Exception as e:
+        logger.warning(f"Webhook coalescing unavailable for order {woo_id}, scheduling directly: {e}")
+        scheduled = True
+
+    if not scheduled:
+        _count('coalesced')
+        logger.info(f"WooCommerce order {woo_id} refetch already scheduled; event coalesced.")
+        return False
+
+    try:
+        process_order_webhook_task.apply_async((woo_id,), countdown=window)
+    except Exception:
+        # Let the next webhook for this order schedule again
+        cache.delete(_pending_key(woo_id))
+        raise
+    return True
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_order_webhook_task(self, woo_id):
+    """Refetches order ``woo_id`` from the WooCommerce API and upserts it."""
+    # Cleared before fetching: events arriving from here on need a new fetch
+    cache.delete(_pending_key(woo_id))
+
+    order_data = fetch_order_from_woo(woo_id)
+    if not order_data:
+        _count('failed')
+        logger.error(f"Task {self.request.id}: API fetch for WooCommerce order {woo_id} failed; retrying.")
+        raise self.retry()
+
+    order_obj = process_order_data(order_data)
+    if not order_obj:
+        _count('failed')
+        logger.error(f"Task {self.request.id}: Could not save WooCommerce order {woo_id}; retrying.")
+        raise self.retry()
+
+    _count('processed')
+    logger.info(f"Task {self.request.id}: WooCommerce order {woo_id} refreshed from webhook.")
+    return order_obj.pk
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=120)
+def sync_modified_woo_orders_task(self, per_page=100):
+    """
+    Periodic catch-up: upserts every order modified since the stored
+    checkpoint, healing any webhook that never arrived.
+    """
+    try:
+        return sync_modified_orders(per_page=per_page)
+    except Exception as exc:
+        logger.error(f"Task {self.request.id}: Incremental WooCommerce sync failed: {exc}", exc_info=True)
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def sync_woo_products_task(self, full=False):
+    """Refreshes the local product catalog (recent changes, or everything with ``full``)."""
+    try:
+        result = sync_products(full=full)
+        return result.written if result else None
+    except Exception as exc:
+        logger.error(f"Task {self.request.id}: WooCommerce product sync failed: {exc}", exc_info=True)
+        raise self.retry(exc=exc)
@@ -0,0 +1,257 @@
+import base64
+import hashlib
+import hmac
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from woocommerce import API
+
+from orders_app.models import SyncCheckpoint, SyncJob
+from . import utils
+from .catalog import (
+    CHECKPOINT_SOURCE as CATALOG_CHECKPOINT_SOURCE, ingest_products, line_item_pot_size, lookup_product,
+    product_fields, sync_products,
+)
+from .ingest import ingest_orders
+from .models import WooCommerceOrder, WooCommerceProduct
+from .sync import CHECKPOINT_SOURCE, sync_modified_orders
+from .tasks import _pending_key, apply_trusted_payload, process_order_webhook_task, reset_webhook_metrics, webhook_metrics
+from .utils import WooCommerceClient, get_woocommerce_api_client
+
+SYNC_COMMAND = 'woocommerce_app.management.commands.sync_old_wc_orders'
+
+
+def woo_order(woo_id, status='processing', modified='2025-01-02T10:00:00', **extra):
+    return dict(
+        {'id': woo_id, 'number': str(woo_id), 'status': status, 'date_created_gmt': '2025-01-01T10:00:00', 'date_modified_gmt': modified},
+        **extra,
+    )
+
+
+class ProductCatalogTests(TestCase):
+    def test_resolves_variation_size_without_order_meta(self):
+        parent = {'id': 50, 'name': 'Areca Palm', 'type': 'variable', 'sku': 'ARECA', 'images': [{'src': 'http://img/palm.jpg'}]}
+        variation = {'id': 51, 'sku': 'ARECA-6', 'price': '349', 'weight': '1.5', 'attributes': [{'name': 'Size', 'option': '6 inch'}]}
+        with self.captureOnCommitCallbacks(execute=True):
+            result = ingest_products([product_fields(parent), product_fields(variation, parent=parent)])
+        self.assertEqual(result.created, 2)
+
+        product = lookup_product(variation_id=51, product_id=50)
+        self.assertEqual((product.name, product.size, product.weight, product.parent_id), ('Areca Palm - 6 inch', '6 inch', '1.5', 50))
+        self.assertEqual(lookup_product(sku='ARECA').image, 'http://img/palm.jpg')
+        self.assertEqual(line_item_pot_size({'product_id': 50, 'variation_id': 51, 'meta_data': []}), '6 inch')
+        self.assertEqual(line_item_pot_size({'product_id': 99, 'meta_data': [{'key': 'pa_size', 'value': '4 inch'}]}), '4 inch')
+
+    def test_failed_variation_fetch_leaves_the_page_unsaved(self):
+        cache.clear()
+        products = [
+            {'id': 60, 'name': 'Jade', 'type': 'simple', 'date_modified_gmt': '2025-03-01T10:00:00'},
+            {'id': 61, 'name': 'Areca Palm', 'type': 'variable', 'variations': [62], 'date_modified_gmt': '2025-03-01T11:00:00'},
+        ]
+        variation = {'id': 62, 'sku': 'ARECA-6', 'attributes': [{'name': 'Size', 'option': '6 inch'}]}
+        with mock.patch('woocommerce_app.catalog.fetch_products_from_woo', return_value=(products, 1, 2)), \
+                mock.patch('woocommerce_app.catalog.fetch_product_variations_from_woo', side_effect=ConnectionError('timed out')):
+            with self.assertRaises(ConnectionError):
+                sync_products(full=True)
+        checkpoint = SyncCheckpoint.objects.get(source=CATALOG_CHECKPOINT_SOURCE)
+        self.assertEqual((checkpoint.high_water, checkpoint.last_run_at), (None, None))
+        self.assertFalse(WooCommerceProduct.objects.exists())
+
+        with mock.patch('woocommerce_app.catalog.fetch_products_from_woo', return_value=(products, 1, 2)), \
+                mock.patch('woocommerce_app.catalog.fetch_product_variations_from_woo', return_value=([variation], 1)):
+            self.assertEqual(sync_products(full=True).created, 3)
+        self.assertEqual(WooCommerceProduct.objects.get(woo_id=62).parent_id, 61)
+
+
+class HistoricalSyncTests(TestCase):
+    PAGES = {1: [woo_order(1), woo_order(2)], 2: [woo_order(3), woo_order(4)], 3: [woo_order(5)]}
+
+    def fetch(self, params, raise_errors=False):
+        return self.PAGES.get(params['page'], []), len(self.PAGES), 5
+
+    def test_failed_page_keeps_cursor_at_last_committed_page(self):
+        def fail_on_page_two(orders):
+            if orders[0]['id'] == 3:
+                raise ValueError('deadlock')
+            return ingest_orders(orders)
+
+        with mock.patch(f'{SYNC_COMMAND}.fetch_orders_from_woo', side_effect=self.fetch), \
+                mock.patch(f'{SYNC_COMMAND}.ingest_orders', side_effect=fail_on_page_two):
+            call_command('sync_old_wc_orders', per_page=2, stdout=io.StringIO(), stderr=io.StringIO())
+        job = SyncJob.objects.get(command='sync_old_wc_orders')
+        self.assertEqual((job.status, job.cursor, job.error_count), (SyncJob.STATUS_FAILED, '1', 2))
+        self.assertEqual(WooCommerceOrder.objects.count(), 2)
+
+        # The rerun resumes at the failed page
+        with mock.patch(f'{SYNC_COMMAND}.fetch_orders_from_woo', side_effect=self.fetch):
+            call_command('sync_old_wc_orders', per_page=2, stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.cursor), (SyncJob.STATUS_COMPLETED, '3'))
+        self.assertEqual(WooCommerceOrder.objects.count(), 5)
+
+    def test_api_error_fails_the_job_instead_of_completing_it(self):
+        def fetch(params, raise_errors=False):
+            if params['page'] == 2:
+                raise ConnectionError('timed out')
+            return self.fetch(params)
+
+        with mock.patch(f'{SYNC_COMMAND}.fetch_orders_from_woo', side_effect=fetch):
+            call_command('sync_old_wc_orders', per_page=2, concurrency=2, stdout=io.StringIO(), stderr=io.StringIO())
+        job = SyncJob.objects.get(command='sync_old_wc_orders')
+        self.assertEqual((job.status, job.cursor), (SyncJob.STATUS_FAILED, '1'))
+        self.assertEqual(WooCommerceOrder.objects.count(), 2)
+
+
+@override_settings(WOOCOMMERCE_SYNC_OVERLAP_SECONDS=60)
+class IncrementalSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.requests = []
+
+    def serve(self, store, fail_on=None, on_fetch=None):
+        """Answers like the orders endpoint: modified after a time, oldest first, by page."""
+        def fetch(params, raise_errors=False):
+            self.requests.append(params)
+            if len(self.requests) == fail_on:
+                raise ConnectionError('timed out')
+            after = params.get('modified_after')
+            matching = sorted(
+                (o for o in store if not after or o['date_modified_gmt'] > after),
+                key=lambda o: (o['date_modified_gmt'], o['id']),
+            )
+            start = (params['page'] - 1) * params['per_page']
+            page = [dict(o) for o in matching[start:start + params['per_page']]]
+            if on_fetch:
+                on_fetch(len(self.requests))
+            return page, -(-len(matching) // params['per_page']), len(matching)
+        return mock.patch('woocommerce_app.sync.fetch_orders_from_woo', side_effect=fetch)
+
+    def test_checkpoint_advances_and_next_run_rereads_the_overlap(self):
+        with self.serve([woo_order(1, modified='2025-03-01T10:00:00'), woo_order(2, modified='2025-03-01T12:00:00')]):
+            self.assertEqual(sync_modified_orders(per_page=2, since=datetime(2025, 3, 1, tzinfo=dt_timezone.utc)), 2)
+        checkpoint = SyncCheckpoint.objects.get(source=CHECKPOINT_SOURCE)
+        self.assertEqual(checkpoint.high_water, datetime(2025, 3, 1, 12, 0, tzinfo=dt_timezone.utc))
+        self.assertIsNotNone(checkpoint.last_run_at)
+
+        with self.serve([]):
+            sync_modified_orders(per_page=2)
+        self.assertEqual(self.requests[-1]['modified_after'], '2025-03-01T11:59:00')
+
+    def test_order_modified_during_the_run_does_not_hide_another(self):
+        store = [woo_order(n, modified=f'2025-03-01T1{n}:00:00') for n in range(1, 6)]
+
+        def edit_first_order(request_count):
+            if request_count == 1:
+                store[0]['date_modified_gmt'] = '2025-03-01T18:00:00'
+                store[0]['status'] = 'completed'
+
+        with self.serve(store, on_fetch=edit_first_order):
+            sync_modified_orders(per_page=2, since=datetime(2025, 3, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(WooCommerceOrder.objects.count(), 5)
+        self.assertEqual(WooCommerceOrder.objects.get(woo_id=1).status, 'completed')
+        self.assertTrue(all(request['page'] == 1 for request in self.requests))
+
+    def test_failed_fetch_raises_and_leaves_the_run_unfinished(self):
+        store = [woo_order(n, modified=f'2025-03-01T1{n}:00:00') for n in range(1, 4)]
+        with self.serve(store, fail_on=2):
+            with self.assertRaises(ConnectionError):
+                sync_modified_orders(per_page=2, since=datetime(2025, 3, 1, tzinfo=dt_timezone.utc))
+        checkpoint = SyncCheckpoint.objects.get(source=CHECKPOINT_SOURCE)
+        # The committed page moved the mark; the run itself is not stamped as done
+        self.assertEqual((checkpoint.high_water.hour, checkpoint.last_run_at), (12, None))
+        # The lock is released for the retry
+        with self.serve(store):
+            self.assertEqual(sync_modified_orders(per_page=2), 1)
+
+    def test_skips_while_another_run_holds_the_lock(self):
+        cache.add(f'sync:lock:{CHECKPOINT_SOURCE}', 1)
+        with self.serve([woo_order(1)]):
+            self.assertIsNone(sync_modified_orders())
+        self.assertEqual(self.requests, [])
+
+
+WEBHOOK_URL = '/woocommerce/webhooks/orders/receive-9a8b7c6d5e/'
+
+
+@override_settings(WOOCOMMERCE_WEBHOOK_SECRET='whsec', WOOCOMMERCE_WEBHOOK_COALESCE_SECONDS=10)
+class OrderWebhookTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_webhook_metrics()
+
+    def deliver(self, payload, topic='order.updated'):
+        body = json.dumps(payload).encode()
+        signature = base64.b64encode(hmac.new(b'whsec', body, hashlib.sha256).digest()).decode()
+        return self.client.post(
+            WEBHOOK_URL, body, content_type='application/json',
+            HTTP_X_WC_WEBHOOK_SIGNATURE=signature, HTTP_X_WC_WEBHOOK_TOPIC=topic,
+        )
+
+    @override_settings(WOOCOMMERCE_WEBHOOK_TRUST_PAYLOAD=False)
+    def test_duplicate_webhooks_schedule_one_refetch(self):
+        with mock.patch.object(process_order_webhook_task, 'apply_async') as apply_async:
+            first, second = self.deliver({'id': 77}), self.deliver({'id': 77})
+            self.assertEqual((first.status_code, first.content), (202, b'Order refetch queued.'))
+            self.assertEqual((second.status_code, second.content), (202, b'Order refetch already queued.'))
+            apply_async.assert_called_once_with((77,), countdown=10)
+            self.assertEqual(cache.get(_pending_key(77)), 1)
+
+            # The refetch clears the marker, so the next event schedules again
+            with mock.patch('woocommerce_app.tasks.fetch_order_from_woo', return_value=woo_order(77)):
+                process_order_webhook_task.apply(args=(77,))
+            self.assertIsNone(cache.get(_pending_key(77)))
+            self.assertEqual(WooCommerceOrder.objects.get(woo_id=77).status, 'processing')
+            self.assertEqual(self.deliver({'id': 77}).content, b'Order refetch queued.')
+            self.assertEqual(apply_async.call_count, 2)
+
+        metrics = webhook_metrics()
+        self.assertEqual((metrics['received'], metrics['coalesced'], metrics['processed']), (3, 1, 1))
+
+    @override_settings(WOOCOMMERCE_WEBHOOK_TRUST_PAYLOAD=True)
+    def test_trusted_payload_is_saved_without_refetch(self):
+        complete = dict(woo_order(88), currency='INR', total='450.00', billing={}, line_items=[], shipping_lines=[])
+        with mock.patch.object(process_order_webhook_task, 'apply_async') as apply_async:
+            response = self.deliver(complete)
+            self.assertEqual((response.status_code, response.content), (200, b'Webhook processed from payload.'))
+            self.assertEqual(WooCommerceOrder.objects.get(woo_id=88).status, 'processing')
+            apply_async.assert_not_called()
+
+            # Missing fields: fall back to the API refetch
+            response = self.deliver({'id': 89, 'status': 'completed'})
+            self.assertEqual(response.status_code, 202)
+            apply_async.assert_called_once_with((89,), countdown=10)
+            self.assertFalse(WooCommerceOrder.objects.filter(woo_id=89).exists())
+
+        # An older body never overwrites the stored order
+        stale = dict(complete, status='pending', date_modified_gmt='2025-01-01T12:00:00')
+        self.assertEqual(apply_trusted_payload(stale).status, 'processing')
+        self.assertEqual(webhook_metrics()['trusted'], 2)
+
+
+@override_settings(WOOCOMMERCE_CONSUMER_KEY='ck_test', WOOCOMMERCE_CONSUMER_SECRET='cs_test')
+class ApiClientTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(utils, _client=None, _client_pid=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(WOOCOMMERCE_STORE_URL='https://shop.example/')
+    def test_client_is_reused_until_the_process_forks(self):
+        client = get_woocommerce_api_client()
+        self.assertIsInstance(client, WooCommerceClient)
+        self.assertEqual(client.base_url, 'https://shop.example/wp-json/wc/v3/')
+        self.assertIs(get_woocommerce_api_client(), client)
+
+        utils._client_pid = -1  # As seen from a forked worker
+        rebuilt = get_woocommerce_api_client()
+        self.assertIsNot(rebuilt, client)
+        self.assertIs(get_woocommerce_api_client(), rebuilt)
+
+    @override_settings(WOOCOMMERCE_STORE_URL='http://shop.example')
+    def test_plain_http_store_uses_the_library_client(self):
+        self.assertIsInstance(get_woocommerce_api_client(), API)
@@ -1,11 +1,82 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 from woocommerce import API
 from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__) # Use the logger configured in settings.py
 
+class WooCommerceClient:
+    """
+    WooCommerce REST client over one pooled keep-alive ``requests.Session``.
+    Same call style as ``woocommerce.API`` (``get(endpoint, params=...)``),
+    with retries and exponential backoff on 429/5xx for idempotent methods
+    and the latency of every call logged.
+    """
+
+    def __init__(self, url, consumer_key, consumer_secret, version="wc/v3", timeout=20,
+                 pool_size=10, max_retries=3, backoff_factor=0.5):
+        self.base_url = f"{url.rstrip('/')}/wp-json/{version}/"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(consumer_key, consumer_secret)
+        self.session.headers.update({"accept": "application/json"})
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Hand the last response back so raise_for_status() reports it
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, endpoint, data=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, self.base_url + endpoint.lstrip('/'), json=data, **kwargs)
+        except Exception as e:
+            logger.warning(f"WooCommerce {method} {endpoint} failed after {(time.monotonic() - started) * 1000:.0f} ms: {e}")
+            raise
+        logger.info(f"WooCommerce {method} {endpoint} -> {response.status_code} in {(time.monotonic() - started) * 1000:.0f} ms")
+        return response
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, data, **kwargs):
+        return self.request("POST", endpoint, data, **kwargs)
+
+    def put(self, endpoint, data, **kwargs):
+        return self.request("PUT", endpoint, data, **kwargs)
+
+    def delete(self, endpoint, **kwargs):
+        return self.request("DELETE", endpoint, **kwargs)
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
 def get_woocommerce_api_client():
-    """Initializes and returns a WooCommerce API client instance."""
+    """
+    Returns the process-wide WooCommerce API client, creating it on first use.
+    Rebuilt after a fork (Celery prefork workers) so processes never share
+    pooled sockets.
+    """
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
     required_settings = [
         settings.WOOCOMMERCE_STORE_URL,
         settings.WOOCOMMERCE_CONSUMER_KEY,
@@ -15,19 +86,36 @@ def get_woocommerce_api_client():
         logger.error("WooCommerce API settings (URL, Key, Secret) are not fully configured in Django settings.")
         raise ValueError("WooCommerce API settings missing in Django settings.")
 
-    try:
-        wcapi = API(
-            url=settings.WOOCOMMERCE_STORE_URL,
-            consumer_key=settings.WOOCOMMERCE_CONSUMER_KEY,
-            consumer_secret=settings.WOOCOMMERCE_CONSUMER_SECRET,
-            wp_api=True, # Usually required
-            version="wc/v3", # Check WooCommerce REST API docs for the latest stable version
-            timeout=20 # Increase timeout if needed
-        )
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            return _client
+        try:
+            if settings.WOOCOMMERCE_STORE_URL.startswith("https://"):
+                wcapi = WooCommerceClient(
+                    url=settings.WOOCOMMERCE_STORE_URL,
+                    consumer_key=settings.WOOCOMMERCE_CONSUMER_KEY,
+                    consumer_secret=settings.WOOCOMMERCE_CONSUMER_SECRET,
+                    timeout=getattr(settings, 'WOOCOMMERCE_API_TIMEOUT', 20),
+                    pool_size=getattr(settings, 'WOOCOMMERCE_API_POOL_SIZE', 10),
+                    max_retries=getattr(settings, 'WOOCOMMERCE_API_MAX_RETRIES', 3),
+                    backoff_factor=getattr(settings, 'WOOCOMMERCE_API_BACKOFF', 0.5),
+                )
+            else:
+                # Plain-HTTP stores need the library's OAuth1 signing (no pooling)
+                logger.warning("WooCommerce store URL is not HTTPS; using the unpooled woocommerce.API client.")
+                wcapi = API(
+                    url=settings.WOOCOMMERCE_STORE_URL,
+                    consumer_key=settings.WOOCOMMERCE_CONSUMER_KEY,
+                    consumer_secret=settings.WOOCOMMERCE_CONSUMER_SECRET,
+                    wp_api=True, # Usually required
+                    version="wc/v3", # Check WooCommerce REST API docs for the latest stable version
+                    timeout=getattr(settings, 'WOOCOMMERCE_API_TIMEOUT', 20)
+                )
+        except Exception as e:
+            logger.exception(f"Failed to initialize WooCommerce API client: {e}")
+            raise # Re-raise the exception to be handled upstream
+        _client, _client_pid = wcapi, os.getpid()
         return wcapi
-    except Exception as e:
-        logger.exception(f"Failed to initialize WooCommerce API client: {e}")
-        raise # Re-raise the exception to be handled upstream
 
 def fetch_order_from_woo(order_id):
     """Fetches specific order details from the WooCommerce API."""
@@ -45,10 +133,12 @@ def fetch_order_from_woo(order_id):
         return None # Return None to indicate failure
 
 # fetch_orders_from_woo function (for the management command) can remain the same as before
-def fetch_orders_from_woo(params=None):
+def fetch_orders_from_woo(params=None, raise_errors=False):
     """
     Fetches orders from the WooCommerce API, potentially with pagination.
     Returns a tuple: (list_of_orders, total_pages, total_orders)
+    A failed request returns ([], 0, 0), which looks like an empty page;
+    pass ``raise_errors`` to get the exception instead.
     """
     if params is None:
         params = {'per_page': 10, 'orderby': 'date', 'order': 'desc'}
@@ -65,13 +155,16 @@ def fetch_orders_from_woo(params=None):
         return orders_data, total_pages, total_orders
     except Exception as e:
         logger.error(f"Failed to fetch orders from WooCommerce API with params {params}: {e}", exc_info=True)
+        if raise_errors:
+            raise
         return [], 0, 0
     
 # Fetch product from woocommrec
-def fetch_products_from_woo(params=None):
+def fetch_products_from_woo(params=None, raise_errors=False):
     """
     Fetches products from the WooCommerce API, potentially with pagination.
     Returns a tuple: (list_of_products, total_pages, total_products)
+    A failed request returns ([], 0, 0) unless ``raise_errors`` is set.
     """
     if params is None:
         params = {'per_page': 10}  # You can adjust default parameters as needed.
@@ -89,4 +182,36 @@ def fetch_products_from_woo(params=None):
         return products_data, total_pages, total_products
     except Exception as e:
         logger.error(f"Failed to fetch products from WooCommerce API with params {params}: {e}", exc_info=True)
+        if raise_errors:
+            raise
         return [], 0, 0
+
+
+def fetch_product_variations_from_woo(product_id, params=None, raise_errors=False):
+    """
+    Fetches one page of a variable product's variations.
+    Returns a tuple: (list_of_variations, total_pages), ([], 0) on error
+    unless ``raise_errors`` is set.
+    """
+    params = params or {'per_page': 100}
+    try:
+        wcapi = get_woocommerce_api_client()
+        response = wcapi.get(f"products/{product_id}/variations", params=params)
+        response.raise_for_status()
+        return response.json(), int(response.headers.get('X-WP-TotalPages', 0))
+    except Exception as e:
+        logger.error(f"Failed to fetch variations of WooCommerce product {product_id} with params {params}: {e}", exc_info=True)
+        if raise_errors:
+            raise
+        return [], 0
+
+# Top-level keys a webhook body needs before it can stand in for an API fetch
+COMPLETE_ORDER_FIELDS = (
+    'id', 'number', 'status', 'currency', 'total', 'billing', 'line_items',
+    'shipping_lines', 'date_created_gmt', 'date_modified_gmt',
+)
+
+
+def is_complete_order_payload(payload):
+    """True when ``payload`` carries every field process_order_data maps."""
+    return isinstance(payload, dict) and all(field in payload for field in COMPLETE_ORDER_FIELDS)
@@ -9,20 +9,24 @@ from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbid
 from django.shortcuts import render,redirect, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST, require_GET
-from django.utils.dateparse import parse_datetime,parse_date
+from django.utils.dateparse import parse_date
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.template.loader import render_to_string # To potentially render form errors for AJAX
 from django.contrib.auth.decorators import login_required # Optional: Secure the view
 from .forms import OrderEditForm # Import the new form
 from datetime import timedelta
 from django.utils import timezone
-from django.db.models import Q
 from django.contrib.auth.decorators import login_required
 
 
 # Import the model and the API utility function
 from .models import WooCommerceOrder
-from .utils import fetch_order_from_woo # <-- Import the API fetch function
+from .tasks import apply_trusted_payload, enqueue_order_refresh
+from orders_app.cache import order_cache_key
+from orders_app.models import PLATFORM_WOOCOMMERCE
+from orders_app.overdue import annotate_overdue, overdue_q
+from orders_app.search import search_source_ids
+from orders_app.summaries import SummaryProjection, WooOrderRow
 
 logger = logging.getLogger(__name__)
 
@@ -53,67 +57,6 @@ def _verify_webhook_signature(request):
         logger.error(f"Error during webhook signature verification: {e}", exc_info=True)
         return False
 
-def _parse_webhook_datetime(datetime_str):
-    """Safely parses ISO 8601 datetime strings. (Same as before)"""
-    if datetime_str:
-        try:
-            return parse_datetime(datetime_str)
-        except ValueError:
-            logger.warning(f"Could not parse datetime string: {datetime_str}")
-    return None
-
-def _process_order_data(order_data_dict):
-    """
-    Processes order data (received from API or webhook payload)
-    and updates or creates a WooCommerceOrder model instance.
-    (Slightly adapted to ensure it works with API response structure)
-    """
-    woo_id = order_data_dict.get('id')
-    if not woo_id:
-        logger.warning("Order data is missing the 'id'. Cannot process.")
-        return None
-
-    # Map payload data to your model fields
-    billing_info = order_data_dict.get('billing', {})
-    defaults = {
-        'number': order_data_dict.get('number'),
-        'status': order_data_dict.get('status'),
-        'currency': order_data_dict.get('currency'),
-        'total_amount': order_data_dict.get('total'),
-        'customer_note': order_data_dict.get('customer_note'),
-        'billing_first_name': billing_info.get('first_name'),
-        'billing_last_name': billing_info.get('last_name'),
-        'billing_company': billing_info.get('company'),
-        'billing_address_1': billing_info.get('address_1'),
-        'billing_address_2': billing_info.get('address_2'),
-        'billing_city': billing_info.get('city'),
-        'billing_state': billing_info.get('state'),
-        'billing_postcode': billing_info.get('postcode'),
-        'billing_country': billing_info.get('country'),
-        'billing_email': billing_info.get('email'),
-        'billing_phone': billing_info.get('phone'),
-        # Use '_gmt' fields if available and prefer UTC, otherwise fallback
-        'date_created_woo': _parse_webhook_datetime(order_data_dict.get('date_created_gmt') or order_data_dict.get('date_created')),
-        'date_modified_woo': _parse_webhook_datetime(order_data_dict.get('date_modified_gmt') or order_data_dict.get('date_modified')),
-        'date_paid_woo': _parse_webhook_datetime(order_data_dict.get('date_paid_gmt') or order_data_dict.get('date_paid')),
-        'date_completed_woo': _parse_webhook_datetime(order_data_dict.get('date_completed_gmt') or order_data_dict.get('date_completed')),
-        'line_items_json': order_data_dict.get('line_items', []),
-        'shipping_lines_json': order_data_dict.get('shipping_lines', []),
-        'raw_data': order_data_dict, # Store the fetched API data or payload
-    }
-
-    try:
-        order_obj, created = WooCommerceOrder.objects.update_or_create(
-            woo_id=woo_id,
-            defaults=defaults
-        )
-        status_log = "Created" if created else "Updated"
-        logger.info(f"{status_log} WooCommerceOrder object for woo_id={woo_id} using provided data.")
-        return order_obj
-    except Exception as e:
-        logger.exception(f"Database error processing order ID {woo_id}: {e}")
-        return None
-
 # --- REVISED Webhook View ---
 
 @csrf_exempt
@@ -143,39 +86,23 @@ def woocommerce_webhook_receiver(request):
         logger.error(f"Error reading webhook payload: {e}", exc_info=True)
         return HttpResponseBadRequest("Could not read payload.")
 
-    # 3. Fetch Latest Order Data using REST API
-    logger.info(f"Attempting to fetch full order details for ID {order_id} via REST API...")
-    try:
-        # Call the utility function which uses API Key/Secret
-        latest_order_data = fetch_order_from_woo(order_id)
+    # 3. Trusted mode: the signed body is the full order, save it as is
+    if getattr(settings, 'WOOCOMMERCE_WEBHOOK_TRUST_PAYLOAD', False):
+        order_obj = apply_trusted_payload(payload)
+        if order_obj:
+            return HttpResponse("Webhook processed from payload.", status=200)
+        logger.info(f"Webhook payload for order {order_id} is incomplete; falling back to API refetch.")
 
+    # 4. Queue the API refetch; bursts for the same order collapse into one fetch
+    try:
+        scheduled = enqueue_order_refresh(order_id)
     except Exception as e:
-        # Catch potential errors during API client initialization or the request itself
-        logger.exception(f"Unhandled exception during API fetch for order {order_id}: {e}")
-        # Decide response: 500 might cause retries, 200 acknowledges receipt but notes failure
-        return HttpResponse(f"Server error fetching order details via API for order {order_id}.", status=500)
-
-    # 4. Process the Fetched API Data
-    if latest_order_data:
-        logger.info(f"Successfully fetched API data for order {order_id}. Processing...")
-        # Use the helper function to save the data obtained from the API
-        order_obj = _process_order_data(latest_order_data)
+        # Nothing was queued: a 500 makes WooCommerce deliver the webhook again
+        logger.exception(f"Could not queue refetch of order {order_id}: {e}")
+        return HttpResponse(f"Could not queue order {order_id} for processing.", status=500)
 
-        if order_obj:
-            logger.info(f"Successfully processed and saved API data for order {order_id}.")
-            # Return 200 OK to WooCommerce
-            return HttpResponse("Webhook processed successfully using fetched API data.", status=200)
-        else:
-            # Error during database save, already logged by _process_order_data
-            logger.error(f"Failed to save processed API data for order {order_id} to database.")
-            # Return 500 to indicate server-side processing error after successful API fetch
-            return HttpResponse(f"Error saving fetched order data for order {order_id}.", status=500)
-    else:
-        # fetch_order_from_woo returned None (error already logged within the function)
-        logger.error(f"API fetch for order {order_id} failed or returned no data. Webhook cannot be fully processed.")
-        # Decide response: 500 might cause retries, 200 acknowledges receipt but notes failure
-        # Returning 500 is often preferred if you want WooCommerce to retry later when API might be back up.
-        return HttpResponse(f"Failed to fetch order details via API for order {order_id}.", status=500)
+    message = "Order refetch queued." if scheduled else "Order refetch already queued."
+    return HttpResponse(message, status=202)
 
 # --- Frontend Views ---
 
@@ -227,37 +154,31 @@ def order_list_view(request):
             logger.warning(f"WC Invalid days filter value received: {days_filter_str}")
             # Keep days_filter_str for context, but don't mark active_filter=True
     elif not_shipped_filter_str:
-            not_shipped = ['processing', 'on-hold', 'partial-paid']
-            two_days_ago = timezone.now() - timedelta(days=2)
-            query_filter = Q(status__in=not_shipped) & Q(date_created_woo__lt=two_days_ago)
-            queryset = queryset.filter(query_filter)
+            queryset = queryset.filter(overdue_q(WooCommerceOrder))
             active_filter = True 
 
     # --- Apply Search Filter ---
     if search_query:
         logger.debug(f"WC Applying search filter: '{search_query}'")
-        # Prepare Q objects for OR query
-        query_filter = Q(billing_email__icontains=search_query) | \
-                       Q(billing_first_name__icontains=search_query) | \
-                       Q(billing_last_name__icontains=search_query) | \
-                       Q(billing_city__icontains=search_query) | \
-                       Q(billing_postcode__icontains=search_query) | \
-                       Q(billing_phone__icontains=search_query) | \
-                       Q(status__icontains=search_query)
-
-        # Check if search query might be an Order ID (integer)
-        if search_query.isdigit():
-            query_filter |= Q(woo_id=int(search_query))
-            query_filter |= Q(number__icontains=search_query)
-        
-        queryset = queryset.filter(query_filter)
+        # Indexed lookup in the shared order search tokens (see orders_app.search)
+        queryset = queryset.filter(pk__in=search_source_ids(search_query, PLATFORM_WOOCOMMERCE))
         active_filter = True # A search counts as an active filter
 
+    # Overdue flag computed in SQL; ?sort=overdue lists overdue orders first
+    queryset = annotate_overdue(queryset)
+
     # Apply ordering (Important: order *before* pagination)
-    ordered_queryset = queryset.order_by('-date_created_woo', '-woo_id')
+    ordering = ['-date_created_woo', '-woo_id']
+    if request.GET.get('sort') == 'overdue':
+        ordering.insert(0, '-is_overdue_highlight')
+    ordered_queryset = queryset.order_by(*ordering)
 
     # --- Pagination ---
-    paginator = Paginator(ordered_queryset, 20) # Show 15 orders per page
+    # Rows are compact summaries holding only the columns the list shows
+    paginator = Paginator(SummaryProjection(
+        ordered_queryset, WooOrderRow,
+        cache_key=order_cache_key('woo_list', [PLATFORM_WOOCOMMERCE], request.GET),
+    ), 20) # Show 15 orders per page
     page_number = request.GET.get('page')
     try:
         orders = paginator.page(page_number)
@@ -268,31 +189,9 @@ def order_list_view(request):
         # If page is out of range (e.g. 9999), deliver last page of results.
         orders = paginator.page(paginator.num_pages)
 
-    # --- >>> Calculate Overdue Highlight Flag <<< ---
-    now = timezone.now()
-    two_days_ago = now - timedelta(days=2)
-
-    for order in orders: # Iterate through the orders ON THE CURRENT PAGE
-        # Set a default value first
-        order.is_overdue_highlight = False
-        try:
-            # Check status and date validity before comparison
-            if order.status and order.date_created_woo:
-                is_overdue = (
-                    order.status.lower() in ['processing', 'on-hold', 'partial-paid'] and order.shipment_status.lower() in ['processing','partially-shppied','cancelled'] and
-                    order.date_created_woo < two_days_ago
-                    # ^^ IMPORTANT: Assumes date_created_woo is timezone-aware,
-                    # matching timezone.now(). Adjust if it's naive.
-                )
-                order.is_overdue_highlight = is_overdue
-        except AttributeError:
-            # Log if expected attributes are missing on an order object
-            logger.error(f"Order ID {getattr(order, 'woo_id', 'N/A')} missing 'status' or 'date_created_woo' attribute for overdue check.")
-            order.is_overdue_highlight = False # Ensure flag is false if data is missing
-
     # --- Prepare Context ---
     context = {
-        'orders': orders, # Pass the paginated orders (now with the flag) to the template
+        'orders': orders, # Pass the paginated orders (with the overdue flag) to the template
         'page_title': 'Synced WooCommerce Orders',
         # Pass current filter/search values back to maintain state in template forms/links
         'current_date_filter': date_filter_str if date_filter_str else '', # Pass back even if invalid format